@@ -0,0 +1,224 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+"""Deterministic JavaScript corpus for the benchmarks.
+
+Every generator takes a 'scale' argument, scale=1 produces roughly
+50KB of code. Generated code is seeded, so the same scale always
+produces the same text and results stay comparable between runs.
+"""
+
+import random
+
+WORDS = (
+    'alpha', 'beta', 'gamma', 'delta', 'epsilon', 'zeta', 'eta', 'theta',
+    'iota', 'kappa', 'lambda', 'mu', 'nu', 'xi', 'omicron', 'pi', 'rho',
+    'sigma', 'tau', 'upsilon', 'phi', 'chi', 'psi', 'omega',
+    )
+
+
+def _value(rnd, depth=0):
+    kind = rnd.randint(0, 7 if depth < 2 else 4)
+    if kind == 0:
+        return str(rnd.randint(0, 100000))
+    if kind == 1:
+        return '%d.%d' % (rnd.randint(0, 1000), rnd.randint(0, 99))
+    if kind == 2:
+        return '"%s %s"' % (rnd.choice(WORDS), rnd.choice(WORDS))
+    if kind == 3:
+        return rnd.choice(('true', 'false', 'null'))
+    if kind == 4:
+        return "'%s'" % rnd.choice(WORDS)
+    if kind == 5:
+        return '[%s]' % ', '.join(
+            _value(rnd, depth + 1) for _ in range(rnd.randint(0, 5)))
+    return '{%s}' % ', '.join(
+        '"%s": %s' % (rnd.choice(WORDS), _value(rnd, depth + 1))
+        for _ in range(rnd.randint(0, 4)))
+
+
+def object_literal(scale=1):
+    """One huge JSON-like 'var DATA = {...};' statement."""
+    rnd = random.Random(1)
+    items = [
+        '  "%s_%d": %s' % (rnd.choice(WORDS), index, _value(rnd))
+        for index in range(int(1000 * scale))
+        ]
+    return 'var DATA = {\n%s\n};\n' % ',\n'.join(items)
+
+
+def deep_nesting(scale=1, depth=40):
+    """Functions, blocks and statements nested 'depth' levels deep."""
+    rnd = random.Random(2)
+    chunks = []
+    for index in range(int(8 * scale)):
+        lines = []
+        for level in range(depth):
+            indent = '  ' * level
+            kind = level % 4
+            if kind == 0:
+                lines.append('%sfunction n%d_%d(x%d) {' % (
+                    indent, index, level, level))
+            elif kind == 1:
+                lines.append('%sif (x%d > %d) {' % (
+                    indent, level - 1, rnd.randint(0, 9)))
+            elif kind == 2:
+                lines.append('%sfor (var i%d = 0; i%d < %d; i%d++) {' % (
+                    indent, level, level, rnd.randint(1, 9), level))
+            else:
+                lines.append('%swhile (x%d--) {' % (indent, level - 3))
+            lines.append('%s  var v%d = x%d + %d;' % (
+                indent, level, level - kind, level))
+        for level in reversed(range(depth)):
+            lines.append('%s}' % ('  ' * level))
+        chunks.append('\n'.join(lines))
+    return '\n'.join(chunks) + '\n'
+
+
+def nested_callbacks(scale=1, depth=24):
+    """Callbacks nested 'depth' functions deep using outer names.
+
+    Every identifier is resolved through a long scope chain, which
+    stresses name resolution in the mangler.
+    """
+    rnd = random.Random(6)
+    chunks = []
+    for index in range(int(9 * scale)):
+        lines = ['load%d(function(err0, result0) {' % index]
+        for level in range(1, depth):
+            indent = '  ' * level
+            names = ['result%d' % rnd.randint(0, level - 1)
+                     for _ in range(4)]
+            lines.append('%sif (err%d) { return done(err%d); }' % (
+                indent, level - 1, level - 1))
+            lines.append('%svar total%d = %s;' % (
+                indent, level, ' + '.join(names)))
+            lines.append('%snext(total%d, function(err%d, result%d) {' % (
+                indent, level, level, level))
+        indent = '  ' * depth
+        lines.append('%sdone(null, %s);' % (indent, ' + '.join(
+            'total%d' % level for level in range(1, depth))))
+        for level in reversed(range(depth)):
+            lines.append('%s});' % ('  ' * level))
+        chunks.append('\n'.join(lines))
+    return '\n'.join(chunks) + '\n'
+
+
+def expression_chains(scale=1, length=60):
+    """Long arithmetic, logical and member expression chains."""
+    rnd = random.Random(3)
+    ops = ('+', '-', '*', '/', '%', '&&', '||', '|', '&', '===', '<')
+    lines = []
+    for index in range(int(150 * scale)):
+        operands = [rnd.choice(WORDS) for _ in range(length)]
+        expr = operands[0]
+        for operand in operands[1:]:
+            expr += ' %s %s' % (rnd.choice(ops), operand)
+        lines.append('var e%d = %s;' % (index, expr))
+        member = '.'.join(rnd.choice(WORDS) for _ in range(length // 4))
+        lines.append('e%d = %s(%d).%s;' % (index, member, index, member))
+    return '\n'.join(lines) + '\n'
+
+
+def small_functions(scale=1):
+    """Many small functions with locals, the bread and butter of mangling."""
+    rnd = random.Random(4)
+    chunks = []
+    for index in range(int(350 * scale)):
+        first, second = rnd.choice(WORDS), rnd.choice(WORDS)
+        chunks.append(
+            'function f%(i)d(%(a)s, %(b)s) {\n'
+            '  var result = %(a)s + %(b)s * %(n)d;\n'
+            '  if (result > %(n)d) {\n'
+            '    return result;\n'
+            '  }\n'
+            '  return f%(j)d(%(b)s, result);\n'
+            '}\n' % {
+                'i': index, 'j': max(index - 1, 0), 'n': rnd.randint(0, 99),
+                'a': first + 'Arg', 'b': second + 'Arg'}
+            )
+    return ''.join(chunks)
+
+
+def realistic(scale=1):
+    """Library-style code: module pattern, prototypes, closures, comments."""
+    rnd = random.Random(5)
+    chunks = ['(function(window, undefined) {\n  "use strict";\n']
+    for index in range(int(50 * scale)):
+        name = '%s%d' % (rnd.choice(WORDS).capitalize(), index)
+        chunks.append(
+            '  /**\n'
+            '   * %(name)s widget.\n'
+            '   */\n'
+            '  function %(name)s(element, options) {\n'
+            '    this.element = element;\n'
+            '    this.options = options || {};\n'
+            '    this.handlers = [];\n'
+            '  }\n'
+            '  %(name)s.prototype.on = function(type, handler) {\n'
+            '    // remember handlers so that they can be removed later\n'
+            '    this.handlers.push({type: type, handler: handler});\n'
+            '    this.element.addEventListener(type, handler, false);\n'
+            '    return this;\n'
+            '  };\n'
+            '  %(name)s.prototype.off = function() {\n'
+            '    for (var i = 0, length = this.handlers.length; '
+            'i < length; i++) {\n'
+            '      var item = this.handlers[i];\n'
+            '      this.element.removeEventListener(item.type, item.handler);\n'
+            '    }\n'
+            '    this.handlers = [];\n'
+            '  };\n'
+            '  %(name)s.prototype.render = function(data) {\n'
+            '    var html = "", key;\n'
+            '    for (key in data) {\n'
+            '      if (!data.hasOwnProperty(key)) continue;\n'
+            '      html += "<li class=\'" + key + "\'>" + '
+            'String(data[key]).replace(/[<>&]/g, "") + "</li>";\n'
+            '    }\n'
+            '    this.element.innerHTML = html ? "<ul>" + html + "</ul>" : '
+            '%(empty)s;\n'
+            '    return typeof this.options.done === "function" ? '
+            'this.options.done(html) : html;\n'
+            '  };\n'
+            '  window.%(name)s = %(name)s;\n' % {
+                'name': name, 'empty': repr(rnd.choice(WORDS))}
+            )
+    chunks.append('})(this);\n')
+    return ''.join(chunks)
+
+
+CORPUS = {
+    'object_literal': object_literal,
+    'deep_nesting': deep_nesting,
+    'nested_callbacks': nested_callbacks,
+    'expression_chains': expression_chains,
+    'small_functions': small_functions,
+    'realistic': realistic,
+    }
+
+
+def generate(scale=1):
+    """Return {name: source} for the whole corpus."""
+    return dict((name, func(scale)) for name, func in CORPUS.items())
@@ -0,0 +1,119 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+"""Import time of slimit modules measured with python -X importtime.
+
+Usage:
+
+    $ python benchmarks/importtime.py
+    $ python benchmarks/importtime.py -m slimit.parser --top 20
+
+Every module is imported in a fresh interpreter 'repeat' times, the
+best cumulative time is reported together with the modules that took
+most time themselves during the best run. Modules imported by the
+interpreter on startup are not shown. Bytecode should be cached
+(run twice) so that compilation is not measured.
+"""
+
+import optparse
+import os
+import subprocess
+import sys
+
+SRC = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.pardir, 'src')
+
+MODULES = ('slimit', 'slimit.minifier', 'slimit.parser', 'slimit.server')
+
+
+def import_times(module=None, python=sys.executable):
+    """Return [(module, self us, cumulative us)] of one import.
+
+    Only modules imported on startup are returned if module is None.
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        filter(None, [SRC, env.get('PYTHONPATH')]))
+    process = subprocess.Popen(
+        [python, '-X', 'importtime', '-c',
+         'pass' if module is None else 'import %s' % module],
+        stderr=subprocess.PIPE, env=env)
+    _, err = process.communicate()
+    if process.returncode:
+        raise RuntimeError(err.decode('utf-8', 'replace'))
+    times = []
+    for line in err.decode('utf-8', 'replace').splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        try:
+            own, cumulative = int(parts[0]), int(parts[1])
+        except ValueError:
+            # header
+            continue
+        times.append((parts[2].strip(), own, cumulative))
+    return times
+
+
+def run(modules=MODULES, repeat=5):
+    """Return {module: best [(module, self us, cumulative us)]}."""
+    results = {}
+    for module in modules:
+        runs = [import_times(module) for _ in range(repeat)]
+        results[module] = min(runs, key=lambda times: times[-1][2])
+    return results
+
+
+def format_results(results, top=10):
+    startup = set(name for name, _, _ in import_times())
+    lines = []
+    for module, times in sorted(results.items()):
+        lines.append('%-20s %8.2f ms' % (module, times[-1][2] / 1000.0))
+        slowest = sorted(
+            (item for item in times if item[0] not in startup),
+            key=lambda item: -item[1])[:top]
+        for name, own, _ in slowest:
+            lines.append('    %-30s %8.2f ms' % (name, own / 1000.0))
+    return '\n'.join(lines)
+
+
+def main(argv=None, out=sys.stdout):
+    parser = optparse.OptionParser(usage='%prog [options]')
+    parser.add_option('-m', '--module', action='append', dest='modules',
+                      help='measure given module, can be repeated')
+    parser.add_option('-r', '--repeat', type='int', default=5,
+                      help='best of N imports is reported (defaults to 5)')
+    parser.add_option('--top', type='int', default=10,
+                      help=('number of modules with the biggest own time '
+                            'shown (defaults to 10)'))
+    options, args = parser.parse_args(argv)
+    # make sure bytecode is written before measuring
+    import_times(' , '.join(options.modules or MODULES))
+    results = run(options.modules or MODULES, repeat=options.repeat)
+    out.write(format_results(results, top=options.top) + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,329 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+"""Benchmarks for lexer, parser, mangler and minifier stages.
+
+Usage:
+
+    $ python benchmarks/run.py
+    $ python benchmarks/run.py --save baseline.json
+    $ python benchmarks/run.py --compare baseline.json
+    $ python benchmarks/run.py --dispatch
+
+Every stage is timed separately on every corpus file (see corpus.py),
+throughput is reported in MB/s of the original source. With --compare
+the results are checked against a saved baseline and the script exits
+with status 1 if any stage got slower than the allowed threshold.
+
+With --dispatch the visitor stages and minify() as a whole are timed
+with the visitor dispatch table and with the getattr dispatch used
+before it, alternated in one process, and the speedup is reported.
+"""
+
+import gc
+import json
+import optparse
+import os
+import sys
+import timeit
+
+try:
+    import tracemalloc
+except ImportError:
+    # Python 2
+    tracemalloc = None
+
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.pardir, 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import corpus
+from slimit import mangler
+from slimit.lexer import Lexer
+from slimit.minifier import minify
+from slimit.parser import Parser
+from slimit.visitors import ecmavisitor, nodevisitor, scopevisitor
+from slimit.visitors.minvisitor import ECMAMinifier
+
+
+def _lex(text, parser):
+    lexer = Lexer()
+
+    def tokenize():
+        lexer.input(text)
+        for token in lexer:
+            pass
+
+    return tokenize
+
+
+def _parse(text, parser):
+    return lambda: parser.parse(text)
+
+
+def _mangle(text, parser):
+    tree = parser.parse(text)
+    return lambda: mangler.mangle(tree, toplevel=True)
+
+
+def _minify(text, parser):
+    tree = parser.parse(text)
+    mangler.mangle(tree, toplevel=True)
+    return lambda: ECMAMinifier().visit(tree)
+
+
+def _total(text, parser):
+    return lambda: minify(text, mangle=True, mangle_toplevel=True)
+
+
+# Every stage is a function that prepares input for the measured step
+# (untimed) and returns a callable doing the measured step.
+STAGES = (
+    ('lex', _lex),
+    ('parse', _parse),
+    ('mangle', _mangle),
+    ('minify', _minify),
+    ('total', _total),
+    )
+
+
+def _time_stage(stage, text, parser):
+    """Return seconds spent in one run of the stage."""
+    func = stage(text, parser)
+    gc.collect()
+    timer = timeit.default_timer
+    start = timer()
+    func()
+    return timer() - start
+
+
+def _peak_memory(stage, text, parser):
+    """Return peak memory in bytes allocated during one run."""
+    if tracemalloc is None:
+        return None
+    func = stage(text, parser)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(scale=1, repeat=3, names=None, memory=True):
+    """Run benchmarks and return results.
+
+    {corpus name: {stage: {'seconds':, 'mb_per_s':, 'peak_memory':}}}
+    """
+    parser = Parser()
+    results = {}
+    for name, text in sorted(corpus.generate(scale).items()):
+        if names and name not in names:
+            continue
+        megabytes = len(text.encode('utf-8')) / (1024.0 * 1024.0)
+        results[name] = {'size': len(text)}
+        for stage_name, stage in STAGES:
+            seconds = min(
+                _time_stage(stage, text, parser) for _ in range(repeat))
+            results[name][stage_name] = {
+                'seconds': seconds,
+                'mb_per_s': megabytes / seconds if seconds else 0.0,
+                'peak_memory': (
+                    _peak_memory(stage, text, parser) if memory else None),
+                }
+    return results
+
+
+def _getattr_visit(self, node):
+    # visitor dispatch before slimit.visitors.dispatch
+    method = 'visit_%s' % node.__class__.__name__
+    return getattr(self, method, self.generic_visit)(node)
+
+
+class GetattrDispatch(object):
+    """Context manager switching visitors back to getattr dispatch."""
+
+    classes = (
+        nodevisitor.ASTVisitor,
+        ecmavisitor.ECMAVisitor,
+        ECMAMinifier,
+        scopevisitor.Visitor,
+        )
+
+    def __enter__(self):
+        self._originals = [
+            (cls, cls.__dict__['visit']) for cls in self.classes]
+        for cls in self.classes:
+            cls.visit = _getattr_visit
+        return self
+
+    def __exit__(self, *exc_info):
+        for cls, visit in self._originals:
+            cls.visit = visit
+
+
+# Stages timed with both kinds of visitor dispatch, lexing and parsing
+# don't use visitors.
+DISPATCH_STAGES = (
+    ('mangle', _mangle),
+    ('minify', _minify),
+    ('total', _total),
+    )
+
+
+def run_dispatch(scale=1, repeat=3, names=None):
+    """Compare getattr dispatch with the dispatch table.
+
+    {corpus name: {stage: {'getattr': seconds, 'table': seconds}}}
+
+    Runs of both are alternated, so that both see the same machine load.
+    """
+    parser = Parser()
+    results = {}
+    for name, text in sorted(corpus.generate(scale).items()):
+        if names and name not in names:
+            continue
+        results[name] = {}
+        for stage_name, stage in DISPATCH_STAGES:
+            table, old = [], []
+            for run in range(repeat):
+                # which one goes first changes every run
+                if run % 2:
+                    table.append(_time_stage(stage, text, parser))
+                with GetattrDispatch():
+                    old.append(_time_stage(stage, text, parser))
+                if not run % 2:
+                    table.append(_time_stage(stage, text, parser))
+            results[name][stage_name] = {
+                'getattr': min(old), 'table': min(table)}
+    return results
+
+
+def format_dispatch(results):
+    lines = ['%-18s %-7s %10s %10s %9s' % (
+        'corpus', 'stage', 'getattr', 'table', 'speedup')]
+    for name, stages in sorted(results.items()):
+        for stage_name, _ in DISPATCH_STAGES:
+            result = stages[stage_name]
+            speedup = ''
+            if result['table']:
+                speedup = '%+.1f%%' % (
+                    (result['getattr'] / result['table'] - 1) * 100)
+            lines.append('%-18s %-7s %10.4f %10.4f %9s' % (
+                name, stage_name, result['getattr'], result['table'],
+                speedup))
+    return '\n'.join(lines)
+
+
+def compare(results, baseline, threshold):
+    """Return a list of (name, stage, old MB/s, new MB/s) regressions."""
+    regressions = []
+    for name, stages in sorted(results.items()):
+        for stage_name, _ in STAGES:
+            try:
+                old = baseline[name][stage_name]['mb_per_s']
+            except KeyError:
+                continue
+            new = stages[stage_name]['mb_per_s']
+            if old and new < old * (1 - threshold):
+                regressions.append((name, stage_name, old, new))
+    return regressions
+
+
+def format_results(results, baseline=None):
+    lines = ['%-18s %-7s %10s %10s %12s %9s' % (
+        'corpus', 'stage', 'seconds', 'MB/s', 'peak KB', 'change')]
+    for name, stages in sorted(results.items()):
+        for stage_name, _ in STAGES:
+            result = stages[stage_name]
+            peak = result['peak_memory']
+            change = ''
+            try:
+                old = baseline[name][stage_name]['mb_per_s']
+            except (KeyError, TypeError):
+                pass
+            else:
+                if old:
+                    change = '%+.1f%%' % (
+                        (result['mb_per_s'] / old - 1) * 100)
+            lines.append('%-18s %-7s %10.4f %10.3f %12s %9s' % (
+                name, stage_name, result['seconds'], result['mb_per_s'],
+                '-' if peak is None else '%d' % (peak // 1024), change))
+    return '\n'.join(lines)
+
+
+def main(argv=None, out=sys.stdout):
+    parser = optparse.OptionParser(usage='%prog [options]')
+    parser.add_option('-s', '--scale', type='float', default=1,
+                      help='corpus size multiplier (defaults to 1)')
+    parser.add_option('-r', '--repeat', type='int', default=3,
+                      help='best of N runs is reported (defaults to 3)')
+    parser.add_option('-c', '--corpus', action='append', dest='names',
+                      help='run only given corpus file, can be repeated')
+    parser.add_option('--no-memory', action='store_false', dest='memory',
+                      default=True, help='skip peak memory measurement')
+    parser.add_option('--save', metavar='FILE',
+                      help='save results as JSON baseline')
+    parser.add_option('--compare', metavar='FILE',
+                      help='compare results with JSON baseline')
+    parser.add_option('--threshold', type='float', default=0.2,
+                      help=('allowed throughput drop before a stage is '
+                            'reported as a regression (defaults to 0.2)'))
+    parser.add_option('--dispatch', action='store_true', default=False,
+                      help=('compare visitor dispatch table with getattr '
+                            'dispatch instead of timing the stages'))
+    options, args = parser.parse_args(argv)
+
+    if options.dispatch:
+        results = run_dispatch(scale=options.scale, repeat=options.repeat,
+                               names=options.names)
+        out.write(format_dispatch(results) + '\n')
+        return 0
+
+    results = run(scale=options.scale, repeat=options.repeat,
+                  names=options.names, memory=options.memory)
+
+    baseline = None
+    if options.compare:
+        with open(options.compare) as fin:
+            baseline = json.load(fin)
+    out.write(format_results(results, baseline) + '\n')
+
+    if options.save:
+        with open(options.save, 'w') as fout:
+            json.dump(results, fout, indent=2, sort_keys=True)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, options.threshold)
+        for name, stage_name, old, new in regressions:
+            out.write('REGRESSION %s/%s: %.3f MB/s -> %.3f MB/s\n' % (
+                name, stage_name, old, new))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
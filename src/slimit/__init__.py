@@ -24,4 +24,11 @@
 
 __author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
 
-from slimit.minifier import minify
+
+
+def minify(*args, **kwargs):
+    """Minify JavaScript code, see slimit.minifier.minify."""
+    # the parser and visitors are imported on first use, so importing
+    # slimit is cheap for tools that don't minify
+    from slimit.minifier import minify
+    return minify(*args, **kwargs)
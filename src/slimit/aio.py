@@ -0,0 +1,151 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+import asyncio
+import hashlib
+
+from concurrent.futures import ProcessPoolExecutor
+
+from slimit import worker
+
+
+class _Job(object):
+    """Minification running in a worker and the number of its waiters."""
+
+    def __init__(self, future):
+        self.future = future
+        self.waiters = 0
+
+
+class MinifyPool(object):
+    """Minifies JavaScript code in worker processes.
+
+    Every worker creates its parser once when it starts. Concurrent
+    requests to minify the same text with the same options share one
+    job.
+
+    >>> import asyncio
+    >>> from slimit.aio import MinifyPool
+    >>> async def main():
+    ...     async with MinifyPool(max_workers=1) as pool:
+    ...         return await pool.minify('var foo = 1;', mangle=True)
+    >>> print(asyncio.run(main()))
+    var foo=1;
+
+    A pool is meant to be used from one event loop at a time.
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers
+        self.submitted = 0
+        self._executor = None
+        self._jobs = {}
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, initializer=worker.init)
+        return self._executor
+
+    def _submit(self, key, text, options):
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self._get_executor(), worker.minify, text, options)
+        job = self._jobs[key] = _Job(future)
+        self.submitted += 1
+
+        def done(future):
+            if self._jobs.get(key) is job:
+                del self._jobs[key]
+            if not future.cancelled():
+                # all waiters might have timed out already
+                future.exception()
+
+        future.add_done_callback(done)
+        return job
+
+    async def minify(self, text, timeout=None, **options):
+        """Return minified text.
+
+        Options are passed to slimit.minifier.minify, they must be
+        hashable and picklable. Raises asyncio.TimeoutError if the
+        result is not ready in timeout seconds.
+
+        Cancelling the call or a timeout only cancels the job if nobody
+        else waits for it. A job that a worker started is not
+        interrupted, it finishes in the background.
+        """
+        data = text if isinstance(text, bytes) else text.encode('utf-8')
+        key = (hashlib.sha1(data).hexdigest(), tuple(sorted(options.items())))
+        job = self._jobs.get(key)
+        if job is None:
+            job = self._submit(key, text, options)
+        job.waiters += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(job.future), timeout)
+        finally:
+            job.waiters -= 1
+            if not job.waiters and not job.future.done():
+                # forget the job now, the done callback runs later and
+                # the same text could be requested before that
+                if self._jobs.get(key) is job:
+                    del self._jobs[key]
+                job.future.cancel()
+
+    def shutdown(self, wait=True):
+        """Stop worker processes."""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        # waiting for the workers must not block the event loop
+        await asyncio.get_running_loop().run_in_executor(None, self.shutdown)
+
+
+_pool = None
+
+
+async def minify(text, timeout=None, **options):
+    """Minify text in a shared MinifyPool without blocking the event loop.
+
+    See MinifyPool.minify
+    """
+    global _pool
+    if _pool is None:
+        _pool = MinifyPool()
+    return await _pool.minify(text, timeout=timeout, **options)
+
+
+def shutdown(wait=True):
+    """Stop worker processes of the shared pool."""
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait)
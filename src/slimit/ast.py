@@ -852,3 +852,19 @@ class This(Node):
 
     def __repr__(self):
         return 'This()'
+
+
+def dumps(node, positions=False):
+    """Return compact binary encoding of the tree.
+
+    See slimit.serialize.dumps
+    """
+    # Can't import at module level as serialize depends on ast module
+    from slimit.serialize import dumps
+    return dumps(node, positions=positions)
+
+
+def loads(data):
+    """Return the tree encoded by dumps."""
+    from slimit.serialize import loads
+    return loads(data)
@@ -0,0 +1,236 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+import errno
+import hashlib
+import os
+import re
+import tempfile
+
+from slimit import serialize
+
+SUFFIX = '.ast'
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+# subdirectories named like grammar versions are removed by other versions
+_VERSION_RE = re.compile(r'^[0-9a-f]{16}$')
+
+# os.rename fails on Windows if the target exists
+_replace = getattr(os, 'replace', os.rename)
+
+_grammar_version = None
+
+
+def grammar_version():
+    """Return a tag that changes whenever parsing results might change.
+
+    It is a digest of the lexer, parser, ast, serialize and cache modules
+    and the serialization format version, so upgrading slimit invalidates
+    cached trees.
+    """
+    global _grammar_version
+    if _grammar_version is None:
+        import sys
+        from slimit import ast, lexer, parser
+        digest = hashlib.sha1(str(serialize.FORMAT_VERSION).encode('ascii'))
+        for module in (lexer, parser, ast, serialize, sys.modules[__name__]):
+            path = module.__file__
+            if path.endswith(('.pyc', '.pyo')) and os.path.exists(path[:-1]):
+                path = path[:-1]
+            with open(path, 'rb') as fin:
+                digest.update(fin.read())
+        _grammar_version = digest.hexdigest()[:16]
+    return _grammar_version
+
+
+def default_directory():
+    """Return $SLIMIT_CACHE_DIR or slimit directory in the user cache."""
+    directory = os.environ.get('SLIMIT_CACHE_DIR')
+    if directory:
+        return directory
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+        os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'slimit')
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError as exc:
+        # removed by another process
+        if exc.errno != errno.ENOENT:
+            raise
+
+
+class ASTCache(object):
+    """Parsed trees stored on disk, keyed by content and grammar version.
+
+    >>> import shutil, tempfile
+    >>> from slimit.cache import ASTCache
+    >>> directory = tempfile.mkdtemp()
+    >>> cache = ASTCache(directory)
+    >>> cache.get('var a = 1;') is None
+    True
+    >>> from slimit.parser import Parser
+    >>> cache.put('var a = 1;', Parser().parse('var a = 1;'))
+    >>> print(cache.get('var a = 1;').to_ecma())
+    var a = 1;
+    >>> shutil.rmtree(directory)
+
+    Trees are stored with slimit.serialize in a subdirectory named
+    after the grammar version, subdirectories of other versions are
+    removed when the cache is first written to. Every hit updates
+    the modification time of the entry, when the total size of the
+    entries exceeds max_size the least recently used ones are removed
+    until the size drops below 3/4 of max_size.
+
+    Several processes can share the directory, entries are written to
+    a temporary file and renamed.
+    """
+
+    def __init__(self, directory=None, max_size=DEFAULT_MAX_SIZE,
+                 version=None):
+        if directory is None:
+            directory = default_directory()
+        self.root = directory
+        self.version = grammar_version() if version is None else version
+        self.directory = os.path.join(directory, self.version)
+        self.max_size = max_size
+        self.hits = self.misses = 0
+        # total size of entries, computed when the cache is first written
+        self._size = None
+
+    @staticmethod
+    def key(text):
+        if not isinstance(text, bytes):
+            text = text.encode('utf-8')
+        return hashlib.sha1(text).hexdigest()
+
+    def _path(self, text):
+        return os.path.join(self.directory, self.key(text) + SUFFIX)
+
+    def get(self, text):
+        """Return a new tree parsed from text or None if not cached."""
+        path = self._path(text)
+        try:
+            with open(path, 'rb') as fin:
+                data = fin.read()
+        except (IOError, OSError):
+            self.misses += 1
+            return None
+        try:
+            tree = serialize.loads(data)
+        except ValueError:
+            # truncated or written by an incompatible version
+            _remove(path)
+            self.misses += 1
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        self.hits += 1
+        return tree
+
+    def put(self, text, tree):
+        """Store the tree parsed from text.
+
+        The tree must not be changed yet, minification changes it
+        in place.
+        """
+        if self._size is None:
+            self._prepare()
+        # positions are kept, linters walking the tree report them
+        data = serialize.dumps(tree, positions=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fout:
+                fout.write(data)
+            _replace(tmp_path, self._path(text))
+        except OSError:
+            _remove(tmp_path)
+            raise
+        self._size += len(data)
+        if self._size > self.max_size:
+            self.evict()
+
+    def _prepare(self):
+        if not os.path.isdir(self.directory):
+            try:
+                os.makedirs(self.directory)
+            except OSError as exc:
+                if exc.errno != errno.EEXIST:
+                    raise
+        # trees parsed by other versions of slimit
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if (name != self.version and _VERSION_RE.match(name) and
+                    os.path.isdir(path)):
+                self._clear(path)
+        self._size = sum(size for _, size, _ in self._entries())
+
+    def _entries(self):
+        """Return a list of (mtime, size, path) of cached trees."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        """Remove least recently used trees until the size is below
+        3/4 of max_size."""
+        entries = sorted(self._entries())
+        self._size = sum(size for _, size, _ in entries)
+        limit = self.max_size * 3 // 4
+        for _, size, path in entries:
+            if self._size <= limit:
+                break
+            _remove(path)
+            self._size -= size
+
+    @staticmethod
+    def _clear(directory):
+        for name in os.listdir(directory):
+            if name.endswith((SUFFIX, '.tmp')):
+                _remove(os.path.join(directory, name))
+        try:
+            os.rmdir(directory)
+        except OSError:
+            # not empty, it isn't ours
+            pass
+
+    def clear(self):
+        """Remove all cached trees of this version."""
+        if os.path.isdir(self.directory):
+            self._clear(self.directory)
+        self._size = None
@@ -0,0 +1,142 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+import copy
+
+from slimit import ast
+from slimit.dedup import deduplicate as _deduplicate
+from slimit.scope import SymbolTable
+from slimit.visitors.scopevisitor import (
+    ScopeTreeVisitor,
+    fill_scope_references,
+    )
+from slimit.visitors.propvisitor import PropertyAliasVisitor
+from slimit.visitors.seqvisitor import SequenceVisitor
+from slimit.visitors.minvisitor import ECMAMinifier
+from slimit.visitors.unusedvisitor import UnusedVisitor
+from slimit.visitors.varvisitor import VarHoisterVisitor, VarMergerVisitor
+
+
+def _clone(node):
+    """Copy the tree, annotations like scopes are shared with the copy."""
+    clone = copy.copy(node)
+    for name, value in vars(node).items():
+        if isinstance(value, ast.Node):
+            setattr(clone, name, _clone(value))
+        elif isinstance(value, list):
+            setattr(clone, name, [
+                _clone(item) if isinstance(item, ast.Node) else item
+                for item in value
+                ])
+    return clone
+
+
+def _guarded(tree, oracle, transform):
+    """Apply transform, undo it if the output doesn't get smaller.
+
+    Returns True if the transformation was kept.
+    """
+    if oracle is None:
+        transform(tree)
+        return True
+
+    backup = _clone(tree)
+    before = ECMAMinifier().visit(tree)
+    transform(tree)
+    if oracle.smaller(ECMAMinifier().visit(tree), before):
+        return True
+    tree.children()[:] = backup.children()
+    return False
+
+
+def remove_unused(tree, toplevel=False):
+    """Remove unreferenced variables and function declarations.
+
+    Removing a declaration can make other names unreferenced, so the
+    tree is analyzed again until nothing else can be removed.
+
+    Args:
+        toplevel: defaults to False. Defines if declarations in the
+        global scope should be removed as well.
+    """
+    while True:
+        sym_table = SymbolTable()
+        visitor = ScopeTreeVisitor(sym_table)
+        visitor.visit(tree)
+        fill_scope_references(tree, visitor.identifiers)
+
+        unused = UnusedVisitor(toplevel=toplevel)
+        unused.visit(tree)
+        if not unused.removed:
+            break
+
+
+def compress(tree, hoist_vars=False, sequences=True, unused=True,
+             toplevel=False, alias_properties=False, deduplicate=False,
+             stats=None, oracle=None):
+    """Apply size reducing transformations to the tree in place.
+
+    Args:
+        hoist_vars: defaults to False. Defines if var declarations
+        should be hoisted into one statement per function.
+        sequences: defaults to True. Defines if consecutive statements
+        should be joined into comma separated expressions and 'if'
+        statements converted into logical/conditional expressions.
+        unused: defaults to True. Defines if unreferenced variables and
+        functions should be removed.
+        toplevel: defaults to False. Defines if global scope declarations
+        can be removed or added.
+        alias_properties: defaults to False. Defines if repeated property
+        receivers like X.prototype should be replaced with local aliases.
+        deduplicate: defaults to False. Defines if identical functions
+        and constant literals should share one definition, see
+        slimit.dedup.deduplicate for the assumptions it makes.
+        stats: optional dictionary, filled with bytes saved by
+        transformations, e.g. {'alias_properties': {'X.prototype': 12}}
+        oracle: optional slimit.size.SizeOracle. If given, var hoisting,
+        property aliasing and deduplication are undone unless they make
+        the output smaller according to the oracle (e.g. after gzip
+        compression). The output is measured before names are mangled,
+        so the decisions don't account for mangled names.
+    """
+    if unused:
+        remove_unused(tree, toplevel=toplevel)
+    if deduplicate:
+        report = {}
+        kept = _guarded(tree, oracle, lambda tree: report.update(
+            _deduplicate(tree, toplevel=toplevel)))
+        if stats is not None:
+            stats['deduplicate'] = report if kept else {}
+    if hoist_vars:
+        _guarded(tree, oracle, VarHoisterVisitor().visit)
+    if alias_properties:
+        visitor = PropertyAliasVisitor(toplevel=toplevel)
+        kept = _guarded(tree, oracle, visitor.visit)
+        if stats is not None:
+            stats['alias_properties'] = visitor.stats if kept else {}
+    if sequences:
+        SequenceVisitor().visit(tree)
+    VarMergerVisitor().visit(tree)
@@ -0,0 +1,320 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from odict import odict as OrderedDict
+
+from slimit import ast
+from slimit.lexer import Lexer
+from slimit.nodepath import ParentIndex
+from slimit.scope import ID_CHARS, SymbolTable, powerset
+from slimit.structhash import StructuralHashes, walk
+from slimit.visitors.minvisitor import ECMAMinifier
+from slimit.visitors.scopevisitor import (
+    ScopeTreeVisitor,
+    fill_scope_references,
+    )
+from slimit.visitors.varvisitor import is_directive
+
+_CANDIDATES = (ast.FuncExpr, ast.FuncDecl, ast.Object, ast.Array)
+_SCOPES = (ast.Program, ast.FuncBase)
+_LOOPS = (ast.For, ast.ForIn, ast.While, ast.DoWhile)
+
+
+def _identifier(name):
+    node = ast.Identifier(name)
+    node._mangle_candidate = True
+    node._in_expression = True
+    return node
+
+
+def _body(node):
+    """Return the statement list of a program or a function."""
+    if isinstance(node, ast.Program):
+        return node.children()
+    return node.elements
+
+
+def _is_primitive(node):
+    """Return True if node is a primitive literal like -1 or 'a'."""
+    if isinstance(node, (ast.Number, ast.String, ast.Boolean, ast.Null,
+                         ast.Elision)):
+        return True
+    if isinstance(node, ast.UnaryOp):
+        return (node.op in ('-', '+', '!') and not node.postfix and
+                _is_primitive(node.value))
+    return False
+
+
+def is_constant(node):
+    """Return True if node is a literal made of primitive values only.
+
+    Nested arrays and objects are not constant, they are often
+    containers that are filled later, e.g. X = {prototype: {}}.
+    """
+    if isinstance(node, ast.Array):
+        return all(_is_primitive(item) for item in node.items)
+    if isinstance(node, ast.Object):
+        return all(
+            isinstance(prop, ast.Assign) and _is_primitive(prop.right)
+            for prop in node.properties)
+    return _is_primitive(node)
+
+
+def _is_closed(node, scope):
+    """Return True if every free name of the subtree resolves to the same
+    symbol from the scope as it does where the subtree is."""
+    inner = set()
+    idents = []
+    for child in walk(node):
+        if isinstance(child, ast.FuncBase):
+            inner.add(id(child.function_scope))
+        elif (isinstance(child, ast.Identifier) and
+              getattr(child, '_in_expression', False)):
+            idents.append(child)
+    for ident in idents:
+        symbol = getattr(ident, 'symbol', None)
+        if symbol is not None and id(symbol.scope) in inner:
+            continue
+        if scope.resolve(ident.value) is not symbol:
+            return False
+    return True
+
+
+class _Occurrence(object):
+    """Duplicate subtree with its ancestors, the closest first."""
+
+    def __init__(self, node, index):
+        self.node = node
+        self.ancestors = index.ancestors(node)
+        # enclosing program and functions, the outermost first
+        self.scopes = [
+            ancestor for ancestor in reversed(self.ancestors)
+            if isinstance(ancestor, _SCOPES)
+            ]
+
+    def is_evaluated_once(self, scope):
+        """Return True if the node is evaluated at most once per run of
+        the scope: it's not in a nested function or in a loop."""
+        for ancestor in self.ancestors:
+            if isinstance(ancestor, _SCOPES):
+                return ancestor is scope
+            if isinstance(ancestor, _LOOPS):
+                return False
+        return False
+
+    def is_replaced(self, replaced):
+        return (id(self.node) in replaced or
+                any(id(ancestor) in replaced for ancestor in self.ancestors))
+
+    def declaration_body(self):
+        """Return statement list holding a FuncDecl if the name is not
+        declared by another function in the same list, otherwise None."""
+        parent = self.ancestors[0]
+        if not isinstance(parent, _SCOPES):
+            return None
+        body = _body(parent)
+        name = self.node.identifier.value
+        declared = [
+            element for element in body
+            if isinstance(element, ast.FuncDecl) and
+            element.identifier.value == name
+            ]
+        return body if len(declared) == 1 else None
+
+
+def _common_scope(occurrences):
+    """Return the innermost program or function containing all nodes."""
+    common = None
+    for scopes in zip(*[occurrence.scopes for occurrence in occurrences]):
+        if any(scope is not scopes[0] for scope in scopes):
+            break
+        common = scopes[0]
+    return common
+
+
+def deduplicate(tree, toplevel=False):
+    """Hoist duplicate functions and constant literals.
+
+    var a = [1, 2, 3]; function f() { return function(x) { return x; }; }
+    var b = [1, 2, 3]; function g() { return function(x) { return x; }; }
+    ==>
+    var c = [1, 2, 3], d = function(x) { return x; };
+    var a = c; function f() { return d; }
+    var b = c; function g() { return d; }
+
+    Identical function expressions, function declarations with the same
+    name, non-empty arrays and objects made of primitive values are
+    replaced with a variable defined once in the innermost function
+    containing all of them, or in the program if toplevel is True.
+    Functions are only shared if every name they use refers to the same
+    variable there. Arrays and objects are only shared if they are not
+    in nested functions or loops of that function, so a function
+    returning a literal still returns a new object every time.
+
+    The transformation assumes that the shared functions and literals
+    are neither mutated nor compared by identity: both occurrences
+    evaluate to the same object afterwards. Programs using 'eval' or
+    'with' are left intact.
+
+    Returns {minified source: saved bytes} for every hoisted definition.
+    """
+    used = set()
+    for node in walk(tree):
+        if isinstance(node, ast.With):
+            return {}
+        if isinstance(node, ast.Identifier):
+            if node.value == 'eval':
+                return {}
+            used.add(node.value)
+    names = (
+        name for name in powerset(ID_CHARS)
+        if name not in used and name.upper() not in Lexer.keywords
+        )
+
+    sym_table = SymbolTable()
+    visitor = ScopeTreeVisitor(sym_table)
+    visitor.visit(tree)
+    fill_scope_references(tree, visitor.identifiers)
+
+    index = ParentIndex(tree)
+    hashes = StructuralHashes(tree)
+    minifier = ECMAMinifier()
+    candidates = []
+    for group in hashes.duplicates(types=_CANDIDATES):
+        first = group[0]
+        if isinstance(first, (ast.Object, ast.Array)):
+            # empty literals are containers that are filled later
+            if not first.children() or not is_constant(first):
+                continue
+        elif isinstance(first, ast.FuncExpr) and first.identifier is not None:
+            # the name is visible inside of the function only
+            continue
+        source = minifier.visit(first)
+        # ancestors are looked up before the tree is changed
+        occurrences = [_Occurrence(node, index) for node in group]
+        candidates.append((source, occurrences))
+    # bigger subtrees first, their duplicate children go with them
+    candidates.sort(key=lambda candidate: -len(candidate[0]))
+
+    report = OrderedDict()
+    # {id(statement list): (statement list, definitions, declarations)}
+    prologues = OrderedDict()
+    replaced = set()
+    name = next(names)
+    for source, occurrences in candidates:
+        first = occurrences[0].node
+        is_decl = isinstance(first, ast.FuncDecl)
+        while True:
+            occurrences = [
+                occurrence for occurrence in occurrences
+                if not occurrence.is_replaced(replaced) and
+                (not is_decl or occurrence.declaration_body() is not None)
+                ]
+            if len(occurrences) < 2:
+                break
+            target = _common_scope(occurrences)
+            if isinstance(target, ast.Program):
+                if not toplevel:
+                    break
+                scope = sym_table.globals
+            else:
+                scope = target.function_scope
+            if isinstance(first, (ast.Object, ast.Array)):
+                # a literal evaluated more often than the shared one,
+                # e.g. returned by a function, is a new object every time
+                once = [
+                    occurrence for occurrence in occurrences
+                    if occurrence.is_evaluated_once(target)
+                    ]
+                if len(once) == len(occurrences):
+                    break
+                occurrences = once
+                continue
+            closed = [
+                occurrence for occurrence in occurrences
+                if _is_closed(occurrence.node, scope)
+                ]
+            if len(closed) == len(occurrences):
+                break
+            occurrences = closed
+        if len(occurrences) < 2 or (not toplevel and
+                                    isinstance(target, ast.Program)):
+            continue
+
+        count = len(occurrences)
+        if is_decl:
+            decl_name = first.identifier.value
+            # 'function f(' becomes 'function(' and 'var f=d;' is added
+            definition = len(source) - len(decl_name) - 1
+            per_use = len('var %s=%s;' % (decl_name, name))
+        else:
+            definition = len(source)
+            per_use = len(name)
+        # 'var d=...;', merging into other var statements saves more
+        saved = count * len(source) - (
+            definition + len(name) + 6 + count * per_use)
+        if saved <= 0:
+            continue
+
+        first = occurrences[0].node
+        if is_decl:
+            shared = ast.FuncExpr(None, first.parameters, first.elements)
+        else:
+            shared = first
+        for occurrence in occurrences:
+            node = occurrence.node
+            path = index.path(node)
+            if is_decl:
+                body = occurrence.declaration_body()
+                path.remove()
+                _prologue(prologues, body)[2].append(ast.VarStatement([
+                    ast.VarDecl(ast.Identifier(decl_name), _identifier(name))
+                    ]))
+            else:
+                path.replace(_identifier(name))
+            replaced.add(id(node))
+        _prologue(prologues, _body(target))[1].append(ast.VarStatement([
+            ast.VarDecl(ast.Identifier(name), shared)
+            ]))
+        report[source] = saved
+        name = next(names)
+
+    for body, definitions, declarations in prologues.values():
+        position = 0
+        while position < len(body) and is_directive(body[position]):
+            position += 1
+        body[position:position] = definitions + declarations
+    return report
+
+
+def _prologue(prologues, body):
+    key = id(body)
+    if key not in prologues:
+        prologues[key] = (body, [], [])
+    return prologues[key]
@@ -95,6 +95,9 @@ class Lexer(object):
         self.prev_token = None
         self.cur_token = None
         self.next_tokens = []
+        # called with an illegal character and its position instead
+        # of printing it, see Parser.parse errors
+        self.on_error = None
         self.build()
 
     def build(self, **kwargs):
@@ -102,6 +105,12 @@ class Lexer(object):
         self.lexer = ply.lex.lex(object=self, **kwargs)
 
     def input(self, text):
+        # nothing is left from the previous input, even if reading it
+        # stopped with an error
+        self.prev_token = None
+        self.cur_token = None
+        self.next_tokens = []
+        self.lexer.lineno = 1
         self.lexer.input(text)
 
     def token(self):
@@ -440,6 +449,9 @@ class Lexer(object):
         return token
 
     def t_error(self, token):
-        print('Illegal character %r at %s:%s after %s' % (
-            token.value[0], token.lineno, token.lexpos, self.prev_token))
+        if self.on_error is not None:
+            self.on_error(token.value[0], token.lexpos)
+        else:
+            print('Illegal character %r at %s:%s after %s' % (
+                token.value[0], token.lineno, token.lexpos, self.prev_token))
         token.lexer.skip(1)
@@ -0,0 +1,252 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+import re
+
+from slimit.lexer import Lexer
+
+# Top level var statements initialized with JSON-like array and object
+# literals are copied to the output with whitespace removed, without
+# building ast.Array and ast.Object nodes. Everything else is parsed.
+
+# literals are split out only if they are at least this share of the
+# text, otherwise lexing the rest of the code to find them costs more
+# than it saves
+MIN_SHARE = 0.25
+
+_WHITESPACE = '[ \t\n\r]*'
+
+_DECLARATION = re.compile(
+    r'var[ \t\n\r]+([a-zA-Z_$][0-9a-zA-Z_$]*)[ \t\n\r]*=[ \t\n\r]*(?=[\[{])')
+
+_END = re.compile(_WHITESPACE + ';')
+
+# strings and numbers are the same as the ones accepted by the lexer,
+# strings without escapes are tried first because it's faster
+_TOKEN = re.compile(r"""
+    [ \t\n\r]*
+    (?:
+        ([\[{])                            # 1 opening bracket
+      | ([\]}])                            # 2 closing bracket
+      | ([,:])                             # 3 separator
+      | ("[^"\\\n\r]*"|'[^'\\\n\r]*'|%s)   # 4 string
+      | (-?%s)                             # 5 number
+      | ([a-zA-Z_$][0-9a-zA-Z_$]*)         # 6 name
+    )
+    """ % (Lexer.string, Lexer.t_NUMBER), re.VERBOSE)
+
+_OPEN, _CLOSE, _SEPARATOR, _STRING, _NUMBER, _NAME = range(1, 7)
+
+# what is expected after the last token
+(_VALUE, _FIRST_ITEM, _KEY, _FIRST_KEY, _COLON,
+ _AFTER_VALUE) = range(6)
+
+_CONSTANTS = ('true', 'false', 'null')
+
+_CLOSING = {'[': ']', '{': '}'}
+
+
+def scan(text, pos=0):
+    """Scan an array or object literal starting at pos.
+
+    Returns a tuple (minified literal, end position) or None if
+    there is anything else but strings, numbers, true, false, null
+    and nested literals, or the literal is not closed.
+
+    >>> from slimit.literal import scan
+    >>> scan('[1, {"a": -2.5, b: null}, \\'c\\'] + x')
+    ('[1,{"a":-2.5,b:null},\\'c\\']', 30)
+    >>> scan('[1, f(2)]') is None
+    True
+    """
+    match = _TOKEN.match
+    pieces = []
+    # start of the current piece without whitespace
+    start = pos
+    stack = []
+    expect = _VALUE
+    while True:
+        result = match(text, pos)
+        if result is None:
+            return None
+        kind = result.lastindex
+        token_start = result.start(kind)
+        if token_start != pos:
+            pieces.append(text[start:pos])
+            start = token_start
+        pos = result.end()
+        token = result.group(kind)
+
+        if kind == _NAME and token in _CONSTANTS:
+            kind = _NUMBER
+        if kind == _OPEN:
+            if expect not in (_VALUE, _FIRST_ITEM):
+                return None
+            stack.append(token)
+            expect = _FIRST_ITEM if token == '[' else _FIRST_KEY
+            continue
+        if kind == _CLOSE:
+            if (not stack or _CLOSING[stack.pop()] != token or
+                expect not in (_AFTER_VALUE, _FIRST_ITEM, _FIRST_KEY)):
+                return None
+            if expect == _FIRST_ITEM and token == '}':
+                return None
+            if expect == _FIRST_KEY and token == ']':
+                return None
+        elif kind == _SEPARATOR:
+            if token == ',' and expect == _AFTER_VALUE:
+                expect = _VALUE if stack[-1] == '[' else _KEY
+            elif token == ':' and expect == _COLON:
+                expect = _VALUE
+            else:
+                return None
+            continue
+        elif expect in (_KEY, _FIRST_KEY):
+            if kind == _NAME and token not in Lexer.keywords_dict:
+                expect = _COLON
+                continue
+            if kind == _STRING and '\\\n' not in token:
+                expect = _COLON
+                continue
+            return None
+        elif (kind not in (_STRING, _NUMBER) or
+              expect not in (_VALUE, _FIRST_ITEM) or '\\\n' in token):
+            # the lexer removes escaped new lines from strings
+            return None
+
+        # a value is complete
+        if not stack:
+            pieces.append(text[start:pos])
+            return ''.join(pieces), pos
+        expect = _AFTER_VALUE
+
+
+def _statement(text, pos):
+    """Return (minified statement, end) for 'var x = literal;' at pos."""
+    declaration = _DECLARATION.match(text, pos)
+    if declaration is None:
+        return None
+    name = declaration.group(1)
+    if name in Lexer.keywords_dict:
+        return None
+    result = scan(text, declaration.end())
+    if result is None:
+        return None
+    literal, end = result
+    # a literal followed by anything but ';' can be a part of
+    # an expression, e.g. 'var a = [1]\n[0]'
+    semicolon = _END.match(text, end)
+    if semicolon is None:
+        return None
+    return 'var %s=%s;' % (name, literal), semicolon.end()
+
+
+def _find_statements(text):
+    """Return {position: (minified statement, end)} of literal statements.
+
+    The text is not tokenized, so statements inside comments or strings
+    are found too.
+    """
+    statements = {}
+    pos = text.find('var')
+    while pos != -1:
+        result = _statement(text, pos)
+        if result is not None:
+            statements[pos] = result
+            pos = result[1]
+        pos = text.find('var', pos + 3)
+    return statements
+
+
+class _SplitLexer(Lexer):
+
+    def t_error(self, token):
+        # the parser reports the error
+        raise SyntaxError('Illegal character %r' % token.value[0])
+
+
+def split(text):
+    """Split text into code and minified literal var statements.
+
+    Returns a list of (text, is_literal) tuples or None if there are
+    no or too few literal statements. Only statements at the top level
+    that follow the start of the text, ';' or '}' and a new line are
+    split out, so the pieces of code can be parsed separately.
+
+    >>> from slimit.literal import split
+    >>> split('var DATA = {\\n  "a": [1, 2]\\n};\\nf(DATA);\\n')
+    [('var DATA={"a":[1,2]};', True), ('\\nf(DATA);\\n', False)]
+    """
+    statements = _find_statements(text)
+    size = sum(end - pos for pos, (_, end) in statements.items())
+    if size < len(text) * MIN_SHARE:
+        return None
+
+    lexer = _SplitLexer()
+    lexer.input(text)
+    pieces = []
+    # start of the current piece of code
+    start = 0
+    depth = 0
+    # end of the previous token at depth 0 and its type
+    prev_end = 0
+    prev_type = None
+    while True:
+        try:
+            token = lexer.token()
+        except SyntaxError:
+            return None
+        if token is None:
+            break
+        kind = token.type
+        if kind in ('LBRACE', 'LPAREN', 'LBRACKET'):
+            depth += 1
+        elif kind in ('RBRACE', 'RPAREN', 'RBRACKET'):
+            depth -= 1
+        elif (kind == 'VAR' and depth == 0 and (
+                prev_type in (None, 'SEMI') or
+                prev_type == 'RBRACE' and (
+                    '\n' in text[prev_end:token.lexpos] or
+                    '\r' in text[prev_end:token.lexpos]))):
+            result = statements.get(token.lexpos)
+            if result is not None:
+                statement, end = result
+                if text[start:token.lexpos].strip():
+                    pieces.append((text[start:token.lexpos], False))
+                pieces.append((statement, True))
+                start = prev_end = end
+                prev_type = 'SEMI'
+                # continue after the statement
+                lexer.lexer.lexpos = end
+                lexer.cur_token = None
+                continue
+        prev_type = kind
+        prev_end = lexer.lexer.lexpos
+    if text[start:].strip():
+        pieces.append((text[start:], False))
+    if not any(is_literal for _, is_literal in pieces):
+        return None
+    return pieces
@@ -24,28 +24,76 @@
 
 __author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
 
-from slimit.scope import SymbolTable
+from slimit.scope import SymbolTable, VarSymbol
+from slimit.stats import timer
 from slimit.visitors.scopevisitor import (
     ScopeTreeVisitor,
     fill_scope_references,
     mangle_scope_tree,
-    NameManglerVisitor,
+    rename_scope_tree,
     )
 
 
-def mangle(tree, toplevel=False):
+def _count_scopes(scope):
+    """Return (number of scopes, number of symbols) in a scope tree."""
+    scopes, symbols = 1, len(scope.symbols)
+    for child in scope.children:
+        child_scopes, child_symbols = _count_scopes(child)
+        scopes += child_scopes
+        symbols += child_symbols
+    return scopes, symbols
+
+
+def _declare_free_names(sym_table, identifiers):
+    """Define names that are not declared in the tree as globals.
+
+    Returns the number of defined names.
+    """
+    names = set(
+        ident.value for ident in identifiers
+        if ident.scope.resolve(ident.value) is None
+        )
+    for name in sorted(names):
+        sym_table.globals.define(VarSymbol(name))
+    return len(names)
+
+
+def mangle(tree, toplevel=False, stats=None, partial=False):
     """Mangle names.
 
+    The tree is walked once to build the scope tree and collect
+    identifiers. Every collected identifier is resolved once to fill
+    scope and symbol references, mangled symbols then rename their
+    references directly.
+
     Args:
         toplevel: defaults to False. Defines if global
         scope should be mangled or not.
+        stats: optional slimit.stats.StatsCollector, receives time spent
+        in every mangling phase and number of scopes and symbols.
+        partial: defaults to False. Defines if the tree is a part of
+        a program, e.g. one top level statement. Names that are not
+        declared in the tree can be declared by other parts, so they
+        are treated as globals and local names don't shadow them.
     """
     sym_table = SymbolTable()
-    visitor = ScopeTreeVisitor(sym_table)
-    visitor.visit(tree)
+    free_names = 0
+    with timer(stats, 'mangle.scope_tree'):
+        visitor = ScopeTreeVisitor(sym_table)
+        visitor.visit(tree)
+        if partial:
+            free_names = _declare_free_names(sym_table, visitor.identifiers)
+
+    with timer(stats, 'mangle.fill_scope_references'):
+        fill_scope_references(tree, visitor.identifiers)
+    with timer(stats, 'mangle.mangle_scope_tree'):
+        mangle_scope_tree(sym_table.globals, toplevel)
 
-    fill_scope_references(tree)
-    mangle_scope_tree(sym_table.globals, toplevel)
+    with timer(stats, 'mangle.rename'):
+        rename_scope_tree(sym_table.globals)
 
-    mangler = NameManglerVisitor()
-    mangler.visit(tree)
+    if stats is not None:
+        scopes, symbols = _count_scopes(sym_table.globals)
+        stats.incr('scopes', scopes)
+        # only symbols declared in the tree
+        stats.incr('symbols', symbols - free_names)
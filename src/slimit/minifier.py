@@ -25,24 +25,257 @@
 __author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
 
 import sys
-import optparse
-import textwrap
 
-from slimit import mangler
-from slimit.parser import Parser
-from slimit.visitors.minvisitor import ECMAMinifier
+from slimit import size
 
 
-def minify(text, mangle=False, mangle_toplevel=False):
-    parser = Parser()
-    tree = parser.parse(text)
-    if mangle:
-        mangler.mangle(tree, toplevel=mangle_toplevel)
-    minified = ECMAMinifier().visit(tree)
+def minify(text, mangle=False, mangle_toplevel=False, compress=False,
+           hoist_vars=False, alias_properties=False, deduplicate=False,
+           oracle=None, stats=None, cache=None, parser=None):
+    """Minify JavaScript code.
+
+    stats is an optional slimit.stats.StatsCollector that receives wall
+    time of every phase, number of tokens, nodes, scopes and symbols
+    of the parsed code and the size of the output. Statements copied
+    without parsing are counted in literal_statements and literal_size.
+
+    cache is an optional slimit.cache.ASTCache, the parser is neither
+    created nor run if the tree of the text is in the cache.
+
+    parser is an optional slimit.parser.Parser to reuse, creating
+    a parser takes a few milliseconds.
+
+    Unless the code is compressed or the top level scope mangled, top
+    level var statements initialized with big JSON-like literals are
+    copied without whitespace instead of being parsed, see slimit.literal.
+    """
+    # Imported on first use: the command line client and tools that
+    # import slimit without minifying don't need the parser.
+    from slimit import literal
+    from slimit.parser import Parser
+    from slimit.stats import StatsCollector, timer
+
+    with timer(stats, 'total'):
+        pieces = None
+        if not (compress or mangle_toplevel) and cache is None:
+            with timer(stats, 'literals'):
+                pieces = literal.split(text)
+        minified = None
+        if pieces is not None:
+            if parser is None and not all(
+                    is_literal for _, is_literal in pieces):
+                with timer(stats, 'parser_init'):
+                    parser = Parser()
+            # counted only if the whole text is not minified again
+            piece_stats = None if stats is None else StatsCollector()
+            try:
+                minified = ''.join(
+                    piece if is_literal else _minify(
+                        piece, parser, mangle=mangle, partial=True,
+                        stats=piece_stats)
+                    for piece, is_literal in pieces
+                    )
+            except SyntaxError:
+                # report the error at its position in the whole text
+                pass
+            else:
+                if stats is not None:
+                    stats.update(piece_stats)
+                    literals = [
+                        piece for piece, is_literal in pieces if is_literal]
+                    stats.incr('literal_statements', len(literals))
+                    stats.incr('literal_size', sum(
+                        size.raw_size(piece) for piece in literals))
+        if minified is None:
+            minified = _minify(
+                text, parser, mangle=mangle, mangle_toplevel=mangle_toplevel,
+                compress=compress, hoist_vars=hoist_vars,
+                alias_properties=alias_properties, deduplicate=deduplicate,
+                oracle=oracle, stats=stats, cache=cache)
+    if stats is not None:
+        stats.incr('input_size', size.raw_size(text))
+        stats.incr('output_size', size.raw_size(minified))
     return minified
 
 
-def main(argv=None, inp=sys.stdin, out=sys.stdout):
+def _minify(text, parser, mangle=False, mangle_toplevel=False,
+            compress=False, hoist_vars=False, alias_properties=False,
+            deduplicate=False, oracle=None, stats=None, cache=None,
+            partial=False):
+    """Parse, compress, mangle and minify text, see minify."""
+    from slimit import compressor
+    from slimit import mangler
+    from slimit.parser import Parser
+    from slimit.stats import CountingLexer, timer
+    from slimit.visitors import nodevisitor
+    from slimit.visitors.minvisitor import ECMAMinifier
+
+    tree = None
+    if cache is not None:
+        with timer(stats, 'cache_get'):
+            tree = cache.get(text)
+    if tree is None:
+        if parser is None:
+            with timer(stats, 'parser_init'):
+                parser = Parser()
+        with timer(stats, 'parse'):
+            lexer = None if stats is None else CountingLexer(parser.lexer)
+            tree = parser.parse(text, lexer=lexer)
+        if cache is not None:
+            with timer(stats, 'cache_put'):
+                cache.put(text, tree)
+        if stats is not None:
+            stats.incr('tokens', lexer.count)
+    elif stats is not None:
+        stats.incr('cache_hits')
+    if stats is not None:
+        stats.incr('nodes', 1 + sum(1 for _ in nodevisitor.visit(tree)))
+    if compress:
+        with timer(stats, 'compress'):
+            compressor.compress(
+                tree, hoist_vars=hoist_vars, toplevel=mangle_toplevel,
+                alias_properties=alias_properties,
+                deduplicate=deduplicate, oracle=oracle)
+    if mangle:
+        mangler.mangle(
+            tree, toplevel=mangle_toplevel, stats=stats, partial=partial)
+    with timer(stats, 'minify'):
+        return ECMAMinifier().visit(tree)
+
+
+def minify_stream(text, out, mangle=False, parser=None):
+    """Minify JavaScript code writing it to out one statement at a time.
+
+    Every top level statement is mangled, minified and written to out
+    as soon as it is parsed, the syntax tree of the whole program is
+    never built. Global names are not mangled and the code is not
+    compressed, both need the whole program.
+
+    >>> import io
+    >>> from slimit.minifier import minify_stream
+    >>> out = io.StringIO()
+    >>> minify_stream(u'var a = 1;\\nfunction f(x) { return x + a; }',
+    ...               out, mangle=True)
+    >>> print(out.getvalue())
+    var a=1;function f(b){return b+a;}
+    """
+    from slimit import mangler
+    from slimit.parser import Parser
+    from slimit.visitors.minvisitor import ECMAMinifier
+
+    if parser is None:
+        parser = Parser()
+    minifier = ECMAMinifier()
+
+    def write(element):
+        if mangle:
+            mangler.mangle(element, partial=True)
+        out.write(minifier.visit(element))
+
+    parser.parse_stream(text, write)
+
+
+def _format_sizes(name, original, minified):
+    before, after = size.sizes(original), size.sizes(minified)
+    parts = [
+        '%s %d -> %d' % (metric, before[metric], after[metric])
+        for metric in ('raw', 'gzip', 'brotli') if metric in before
+        ]
+    return '%s: %s\n' % (name, ', '.join(parts))
+
+
+def _serve(options, err):
+    import signal
+    from slimit.server import MinifyServer
+    try:
+        server = MinifyServer(options.socket, workers=options.workers)
+    except RuntimeError as exc:
+        err.write('%s\n' % exc)
+        return 1
+    err.write('slimit daemon listening on %s\n' % server.path)
+    # remove the socket when stopped by kill
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+def _client(options, name, text, out, err):
+    import json
+    import socket
+    from slimit import server
+    request_options = dict(
+        (option, getattr(options, option))
+        for option in ('mangle', 'mangle_toplevel', 'compress', 'hoist_vars',
+                       'alias_properties', 'deduplicate', 'stats')
+        if getattr(options, option)
+        )
+    if options.size_metric is not None:
+        request_options['size_metric'] = options.size_metric
+    path = options.socket or server.default_socket_path()
+    try:
+        response = server.request(text, request_options, path)
+    except (socket.error, ValueError) as exc:
+        err.write('Can not use slimit daemon on %s: %s\n' % (path, exc))
+        return 1
+    if 'error' in response:
+        err.write('%s: %s\n' % (name, response['error']))
+        return 1
+    out.write(response['output'])
+    if options.report_size:
+        err.write(_format_sizes(name, text, response['output']))
+    if options.stats:
+        err.write(json.dumps(response['diagnostics'], sort_keys=True) + '\n')
+    return 0
+
+
+def _check(names, inp, out):
+    """Report syntax errors of all files, return 1 if there are any."""
+    from slimit.parser import Parser
+    parser = Parser()
+    result = 0
+    for name in names or ['-']:
+        if name == '-':
+            text = inp.read()
+        else:
+            with open(name) as fin:
+                text = fin.read()
+        errors = []
+        parser.parse(text, errors=errors)
+        for error in errors:
+            out.write('%s:%s:%s: %s\n' % (
+                name, error.lineno, error.offset, error.msg))
+        if errors:
+            result = 1
+    return result
+
+
+# options that only change what --compress does
+_COMPRESS_OPTIONS = ('hoist_vars', 'alias_properties', 'deduplicate',
+                     'size_metric')
+
+# options that change how the code is minified or reported
+_MODES = ('mangle', 'mangle_toplevel', 'compress', 'client', 'cache_dir',
+          'report_size', 'stats', 'profile', 'profile_stacks', 'stream',
+          'whitespace_only', 'check')
+
+
+def _check_alone(parser, options, option, allowed=()):
+    """Exit with an error if option is combined with unsupported ones."""
+    for other in _MODES:
+        if other != option and other not in allowed and getattr(
+                options, other):
+            parser.error('--%s can not be used with --%s' % (
+                option.replace('_', '-'), other.replace('_', '-')))
+
+
+def main(argv=None, inp=sys.stdin, out=sys.stdout, err=sys.stderr):
+    import optparse
+    import textwrap
     usage = textwrap.dedent("""\
     %prog [options] [input file]
 
@@ -55,16 +288,148 @@ def main(argv=None, inp=sys.stdin, out=sys.stdout):
     parser.add_option('-t', '--mangle-toplevel', action='store_true',
                       dest='mangle_toplevel', default=False,
                       help='mangle top level scope (defaults to False)')
+    parser.add_option('-c', '--compress', action='store_true',
+                      dest='compress', default=False,
+                      help='compress statements (defaults to False)')
+    parser.add_option('--hoist-vars', action='store_true',
+                      dest='hoist_vars', default=False,
+                      help='hoist var declarations, used with --compress')
+    parser.add_option('--alias-properties', action='store_true',
+                      dest='alias_properties', default=False,
+                      help=('alias repeated property receivers like '
+                            'X.prototype, used with --compress'))
+    parser.add_option('--deduplicate', action='store_true',
+                      dest='deduplicate', default=False,
+                      help=('hoist duplicate functions and constant '
+                            'literals, used with --compress'))
+    parser.add_option('--report-size', action='store_true',
+                      dest='report_size', default=False,
+                      help='print raw and gzip sizes to STDERR')
+    parser.add_option('--size-metric', dest='size_metric', default=None,
+                      choices=sorted(size.METRICS),
+                      help=('keep --hoist-vars, --alias-properties and '
+                            '--deduplicate only if they reduce size: raw, '
+                            'gzip or brotli'))
+    parser.add_option('--stats', action='store_true',
+                      dest='stats', default=False,
+                      help='print timings and counters as JSON to STDERR')
+    parser.add_option('--profile', action='store_true',
+                      dest='profile', default=False,
+                      help='print time spent per visitor method to STDERR')
+    parser.add_option('--profile-stacks', dest='profile_stacks',
+                      default=None, metavar='FILE',
+                      help=('write visitor stacks in flamegraph collapsed '
+                            'format to FILE'))
+    parser.add_option('--cache-dir', dest='cache_dir', default=None,
+                      metavar='DIR',
+                      help='reuse parsed syntax trees stored in DIR')
+    parser.add_option('--serve', action='store_true',
+                      dest='serve', default=False,
+                      help='run minification daemon on a Unix socket')
+    parser.add_option('--client', action='store_true',
+                      dest='client', default=False,
+                      help='minify using the daemon started with --serve')
+    parser.add_option('--socket', dest='socket', default=None,
+                      metavar='PATH',
+                      help=('socket of the daemon (defaults to '
+                            '$SLIMIT_SOCKET or a per user path)'))
+    parser.add_option('--workers', dest='workers', type='int', default=None,
+                      help=('number of daemon worker processes (defaults '
+                            'to the number of CPUs)'))
+    parser.add_option('--stream', action='store_true',
+                      dest='stream', default=False,
+                      help=('write every top level statement as soon as it '
+                            'is parsed, for huge files (can be used with '
+                            '--mangle only)'))
+    parser.add_option('--whitespace-only', action='store_true',
+                      dest='whitespace_only', default=False,
+                      help=('only remove whitespace and comments without '
+                            'parsing the code, faster and works with code '
+                            'the parser rejects'))
+    parser.add_option('--check', action='store_true',
+                      dest='check', default=False,
+                      help=('only report all syntax errors of the input '
+                            'files, several files can be passed, - is STDIN'))
 
     if argv is None:
         argv = sys.argv[1:]
     options, args = parser.parse_args(argv)
 
+    for option in _COMPRESS_OPTIONS:
+        if getattr(options, option) and not options.compress:
+            parser.error('--%s can only be used with --compress' % (
+                option.replace('_', '-')))
+
+    if options.serve:
+        return _serve(options, err)
+
+    if options.check:
+        _check_alone(parser, options, 'check')
+        return _check(args, inp, out)
+
     if len(args) == 1:
-        text = open(args[0]).read()
+        name = args[0]
+        text = open(name).read()
     else:
+        name = '<stdin>'
         text = inp.read()
 
-    minified = minify(
-        text, mangle=options.mangle, mangle_toplevel=options.mangle_toplevel)
+    if options.stream:
+        _check_alone(parser, options, 'stream', ('mangle',))
+        minify_stream(text, out, mangle=options.mangle)
+        return
+
+    if options.whitespace_only:
+        from slimit import whitespace
+        _check_alone(parser, options, 'whitespace_only', ('report_size',))
+        minified = whitespace.minify(text)
+        out.write(minified)
+        if options.report_size:
+            err.write(_format_sizes(name, text, minified))
+        return
+
+    if options.client:
+        return _client(options, name, text, out, err)
+
+    from slimit.cache import ASTCache
+    from slimit.profiler import VisitorProfiler
+    from slimit.stats import StatsCollector
+
+    oracle = None
+    if options.size_metric is not None:
+        try:
+            oracle = size.SizeOracle(options.size_metric)
+        except ValueError as exc:
+            parser.error(str(exc))
+
+    stats = StatsCollector() if options.stats else None
+
+    cache = None
+    if options.cache_dir is not None:
+        cache = ASTCache(options.cache_dir)
+
+    profiler = None
+    if options.profile or options.profile_stacks:
+        profiler = VisitorProfiler()
+        profiler.install()
+    try:
+        minified = minify(
+            text, mangle=options.mangle,
+            mangle_toplevel=options.mangle_toplevel,
+            compress=options.compress, hoist_vars=options.hoist_vars,
+            alias_properties=options.alias_properties,
+            deduplicate=options.deduplicate, oracle=oracle,
+            stats=stats, cache=cache)
+    finally:
+        if profiler is not None:
+            profiler.uninstall()
     out.write(minified)
+    if options.report_size:
+        err.write(_format_sizes(name, text, minified))
+    if stats is not None:
+        err.write(stats.to_json() + '\n')
+    if options.profile:
+        err.write(profiler.format_table())
+    if options.profile_stacks:
+        with open(options.profile_stacks, 'w') as fp:
+            profiler.write_collapsed(fp)
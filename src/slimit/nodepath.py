@@ -0,0 +1,201 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+from slimit import ast
+
+
+def _child_slots(node):
+    """Yield (child, attribute name, list index or None) for node children."""
+    for attr, value in vars(node).items():
+        if isinstance(value, ast.Node):
+            yield value, attr, None
+        elif isinstance(value, list):
+            for position, item in enumerate(value):
+                if isinstance(item, ast.Node):
+                    yield item, attr, position
+
+
+class ParentIndex(object):
+    """Parent links for every node of a tree.
+
+    The index is filled in one traversal on first use and stored
+    outside of the nodes as {id(node): (node, parent, attribute, position)},
+    position is the index in a list attribute like Block children or None.
+
+    >>> from slimit.parser import Parser
+    >>> from slimit.nodepath import ParentIndex
+    >>> tree = Parser().parse('if (a) { b(); }')
+    >>> index = ParentIndex(tree)
+    >>> call = tree.children()[0].consequent.children()[0].expr
+    >>> [type(node).__name__ for node in index.ancestors(call)]
+    ['ExprStatement', 'Block', 'If', 'Program']
+
+    Changes made through NodePath keep the index up to date. If the tree
+    is changed by other means the index notices stale entries on lookup
+    and is rebuilt.
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self._entries = None
+
+    def _add(self, node):
+        """Index the subtree rooted at node."""
+        entries = self._entries
+        stack = [node]
+        while stack:
+            parent = stack.pop()
+            for child, attr, position in _child_slots(parent):
+                entries[id(child)] = (child, parent, attr, position)
+                stack.append(child)
+
+    def _set(self, node, parent, attr, position):
+        self._entries[id(node)] = (node, parent, attr, position)
+
+    def _discard(self, node):
+        """Remove the subtree rooted at node from the index."""
+        entries = self._entries
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            entries.pop(id(node), None)
+            stack.extend(child for child, _, _ in _child_slots(node))
+
+    def rebuild(self):
+        self._entries = {}
+        self._add(self.tree)
+
+    def _lookup(self, node):
+        entry = self._entries.get(id(node))
+        if entry is None or entry[0] is not node:
+            return None
+        _, parent, attr, position = entry
+        value = getattr(parent, attr, None)
+        if position is not None:
+            if not (isinstance(value, list) and position < len(value)):
+                return None
+            value = value[position]
+        if value is not node:
+            return None
+        return entry
+
+    def path(self, node):
+        """Return NodePath of the node or None for the root and nodes
+        that are not in the tree."""
+        if self._entries is None:
+            self.rebuild()
+        entry = self._lookup(node)
+        if entry is None and node is not self.tree:
+            # the tree was changed without NodePath
+            self.rebuild()
+            entry = self._lookup(node)
+        if entry is None:
+            return None
+        _, parent, attr, position = entry
+        return NodePath(self, node, parent, attr, position)
+
+    def parent(self, node):
+        path = self.path(node)
+        return None if path is None else path.parent
+
+    def ancestors(self, node):
+        """Return the list of ancestors, the closest one first."""
+        result = []
+        path = self.path(node)
+        while path is not None:
+            result.append(path.parent)
+            path = self.path(path.parent)
+        return result
+
+
+class NodePath(object):
+    """Location of a node in the tree with methods to change it.
+
+    attr is the name of the parent attribute holding the node and
+    position its index if the attribute is a list, otherwise None.
+    """
+
+    def __init__(self, index, node, parent, attr, position):
+        self.index = index
+        self.node = node
+        self.parent = parent
+        self.attr = attr
+        self.position = position
+
+    def __repr__(self):
+        return 'NodePath(node={!r}, attr={!r}, position={!r})'.format(
+            self.node, self.attr, self.position)
+
+    @property
+    def parent_path(self):
+        return self.index.path(self.parent)
+
+    def _container(self):
+        if self.position is None:
+            raise ValueError(
+                '%s.%s is not a list' % (type(self.parent).__name__,
+                                         self.attr))
+        return getattr(self.parent, self.attr)
+
+    def _renumber(self, container, start):
+        for position in range(start, len(container)):
+            item = container[position]
+            if isinstance(item, ast.Node):
+                self.index._set(item, self.parent, self.attr, position)
+
+    def replace(self, new):
+        """Put the new node in place of this one."""
+        if self.position is None:
+            setattr(self.parent, self.attr, new)
+        else:
+            getattr(self.parent, self.attr)[self.position] = new
+        # the new node might contain the old one
+        self.index._discard(self.node)
+        self.index._set(new, self.parent, self.attr, self.position)
+        self.index._add(new)
+        self.node = new
+
+    def remove(self):
+        """Remove the node from a list like Block children."""
+        container = self._container()
+        del container[self.position]
+        self.index._discard(self.node)
+        self._renumber(container, self.position)
+
+    def insert_before(self, new):
+        """Insert the new node into the list before this one."""
+        container = self._container()
+        container.insert(self.position, new)
+        self.index._add(new)
+        self.position += 1
+        self._renumber(container, self.position - 1)
+
+    def insert_after(self, new):
+        """Insert the new node into the list after this one."""
+        container = self._container()
+        container.insert(self.position + 1, new)
+        self.index._add(new)
+        self._renumber(container, self.position + 1)
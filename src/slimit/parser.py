@@ -46,13 +46,15 @@ class Parser(object):
 
     def __init__(self, lex_optimize=True, lextab=lextab,
                  yacc_optimize=True, yacctab=yacctab, yacc_debug=False,
-                 yacc_tracking=False):
+                 yacc_tracking=False, cache=None):
         self.lex_optimize = lex_optimize
         self.lextab = lextab
         self.yacc_optimize = yacc_optimize
         self.yacctab = yacctab
         self.yacc_debug = yacc_debug
         self.yacc_tracking = yacc_tracking
+        # optional slimit.cache.ASTCache
+        self.cache = cache
 
         self.lexer = Lexer()
         self.lexer.build(optimize=lex_optimize, lextab=lextab)
@@ -66,23 +68,33 @@ class Parser(object):
         # lexer.auto_semi can cause a loop in a parser
         # when a parser error happens on a token right after
         # a newline.
-        # We keep record of the tokens that caused p_error
-        # and if the token has already been seen - we raise
+        # We keep record of the last token that caused p_error
+        # and if the same token causes it again - we raise
         # a SyntaxError exception to avoid looping over and
-        # over again.
-        self._error_tokens = {}
+        # over again. The token that follows an inserted semicolon
+        # is the next one read, so one token per parse is enough.
+        self._error_token = None
+
+        # callback receiving top level source elements, see parse_stream
+        self._on_element = None
+        # list collecting syntax errors while recovering from them
+        self._errors = None
+        self._text = None
+        # semicolon inserted at the end of input by p_error
+        self._eof_semi = None
+        # position right after the last illegal character
+        self._illegal_end = None
 
     def _has_been_seen_before(self, token):
         if token is None:
             return False
         key = token.type, token.value, token.lineno, token.lexpos
-        return key in self._error_tokens
+        return key == self._error_token
 
     def _mark_as_seen(self, token):
         if token is None:
             return
-        key = token.type, token.value, token.lineno, token.lexpos
-        self._error_tokens[key] = True
+        self._error_token = token.type, token.value, token.lineno, token.lexpos
 
     def _raise_syntax_error(self, token):
         raise SyntaxError(
@@ -91,8 +103,67 @@ class Parser(object):
                 self.lexer.prev_token, self.lexer.token())
             )
 
-    def parse(self, text, debug=False):
-        return self.parser.parse(text, lexer=self.lexer, debug=debug, tracking=self.yacc_tracking)
+    def parse(self, text, debug=False, lexer=None, errors=None):
+        """Parse text and return ast.Program node.
+
+        lexer is an optional wrapper around self.lexer, for example
+        slimit.stats.CountingLexer.
+
+        If the parser was created with a cache, a tree stored for the
+        same text is returned without parsing.
+
+        errors is an optional list. If it is given, syntax errors don't
+        stop parsing: they are appended to the list and the statements
+        with errors are skipped, the tree of the rest is returned.
+        """
+        if errors is not None:
+            return self._parse_recovering(text, errors, debug, lexer)
+        if self.cache is not None:
+            tree = self.cache.get(text)
+            if tree is not None:
+                return tree
+        if lexer is None:
+            lexer = self.lexer
+        self._error_token = None
+        tree = self.parser.parse(text, lexer=lexer, debug=debug, tracking=self.yacc_tracking)
+        if self.cache is not None:
+            self.cache.put(text, tree)
+        return tree
+
+    def _parse_recovering(self, text, errors, debug, lexer):
+        elements = []
+        self._errors = errors
+        self._text = text
+        self.lexer.on_error = self._illegal_character
+        try:
+            # completed top level elements are kept even if the parser
+            # throws away its stack to recover from an error
+            self.parse_stream(text, elements.append, debug, lexer)
+        finally:
+            self._errors = self._text = self._eof_semi = None
+            self._illegal_end = self.lexer.on_error = None
+        return ast.Program(elements)
+
+    def parse_stream(self, text, callback, debug=False, lexer=None):
+        """Parse text and pass every top level source element to callback.
+
+        Elements are passed as soon as they are reduced and are not kept
+        by the parser, so memory used by the tree is bounded by the
+        largest top level statement instead of the whole program.
+        ply can't suspend parsing to yield elements, that's why they
+        are passed to a callback.
+
+        The cache is not used.
+        """
+        if lexer is None:
+            lexer = self.lexer
+        self._on_element = callback
+        self._error_token = None
+        try:
+            self.parser.parse(
+                text, lexer=lexer, debug=debug, tracking=self.yacc_tracking)
+        finally:
+            self._on_element = None
 
     def p_empty(self, p):
         """empty :"""
@@ -102,20 +173,56 @@ class Parser(object):
         """auto_semi : error"""
         pass
 
+    def _syntax_error(self, token):
+        """Raise SyntaxError or record it if recovering from errors."""
+        if self._errors is None:
+            self._raise_syntax_error(token)
+        text = self._text
+        if token is None or token is self._eof_semi:
+            pos = len(text)
+            msg = 'Unexpected end of input'
+        else:
+            pos = token.lexpos
+            msg = 'Unexpected token (%s, %r)' % (token.type, token.value)
+        illegal_end, self._illegal_end = self._illegal_end, None
+        if illegal_end is not None and not text[illegal_end:pos].strip():
+            # the illegal character right before it is already reported
+            return
+        self._add_error(msg, pos)
+
+    def _illegal_character(self, char, pos):
+        self._add_error('Illegal character %r' % char, pos)
+        self._illegal_end = pos + 1
+
+    def _add_error(self, msg, pos):
+        text = self._text
+        line_start = max(text.rfind('\n', 0, pos), text.rfind('\r', 0, pos))
+        line_end = text.find('\n', pos)
+        if line_end == -1:
+            line_end = len(text)
+        self._errors.append(SyntaxError(msg, (
+            None, text.count('\n', 0, pos) + 1, pos - line_start,
+            text[line_start + 1:line_end])))
+
     def p_error(self, token):
         # https://github.com/rspivak/slimit/issues/29
         if self._has_been_seen_before(token):
-            self._raise_syntax_error(token)
+            self._syntax_error(token)
+            return
 
         if token is None or token.type != 'SEMI':
             next_token = self.lexer.auto_semi(token)
             if next_token is not None:
                 # https://github.com/rspivak/slimit/issues/29
                 self._mark_as_seen(token)
+                if token is None:
+                    self._eof_semi = next_token
                 self.parser.errok()
                 return next_token
 
-        self._raise_syntax_error(token)
+        # when recovering the parser skips tokens up to the end
+        # of the statement
+        self._syntax_error(token)
 
     # Comment rules
     # def p_single_line_comment(self, p):
@@ -142,7 +249,12 @@ class Parser(object):
         """source_element_list : source_element
                                | source_element_list source_element
         """
-        if len(p) == 2: # single source element
+        # only the end marker is left on the stack below the top level
+        # source elements, function bodies have at least 'function {'
+        if self._on_element is not None and len(p.stack) == 1:
+            self._on_element(p[len(p) - 1])
+            p[0] = []
+        elif len(p) == 2: # single source element
             p[0] = [p[1]]
         else:
             p[1].append(p[2])
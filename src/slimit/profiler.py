@@ -0,0 +1,156 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+import timeit
+
+from slimit.visitors import ecmavisitor, minvisitor, nodevisitor, scopevisitor
+
+
+def _visitor_classes():
+    """Return visitor base classes that dispatch on 'visit_<NodeType>'."""
+    return [
+        nodevisitor.ASTVisitor,
+        ecmavisitor.ECMAVisitor,
+        minvisitor.ECMAMinifier,
+        scopevisitor.Visitor,
+        ]
+
+
+class VisitorProfiler(object):
+    """Call counts and time spent per visitor method and node type.
+
+    While installed, every visit() of ASTVisitor, ECMAVisitor,
+    ECMAMinifier, scope visitors and all their subclasses is timed.
+    Entries are named '<VisitorClass>.visit_<NodeType>' no matter if
+    the visitor has such a method or falls back to generic_visit.
+
+    >>> from slimit import minify
+    >>> from slimit.profiler import VisitorProfiler
+    >>> with VisitorProfiler() as profiler:
+    ...     minified = minify('var a = 1 + 2;', mangle=True)
+    >>> profiler.calls['ECMAMinifier.visit_BinOp']
+    1
+
+    cumtime includes time spent in nested visits (recursive calls are
+    counted once), tottime excludes it.
+    """
+
+    def __init__(self, timer=timeit.default_timer):
+        self.timer = timer
+        self.calls = {}
+        self.cumtime = {}
+        self.tottime = {}
+        # {(outermost key, ..., innermost key): tottime}
+        self.stacks = {}
+        self._frames = []
+        self._active = {}
+        self._originals = []
+
+    def install(self):
+        if self._originals:
+            return
+        for cls in _visitor_classes():
+            visit = cls.__dict__['visit']
+            self._originals.append((cls, visit))
+            setattr(cls, 'visit', self._wrap(visit))
+
+    def uninstall(self):
+        while self._originals:
+            cls, visit = self._originals.pop()
+            setattr(cls, 'visit', visit)
+
+    def __enter__(self):
+        self.install()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.uninstall()
+
+    def _wrap(self, visit):
+        profiler = self
+
+        def profiled_visit(visitor, node):
+            key = '%s.visit_%s' % (
+                visitor.__class__.__name__, node.__class__.__name__)
+            profiler._enter(key)
+            try:
+                return visit(visitor, node)
+            finally:
+                profiler._exit(key)
+
+        profiled_visit.__doc__ = visit.__doc__
+        return profiled_visit
+
+    def _enter(self, key):
+        self.calls[key] = self.calls.get(key, 0) + 1
+        self._active[key] = self._active.get(key, 0) + 1
+        # [key, start time, time spent in nested visits]
+        self._frames.append([key, self.timer(), 0.0])
+
+    def _exit(self, key):
+        frame_key, start, nested = self._frames[-1]
+        elapsed = self.timer() - start
+        own = elapsed - nested
+        path = tuple(frame[0] for frame in self._frames)
+        self._frames.pop()
+        if self._frames:
+            self._frames[-1][2] += elapsed
+
+        self.tottime[key] = self.tottime.get(key, 0.0) + own
+        self.stacks[path] = self.stacks.get(path, 0.0) + own
+        self._active[key] -= 1
+        if not self._active[key]:
+            self.cumtime[key] = self.cumtime.get(key, 0.0) + elapsed
+
+    def entries(self, sort='cumtime'):
+        """Return (key, calls, cumtime, tottime) tuples, slowest first."""
+        rows = [
+            (key, self.calls[key], self.cumtime.get(key, 0.0),
+             self.tottime.get(key, 0.0))
+            for key in self.calls
+            ]
+        index = {'calls': 1, 'cumtime': 2, 'tottime': 3}[sort]
+        rows.sort(key=lambda row: (-row[index], row[0]))
+        return rows
+
+    def format_table(self, sort='cumtime', limit=None):
+        """Return entries as a text table, times are in milliseconds."""
+        lines = ['%10s %12s %12s  %s' % ('calls', 'cumtime', 'tottime',
+                                         'visitor method')]
+        for key, calls, cumtime, tottime in self.entries(sort)[:limit]:
+            lines.append('%10d %12.3f %12.3f  %s' % (
+                calls, cumtime * 1000, tottime * 1000, key))
+        return '\n'.join(lines) + '\n'
+
+    def write_collapsed(self, fp):
+        """Write stacks in the collapsed format used by flamegraph.pl.
+
+        Every line is 'frame;frame;...;frame <microseconds>'.
+        """
+        for path in sorted(self.stacks):
+            value = int(round(self.stacks[path] * 1000000))
+            if value > 0:
+                fp.write('%s %d\n' % (';'.join(path), value))
@@ -36,6 +36,9 @@ from slimit.lexer import Lexer
 
 ID_CHARS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
 
+# marks names missing in a resolution cache, None means undefined name
+_MISSING = object()
+
 def powerset(iterable):
     """powerset('abc') -> a b c ab ac bc abc"""
     s = list(iterable)
@@ -72,7 +75,17 @@ class Scope(object):
         # add ourselves as a child to the enclosing scope
         if enclosing_scope is not None:
             self.enclosing_scope.add_child(self)
+            self.root = enclosing_scope.root
+        else:
+            self.root = self
+            # number of symbols defined anywhere in the scope tree
+            self.definitions = 0
         self.base54 = powerset(ID_CHARS)
+        # {name: symbol or None} valid as long as nothing new is defined
+        self._resolved = {}
+        self._resolved_definitions = 0
+        # {mangled_name: this or the nearest enclosing scope with it}
+        self._mangled_lookups = {}
 
     def __contains__(self, sym):
         return sym.name in self.symbols
@@ -84,42 +97,76 @@ class Scope(object):
         self.symbols[sym.name] = sym
         # track scope for every symbol
         sym.scope = self
+        # invalidates resolved names of this scope and all sub-scopes
+        self.root.definitions += 1
 
     def resolve(self, name):
+        """Return a symbol for the name or None if it's not defined.
+
+        Results are cached in every scope on the way up to the scope
+        defining the name, so each distinct name is looked up once
+        per scope until another symbol is defined.
+        """
         sym = self.symbols.get(name)
         if sym is not None:
             return sym
-        elif self.enclosing_scope is not None:
-            return self.enclosing_scope.resolve(name)
+
+        definitions = self.root.definitions
+        visited = []
+        scope = self
+        while scope is not None:
+            if scope._resolved_definitions != definitions:
+                scope._resolved = {}
+                scope._resolved_definitions = definitions
+            else:
+                cached = scope._resolved.get(name, _MISSING)
+                if cached is not _MISSING:
+                    sym = cached
+                    break
+            visited.append(scope)
+            sym = scope.symbols.get(name)
+            if sym is not None:
+                break
+            scope = scope.enclosing_scope
+
+        for scope in visited:
+            scope._resolved[name] = sym
+        return sym
 
     def get_enclosing_scope(self):
         return self.enclosing_scope
 
     def _get_scope_with_mangled(self, name):
-        """Return a scope containing passed mangled name."""
-        scope = self
-        while True:
-            parent = scope.get_enclosing_scope()
-            if parent is None:
-                return
-
-            if name in parent.rev_mangled:
-                return parent
+        """Return a scope containing passed mangled name.
 
-            scope = parent
+        Lookups are cached in every enclosing scope on the way up, so
+        enclosing scopes have to be mangled before this one, like
+        mangle_scope_tree does.
+        """
+        visited = []
+        scope = self.get_enclosing_scope()
+        while scope is not None:
+            cached = scope._mangled_lookups.get(name, _MISSING)
+            if cached is not _MISSING:
+                scope = cached
+                break
+            visited.append(scope)
+            if name in scope.rev_mangled:
+                break
+            scope = scope.get_enclosing_scope()
+
+        for ancestor in visited:
+            ancestor._mangled_lookups[name] = scope
+        return scope
 
     def _get_scope_with_symbol(self, name):
         """Return a scope containing passed name as a symbol name."""
-        scope = self
-        while True:
-            parent = scope.get_enclosing_scope()
-            if parent is None:
-                return
-
-            if name in parent.symbols:
-                return parent
-
-            scope = parent
+        parent = self.get_enclosing_scope()
+        if parent is None:
+            return
+        sym = parent.resolve(name)
+        if sym is not None:
+            return sym.scope
 
     def get_next_mangled_name(self):
         """
@@ -169,6 +216,25 @@ class Symbol(object):
     def __init__(self, name):
         self.name = name
         self.scope = None
+        # Identifier nodes that declare or reference the symbol,
+        # filled by fill_scope_references
+        self.references = []
+
+    def is_referenced(self):
+        """Return True if the symbol is used in an expression."""
+        for node in self.references:
+            if getattr(node, '_in_expression', False):
+                return True
+        return False
+
+    def rename(self, name):
+        """Change value of every Identifier node declaring or
+        referencing the symbol.
+
+        The scope tree itself is not changed and keeps the original name.
+        """
+        for node in self.references:
+            node.value = name
 
 
 class VarSymbol(Symbol):
@@ -0,0 +1,368 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+import marshal
+import struct
+import sys
+import zlib
+from array import array
+from collections import defaultdict, deque
+from itertools import chain, compress, islice, repeat
+from operator import itemgetter
+
+from slimit import ast
+
+# The format is a header followed by the tree written with marshal:
+#
+#   b'SLAST' format version, flags, adler32 of the rest (4 bytes)
+#   marshal.dumps((strings, shapes, root, arrays, constants))
+#
+# The checksum makes sure that marshal doesn't read damaged data.
+# Nodes are grouped by shape, a node class with the names of its
+# attributes, and numbered shape after shape starting with 1, 0 stands
+# for None. Attribute values are stored column by column: node numbers,
+# list lengths, indexes in the string table and other small unsigned
+# integers go to one of the arrays of 1, 2 and 4 byte integers, other
+# constants and lists of them are marshaled as they are. Arrays are
+# little-endian and start with a byte telling the integer size. shapes
+# is an array holding for every shape:
+#
+#   class name, number of nodes, number of attributes,
+#   (attribute name, kind, array, array of list items)...
+#
+# Both directions handle all nodes of a shape at once, so that the
+# work per node is done by marshal, array, map and zip in C: dumps
+# walks the tree level by level and loads creates all nodes first and
+# then sets their attributes.
+
+MAGIC = b'SLAST'
+FORMAT_VERSION = 2
+
+_POSITIONS_FLAG = 1
+
+# attributes added by scope analysis, they refer to objects outside
+# of the tree
+_ANNOTATIONS = frozenset(['scope', 'symbol', 'function_scope'])
+_POSITIONS = frozenset(['lexpos', 'lineno'])
+
+# column kinds: strings, small integers, other constants, nodes or
+# None, lists of nodes and lists of constants
+_STRINGS, _UINTS, _CONSTANTS, _NODE, _NODES, _LISTS = range(6)
+
+try:
+    _TEXT_TYPES = frozenset([str, unicode])
+    _CONSTANT_TYPES = frozenset([type(None), bool, int, long, str, unicode])
+except NameError:
+    # Python 3
+    _TEXT_TYPES = frozenset([str])
+    _CONSTANT_TYPES = frozenset([type(None), bool, int, str])
+
+# array typecodes of 1, 2 and 4 byte unsigned integers
+_TYPECODES = (
+    'B', 'H', [code for code in ('I', 'L') if array(code).itemsize == 4][0])
+
+
+def _width(values):
+    """Return index of the narrowest typecode fitting all values."""
+    limit = max(values) if values else 0
+    for index, code in enumerate(_TYPECODES):
+        if limit >> 8 * array(code).itemsize == 0:
+            return index
+    raise TypeError('Can not serialize integer {}'.format(limit))
+
+
+def _pack(values):
+    """Return bytes encoding unsigned integers below 2 ** 32.
+
+    The first byte is the index of the array typecode.
+    """
+    index = _width(values)
+    data = array(_TYPECODES[index], values)
+    if sys.byteorder == 'big':
+        data.byteswap()
+    try:
+        data = data.tobytes()
+    except AttributeError:
+        # Python 2
+        data = data.tostring()
+    return bytes(bytearray([index])) + data
+
+
+def _unpack(data):
+    values = array(_TYPECODES[bytearray(data[:1])[0]])
+    data = data[1:]
+    try:
+        values.frombytes(data)
+    except AttributeError:
+        # Python 2
+        values.fromstring(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def _getter(names):
+    """Return a function returning a tuple of the values of a dict."""
+    if not names:
+        return lambda attrs: ()
+    if len(names) == 1:
+        return lambda attrs: (attrs[names[0]],)
+    return itemgetter(*names)
+
+
+def dumps(node, positions=False):
+    """Return bytes encoding the tree.
+
+    >>> from slimit.parser import Parser
+    >>> from slimit.serialize import dumps, loads
+    >>> tree = Parser().parse('var a = [1, "x"];')
+    >>> data = dumps(tree)
+    >>> loads(data) == tree
+    True
+    >>> print(loads(data).to_ecma())
+    var a = [1,"x"];
+
+    Annotations added by analysis passes like scopes and symbols are
+    not stored, the loaded tree is analyzed again when needed.
+
+    Args:
+        positions: defaults to False. Defines if lexpos and lineno
+        attributes should be stored.
+    """
+    if not isinstance(node, ast.Node):
+        raise TypeError(
+            'Can not serialize {!r} of type {}'.format(node, type(node)))
+    skip = _ANNOTATIONS if positions else _ANNOTATIONS | _POSITIONS
+    constant_types = _CONSTANT_TYPES
+    is_child = dict.fromkeys(constant_types, False).get
+    # {(node class, attribute names): (stored names, getter, nodes,
+    #                                  columns)}
+    layouts = {}
+    level = [node]
+    while level:
+        groups = defaultdict(list)
+        deque(map(list.append, map(groups.__getitem__, zip(
+            map(type, level), map(tuple, map(vars, level)))), level), 0)
+        level = []
+        for key, nodes in groups.items():
+            layout = layouts.get(key)
+            if layout is None:
+                names = tuple(name for name in key[1] if name not in skip)
+                layout = layouts[key] = (
+                    names, _getter(names), [], [[] for _ in names])
+            _, getter, all_nodes, columns = layout
+            all_nodes.extend(nodes)
+            for values, column in zip(columns, zip(
+                    *map(getter, map(vars, nodes)))):
+                values.extend(column)
+                types = set(map(type, column))
+                if types <= constant_types:
+                    continue
+                if list in types:
+                    if types != set([list]):
+                        continue
+                    column = list(chain.from_iterable(column))
+                level.extend(compress(
+                    column, map(is_child, map(type, column), repeat(True))))
+
+    numbers = {id(None): 0}
+    for _, _, nodes, _ in layouts.values():
+        numbers.update(zip(map(id, nodes), range(
+            len(numbers), len(numbers) + len(nodes))))
+    encoder = _Encoder(numbers)
+    shapes = []
+    for (cls, _), (names, _, nodes, columns) in layouts.items():
+        shapes.extend([encoder.string(cls.__name__), len(nodes), len(names)])
+        for name, column in zip(names, columns):
+            encoded = encoder.encode(column)
+            if encoded is None:
+                raise TypeError('Can not serialize attribute {} of {}'.format(
+                    name, cls.__name__))
+            shapes.append(encoder.string(name))
+            shapes.extend(encoded)
+
+    flags = _POSITIONS_FLAG if positions else 0
+    data = marshal.dumps((
+        sorted(encoder.strings, key=encoder.strings.get),
+        _pack(shapes), numbers[id(node)],
+        [_pack(values) for values in encoder.arrays], encoder.constants,
+        ))
+    return b''.join([
+        MAGIC, bytes(bytearray([FORMAT_VERSION, flags])),
+        struct.pack('<I', zlib.adler32(data) & 0xffffffff), data,
+        ])
+
+
+class _Encoder(object):
+    """Stores columns of attribute values."""
+
+    def __init__(self, numbers):
+        self.numbers = numbers
+        # {string: index}
+        self.strings = {}
+        self.arrays = [[] for _ in _TYPECODES]
+        self.constants = []
+
+    def string(self, value):
+        return self.strings.setdefault(value, len(self.strings))
+
+    def store(self, values):
+        """Add unsigned integers to an array, return its index."""
+        index = _width(values)
+        self.arrays[index].extend(values)
+        return index
+
+    def encode(self, column):
+        """Return (kind, array, array of list items) or None if the values
+        are not supported."""
+        types = set(map(type, column))
+        if types <= _CONSTANT_TYPES:
+            if types <= _TEXT_TYPES:
+                strings = self.strings
+                for value in set(column).difference(strings):
+                    strings[value] = len(strings)
+                indexes = list(map(strings.__getitem__, column))
+                return _STRINGS, self.store(indexes), 0
+            if (types == set([int]) and min(column) >= 0 and
+                max(column) >> 32 == 0):
+                return _UINTS, self.store(column), 0
+            self.constants.append(list(column))
+            return _CONSTANTS, 0, 0
+        number = self.numbers.__getitem__
+        if types == set([list]):
+            items = list(chain.from_iterable(column))
+            types = set(map(type, items))
+            if types <= _CONSTANT_TYPES:
+                self.constants.append(list(column))
+                return _LISTS, 0, 0
+            if not _are_nodes(types):
+                return None
+            return (_NODES, self.store(list(map(len, column))),
+                    self.store(list(map(number, map(id, items)))))
+        types.discard(type(None))
+        if not _are_nodes(types):
+            return None
+        return _NODE, self.store(list(map(number, map(id, column)))), 0
+
+
+def _are_nodes(types):
+    return all(issubclass(cls, ast.Node) for cls in types)
+
+
+def loads(data):
+    """Return the tree encoded by dumps.
+
+    Raises ValueError if the data is not a tree encoded by this
+    version of the format or if it is damaged. Like marshal, it is
+    not meant for data from untrusted sources.
+    """
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError('Not a serialized syntax tree')
+    pos = len(MAGIC)
+    header = bytearray(data[pos:pos + 6])
+    if len(header) < 6:
+        raise ValueError('Truncated serialized syntax tree')
+    if header[0] != FORMAT_VERSION:
+        raise ValueError(
+            'Unsupported format version {}'.format(header[0]))
+    data = data[pos + 6:]
+    checksum, = struct.unpack('<I', bytes(header[2:]))
+    if zlib.adler32(data) & 0xffffffff != checksum:
+        raise ValueError('Damaged serialized syntax tree')
+    try:
+        strings, shapes, root, arrays, constants = marshal.loads(data)
+        return _Decoder(strings, arrays, constants).decode(shapes)[root]
+    except (EOFError, TypeError, IndexError, KeyError):
+        raise ValueError('Malformed serialized syntax tree')
+
+
+class _Decoder(object):
+    """Reads columns of attribute values stored by _Encoder."""
+
+    def __init__(self, strings, arrays, constants):
+        self.strings = strings
+        self.arrays = [_unpack(values) for values in arrays]
+        self.offsets = [0] * len(self.arrays)
+        self.constants = iter(constants)
+
+    def take(self, index, count):
+        """Return next count integers of an array."""
+        start = self.offsets[index]
+        values = self.arrays[index][start:start + count]
+        if len(values) != count:
+            raise ValueError('Truncated serialized syntax tree')
+        self.offsets[index] = start + count
+        return values
+
+    def decode(self, shapes):
+        """Return the list of all nodes, None first."""
+        table = _unpack(shapes).tolist()
+        shapes = []
+        pos = 0
+        while pos < len(table):
+            name, count, length = table[pos:pos + 3]
+            pos += 3
+            cls = getattr(ast, self.strings[name], None)
+            if not (isinstance(cls, type) and issubclass(cls, ast.Node)):
+                raise ValueError(
+                    'Unknown node class {}'.format(self.strings[name]))
+            end = pos + 4 * length
+            columns = [table[i:i + 4] for i in range(pos, end, 4)]
+            pos = end
+            shapes.append((cls, count, columns))
+
+        new = object.__new__
+        nodes = [None]
+        for cls, count, _ in shapes:
+            nodes.extend(map(new, repeat(cls, count)))
+        node = nodes.__getitem__
+        string = self.strings.__getitem__
+        take = self.take
+        start = 1
+        for _, count, columns in shapes:
+            end = start + count
+            for name, kind, index, items in columns:
+                if kind == _NODE:
+                    column = list(map(node, take(index, count)))
+                elif kind == _NODES:
+                    lengths = take(index, count)
+                    items = iter(list(map(node, take(items, sum(lengths)))))
+                    column = list(map(
+                        list, map(islice, repeat(items), lengths)))
+                elif kind == _STRINGS:
+                    column = list(map(string, take(index, count)))
+                elif kind == _UINTS:
+                    column = take(index, count).tolist()
+                elif kind in (_CONSTANTS, _LISTS):
+                    column = next(self.constants, None)
+                    if column is None or len(column) != count:
+                        raise ValueError('Malformed serialized syntax tree')
+                else:
+                    raise ValueError('Malformed serialized syntax tree')
+                deque(map(setattr, nodes[start:end], repeat(string(name)),
+                          column), 0)
+            start = end
+        return nodes
@@ -0,0 +1,346 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+import errno
+import hashlib
+import json
+import os
+import socket
+import stat
+import struct
+import tempfile
+import threading
+import timeit
+
+try:
+    import socketserver
+except ImportError:
+    # Python 2
+    import SocketServer as socketserver
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from odict import odict as OrderedDict
+
+from slimit import worker
+
+# Every message is a frame: 4 bytes of big-endian length followed by
+# a UTF-8 encoded JSON object.
+#
+# request:  {"source": "...", "options": {"mangle": true, ...}}
+# response: {"output": "...", "diagnostics": {...}}
+#           {"error": "SyntaxError: ...", "diagnostics": {...}}
+#
+# Diagnostics have "cached" and "seconds" spent by the daemon, and
+# "stats" with slimit.stats timings and counters if the "stats" option
+# was set. A connection can be used for any number of requests.
+
+_HEADER = struct.Struct('>I')
+MAX_FRAME_SIZE = 256 * 1024 * 1024
+DEFAULT_CACHE_SIZE = 64 * 1024 * 1024
+
+# options accepted in requests, others are rejected
+OPTIONS = frozenset([
+    'mangle', 'mangle_toplevel', 'compress', 'hoist_vars',
+    'alias_properties', 'deduplicate', 'size_metric', 'stats',
+    ])
+
+
+def _private_directory():
+    """Return the directory of the default socket without XDG_RUNTIME_DIR.
+
+    Other users can create files in the temporary directory, so the
+    socket is put into a subdirectory that only the user can access.
+    """
+    name = 'slimit'
+    if hasattr(os, 'getuid'):
+        name = 'slimit-%d' % os.getuid()
+    return os.path.join(tempfile.gettempdir(), name)
+
+
+def default_socket_path():
+    """Return $SLIMIT_SOCKET or a per user socket path."""
+    path = os.environ.get('SLIMIT_SOCKET')
+    if path:
+        return path
+    directory = os.environ.get('XDG_RUNTIME_DIR') or _private_directory()
+    name = 'slimit.sock'
+    if hasattr(os, 'getuid'):
+        name = 'slimit-%d.sock' % os.getuid()
+    return os.path.join(directory, name)
+
+
+def _make_private_directory(directory):
+    """Create the directory accessible to the user only.
+
+    Raises RuntimeError if it exists and belongs to somebody else
+    or can be accessed by others.
+    """
+    try:
+        os.mkdir(directory, 0o700)
+    except OSError as exc:
+        if exc.errno != errno.EEXIST:
+            raise
+    info = os.lstat(directory)
+    if (not stat.S_ISDIR(info.st_mode) or info.st_mode & 0o077 or
+        (hasattr(os, 'getuid') and info.st_uid != os.getuid())):
+        raise RuntimeError(
+            '%s must be a directory accessible to its owner only' % directory)
+
+
+def _check_owner(path):
+    """Raise ValueError if the socket belongs to another user."""
+    if not hasattr(os, 'getuid'):
+        return
+    try:
+        uid = os.stat(path).st_uid
+    except OSError:
+        # connecting reports a missing socket
+        return
+    if uid != os.getuid():
+        raise ValueError('%s belongs to another user' % path)
+
+
+def send_frame(sock, message):
+    data = json.dumps(message).encode('utf-8')
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1024 * 1024))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def recv_frame(sock):
+    """Return the next message or None if the connection is closed."""
+    header = _recv_exactly(sock, _HEADER.size)
+    if header is None:
+        return None
+    (size,) = _HEADER.unpack(header)
+    if size > MAX_FRAME_SIZE:
+        raise ValueError('Frame of %d bytes is too big' % size)
+    data = _recv_exactly(sock, size)
+    if data is None:
+        raise ValueError('Connection closed in the middle of a frame')
+    return json.loads(data.decode('utf-8'))
+
+
+def _minify(text, options):
+    """Run in a worker: return (output, stats as a dict or None)."""
+    from slimit import size
+    from slimit.stats import StatsCollector
+    options = dict(options)
+    metric = options.pop('size_metric', None)
+    stats = StatsCollector() if options.pop('stats', False) else None
+    output = worker.minify(text, dict(
+        options, stats=stats,
+        oracle=None if metric is None else size.SizeOracle(metric)))
+    return output, None if stats is None else stats.as_dict()
+
+
+class ResultCache(object):
+    """Minified outputs with least recently used eviction.
+
+    max_size is the total length of the cached outputs.
+    """
+
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE):
+        self.max_size = max_size
+        self.size = 0
+        self.hits = self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(source, options):
+        options = dict(options)
+        # statistics don't change the output
+        options.pop('stats', None)
+        return (hashlib.sha1(source.encode('utf-8')).hexdigest(),
+                tuple(sorted(options.items())))
+
+    def get(self, key):
+        with self._lock:
+            output = self._items.pop(key, None)
+            if output is None:
+                self.misses += 1
+                return None
+            self._items[key] = output
+            self.hits += 1
+            return output
+
+    def put(self, key, output):
+        if len(output) > self.max_size:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._items[key] = output
+            self.size += len(output)
+            while self.size > self.max_size:
+                _, old = self._items.popitem(last=False)
+                self.size -= len(old)
+
+
+class _Handler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        while True:
+            try:
+                request = recv_frame(self.request)
+            except ValueError as exc:
+                send_frame(self.request, {'error': str(exc)})
+                return
+            if request is None:
+                return
+            send_frame(self.request, self.server.process(request))
+
+
+class MinifyServer(socketserver.ThreadingMixIn,
+                   socketserver.UnixStreamServer):
+    """Minification daemon listening on a Unix domain socket.
+
+    Every connection is handled in a thread, minification runs in
+    a pool of worker processes that create their parsers once.
+    Outputs are kept in a ResultCache.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path=None, workers=None,
+                 cache_size=DEFAULT_CACHE_SIZE):
+        if path is None:
+            path = default_socket_path()
+            if os.path.dirname(path) == _private_directory():
+                _make_private_directory(os.path.dirname(path))
+        self.path = path
+        self.cache = ResultCache(cache_size)
+        _remove_stale_socket(path)
+        socketserver.UnixStreamServer.__init__(self, path, _Handler)
+        # workers are started before the first request comes
+        import multiprocessing
+        self.pool = multiprocessing.Pool(workers, initializer=worker.init)
+
+    def process(self, request):
+        """Return the response to a request."""
+        start = timeit.default_timer()
+        diagnostics = {'cached': False}
+        try:
+            source = request['source']
+            options = request.get('options', {})
+            unknown = set(options) - OPTIONS
+            if unknown:
+                raise ValueError(
+                    'Unknown options: %s' % ', '.join(sorted(unknown)))
+            key = self.cache.key(source, options)
+            output = self.cache.get(key)
+            if output is not None:
+                diagnostics['cached'] = True
+            else:
+                output, stats = self.pool.apply(_minify, (source, options))
+                if stats is not None:
+                    diagnostics['stats'] = stats
+                self.cache.put(key, output)
+            response = {'output': output}
+        except Exception as exc:
+            # errors are reported to the client, the daemon keeps running
+            response = {'error': '%s: %s' % (type(exc).__name__, exc)}
+        diagnostics['seconds'] = timeit.default_timer() - start
+        response['diagnostics'] = diagnostics
+        return response
+
+    def server_bind(self):
+        socketserver.UnixStreamServer.server_bind(self)
+        # sources are not for other users
+        os.chmod(self.path, 0o600)
+
+    def server_close(self):
+        socketserver.UnixStreamServer.server_close(self)
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def _remove_stale_socket(path):
+    """Remove a socket left by a daemon that is not running anymore.
+
+    Raises RuntimeError if the path is not a socket or a daemon
+    listens on it.
+    """
+    try:
+        mode = os.stat(path).st_mode
+    except OSError as exc:
+        if exc.errno != errno.ENOENT:
+            raise
+        return
+    if not stat.S_ISSOCK(mode):
+        raise RuntimeError('%s exists and is not a socket' % path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except socket.error as exc:
+        if exc.errno not in (errno.ECONNREFUSED, errno.ENOENT):
+            raise
+        os.remove(path)
+    else:
+        raise RuntimeError('slimit daemon is already running on %s' % path)
+    finally:
+        sock.close()
+
+
+def request(source, options=None, path=None, timeout=None):
+    """Minify source in a running daemon and return the response.
+
+    Raises socket.error if there is no daemon listening on the path and
+    ValueError if the socket belongs to another user.
+    """
+    if path is None:
+        path = default_socket_path()
+    _check_owner(path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(path)
+        send_frame(sock, {'source': source, 'options': options or {}})
+        response = recv_frame(sock)
+    finally:
+        sock.close()
+    if response is None:
+        raise ValueError('Connection closed by the daemon')
+    return response
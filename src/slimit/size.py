@@ -0,0 +1,115 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _encode(text):
+    if isinstance(text, bytes):
+        return text
+    return text.encode('utf-8')
+
+
+def raw_size(text):
+    """Return size of the text in bytes (UTF-8)."""
+    return len(_encode(text))
+
+
+def gzip_size(text, level=9):
+    """Return size of the text after gzip compression."""
+    # 16 + MAX_WBITS produces gzip header and trailer
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return len(compressor.compress(_encode(text)) + compressor.flush())
+
+
+def brotli_size(text):
+    """Return size of the text after brotli compression.
+
+    Requires 'brotli' package.
+    """
+    if brotli is None:
+        raise ImportError('brotli package is required to measure brotli size')
+    return len(brotli.compress(_encode(text)))
+
+
+METRICS = {
+    'raw': raw_size,
+    'gzip': gzip_size,
+    'brotli': brotli_size,
+    }
+
+
+def sizes(text):
+    """Return {metric: size} for all metrics available."""
+    result = {'raw': raw_size(text), 'gzip': gzip_size(text)}
+    if brotli is not None:
+        result['brotli'] = brotli_size(text)
+    return result
+
+
+class SizeOracle(object):
+    """Decides which of candidate outputs is smaller over the wire.
+
+    >>> from slimit.size import SizeOracle
+    >>> oracle = SizeOracle('raw')
+    >>> oracle.measure('var a=1;')
+    8
+    >>> oracle.smaller('var a=1,b=2;', 'var a=1;var b=2;')
+    True
+
+    Measurements are cached as optimization passes tend to measure
+    the same output more than once.
+    """
+
+    # maximum number of cached measurements
+    cache_size = 32
+
+    def __init__(self, metric='gzip'):
+        if metric not in METRICS:
+            raise ValueError('Unknown size metric: %r' % metric)
+        if metric == 'brotli' and brotli is None:
+            raise ValueError(
+                'brotli package is required for the brotli size metric')
+        self.metric = metric
+        self._measure = METRICS[metric]
+        self._cache = {}
+
+    def measure(self, text):
+        size = self._cache.get(text)
+        if size is None:
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            size = self._cache[text] = self._measure(text)
+        return size
+
+    def smaller(self, candidate, current):
+        """Return True if candidate is strictly smaller than current."""
+        return self.measure(candidate) < self.measure(current)
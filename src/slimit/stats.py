@@ -0,0 +1,112 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+import json
+import timeit
+
+from contextlib import contextmanager
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from odict import odict as OrderedDict
+
+
+class StatsCollector(object):
+    """Collects wall time per phase and counters.
+
+    >>> from slimit import minify
+    >>> from slimit.stats import StatsCollector
+    >>> stats = StatsCollector()
+    >>> minified = minify('var a = 1;', mangle=True, stats=stats)
+    >>> sorted(stats.as_dict())
+    ['counters', 'timings']
+    >>> stats.counters['output_size']
+    8
+
+    Timings are in seconds. Nested phases are named with a dot,
+    for example 'mangle.scope_tree'.
+    """
+
+    def __init__(self):
+        self.timings = OrderedDict()
+        self.counters = OrderedDict()
+
+    @contextmanager
+    def timer(self, name):
+        """Time the body of a 'with' statement, times are accumulated."""
+        start = timeit.default_timer()
+        try:
+            yield
+        finally:
+            elapsed = timeit.default_timer() - start
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+
+    def incr(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def update(self, other):
+        """Add timings and counters of another collector."""
+        for name, value in other.timings.items():
+            self.timings[name] = self.timings.get(name, 0.0) + value
+        for name, value in other.counters.items():
+            self.incr(name, value)
+
+    def as_dict(self):
+        return {
+            'timings': dict(self.timings),
+            'counters': dict(self.counters),
+            }
+
+    def to_json(self):
+        return json.dumps(self.as_dict(), sort_keys=True)
+
+
+@contextmanager
+def timer(stats, name):
+    """Same as stats.timer(name), but stats can be None."""
+    if stats is None:
+        yield
+    else:
+        with stats.timer(name):
+            yield
+
+
+class CountingLexer(object):
+    """Lexer wrapper that counts tokens returned to the parser."""
+
+    def __init__(self, lexer):
+        self._lexer = lexer
+        self.count = 0
+
+    def token(self):
+        token = self._lexer.token()
+        if token is not None:
+            self.count += 1
+        return token
+
+    def __getattr__(self, name):
+        return getattr(self._lexer, name)
@@ -0,0 +1,186 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+from slimit import ast
+
+# node attributes that are not children, but are part of the structure
+_SCALARS = {
+    ast.Boolean: ('value',),
+    ast.Number: ('value',),
+    ast.Identifier: ('value',),
+    ast.String: ('value',),
+    ast.Regex: ('value',),
+    ast.Assign: ('op',),
+    ast.BinOp: ('op',),
+    ast.UnaryOp: ('op', 'postfix'),
+    }
+
+
+def _children(node):
+    """Return node children, nested lists like NewExpr args flattened."""
+    result = []
+    for child in node.children():
+        if isinstance(child, list):
+            result.extend(child)
+        else:
+            result.append(child)
+    return result
+
+
+def _shape(node):
+    """Return everything but children that makes node structure."""
+    cls = type(node)
+    names = _SCALARS.get(cls)
+    if names is None:
+        # subclasses of AST nodes
+        names = ()
+        for base, base_names in list(_SCALARS.items()):
+            if issubclass(cls, base):
+                names = base_names
+        _SCALARS[cls] = names
+    parameters = getattr(node, 'parameters', None)
+    # parameters and body statements are both in children()
+    arity = None if parameters is None else len(parameters)
+    return (cls.__name__, arity) + tuple(getattr(node, name) for name in names)
+
+
+class StructuralHashes(object):
+    """Memoized structural hashes of AST subtrees.
+
+    Two subtrees are structurally equal if they have the same node types,
+    names, values and operators in the same order, positions and
+    annotations like scopes are ignored. Unlike Node.__eq__ every part of
+    a node counts, for example labels of 'break' and the body of 'with'.
+
+    >>> from slimit import ast
+    >>> from slimit.parser import Parser
+    >>> from slimit.structhash import StructuralHashes
+    >>> tree = Parser().parse('f(a + 1); g(a + 1); h(a + 2);')
+    >>> hashes = StructuralHashes(tree)
+    >>> [[node.to_ecma() for node in group]
+    ...  for group in hashes.duplicates(types=ast.BinOp)]
+    [['a + 1', 'a + 1']]
+
+    Hashes are computed bottom-up in one pass per tree and are not
+    updated when the tree changes: call add() again for changed subtrees
+    or create a new instance.
+    """
+
+    def __init__(self, tree=None):
+        self.tree = tree
+        # {id(node): (node, hash)}, nodes are kept so ids stay unique
+        self._hashes = {}
+        if tree is not None:
+            self.add(tree)
+
+    def add(self, tree):
+        """(Re)compute hashes of all subtrees of the tree."""
+        hashes = self._hashes
+        stack = [(tree, None)]
+        while stack:
+            node, children = stack.pop()
+            if children is None:
+                children = _children(node)
+                stack.append((node, children))
+                stack.extend(
+                    (child, None) for child in children if child is not None)
+            else:
+                key = (_shape(node), tuple(
+                    0 if child is None else hashes[id(child)][1]
+                    for child in children))
+                hashes[id(node)] = (node, hash(key))
+
+    def __getitem__(self, node):
+        entry = self._hashes.get(id(node))
+        if entry is None or entry[0] is not node:
+            self.add(node)
+            entry = self._hashes[id(node)]
+        return entry[1]
+
+    def equal(self, left, right):
+        """Return True if subtrees are structurally equal.
+
+        Hashes reject most different subtrees without walking them, equal
+        hashes are confirmed by comparing the subtrees.
+        """
+        stack = [(left, right)]
+        while stack:
+            left, right = stack.pop()
+            if left is right:
+                continue
+            if left is None or right is None:
+                return False
+            if self[left] != self[right] or _shape(left) != _shape(right):
+                return False
+            left_children, right_children = _children(left), _children(right)
+            if len(left_children) != len(right_children):
+                return False
+            stack.extend(zip(left_children, right_children))
+        return True
+
+    def duplicates(self, types=None, tree=None):
+        """Return lists of structurally equal subtrees.
+
+        Only subtrees with more than one occurrence are returned, in
+        source order of their first occurrence, nested duplicates
+        included.
+
+        Args:
+            types: optional node class or tuple of classes to look for.
+            tree: defaults to the tree passed to the constructor.
+        """
+        if tree is None:
+            tree = self.tree
+        buckets = {}
+        order = []
+        for node in walk(tree):
+            if types is not None and not isinstance(node, types):
+                continue
+            key = self[node]
+            groups = buckets.get(key)
+            if groups is None:
+                groups = buckets[key] = []
+                order.append(key)
+            for group in groups:
+                if self.equal(group[0], node):
+                    group.append(node)
+                    break
+            else:
+                groups.append([node])
+        return [
+            group for key in order for group in buckets[key]
+            if len(group) > 1
+            ]
+
+
+def walk(tree):
+    """Yield the tree and all its descendants in source order."""
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(
+            child for child in reversed(_children(node)) if child is not None)
@@ -0,0 +1,143 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+import doctest
+import unittest
+
+try:
+    import asyncio
+    from slimit import aio
+except (ImportError, SyntaxError):
+    # Python 2
+    aio = None
+
+from slimit.minifier import minify
+
+TEXT = 'function foo(bar) { return bar + 1; }'
+
+
+@unittest.skipIf(aio is None, 'requires asyncio')
+class MinifyPoolTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = aio.MinifyPool(max_workers=1)
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def run_async(self, coroutine):
+        return asyncio.run(coroutine)
+
+    def test_minify(self):
+        result = self.run_async(self.pool.minify(TEXT, mangle=True))
+        self.assertEqual(result, minify(TEXT, mangle=True))
+
+    def test_coalesce(self):
+        async def main():
+            return await asyncio.gather(
+                self.pool.minify(TEXT), self.pool.minify(TEXT),
+                self.pool.minify(TEXT, mangle=True))
+
+        first, second, mangled = self.run_async(main())
+        self.assertEqual(first, second)
+        self.assertEqual(mangled, minify(TEXT, mangle=True))
+        self.assertEqual(self.pool.submitted, 2)
+        self.assertEqual(self.pool._jobs, {})
+
+    def test_timeout(self):
+        # starting the worker takes longer than that
+        self.assertRaises(
+            asyncio.TimeoutError,
+            self.run_async, self.pool.minify(TEXT, timeout=0.000001))
+
+    def test_cancel(self):
+        async def main():
+            task = asyncio.ensure_future(self.pool.minify(TEXT))
+            other = asyncio.ensure_future(self.pool.minify(TEXT))
+            await asyncio.sleep(0)
+            task.cancel()
+            # the job is shared, it keeps running for the other waiter
+            result = await other
+            self.assertTrue(task.cancelled())
+            return result
+
+        self.assertEqual(self.run_async(main()), minify(TEXT))
+        self.assertEqual(self.pool.submitted, 1)
+
+    def test_cancel_last_waiter(self):
+        async def main():
+            task = asyncio.ensure_future(self.pool.minify(TEXT))
+            await asyncio.sleep(0)
+            (job,) = self.pool._jobs.values()
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await asyncio.sleep(0)
+            return job
+
+        job = self.run_async(main())
+        self.assertTrue(job.future.cancelled())
+        self.assertEqual(self.pool._jobs, {})
+
+    def test_same_text_after_timeout(self):
+        async def main():
+            try:
+                await self.pool.minify(TEXT, timeout=0.000001)
+            except asyncio.TimeoutError:
+                pass
+            # the cancelled job is not reused
+            return await self.pool.minify(TEXT)
+
+        self.assertEqual(self.run_async(main()), minify(TEXT))
+        self.assertEqual(self.pool.submitted, 2)
+
+    def test_syntax_error(self):
+        self.assertRaises(
+            SyntaxError, self.run_async, self.pool.minify('var 1;'))
+
+    def test_valid_text_after_syntax_error(self):
+        # the only worker reuses its parser
+        self.assertRaises(
+            SyntaxError, self.run_async, self.pool.minify('f(a b)'))
+        self.assertEqual(
+            self.run_async(self.pool.minify('/re/.test(s);')),
+            '/re/.test(s);')
+
+    def test_shared_pool(self):
+        try:
+            self.assertEqual(
+                self.run_async(aio.minify(TEXT)), minify(TEXT))
+        finally:
+            aio.shutdown()
+
+
+def test_suite():
+    suites = [unittest.makeSuite(MinifyPoolTestCase)]
+    if aio is not None:
+        suites.append(doctest.DocFileSuite(
+            '../aio.py',
+            optionflags=doctest.NORMALIZE_WHITESPACE|doctest.ELLIPSIS
+            ))
+    return unittest.TestSuite(suites)
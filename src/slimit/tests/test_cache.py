@@ -0,0 +1,156 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+import doctest
+import os
+import shutil
+import tempfile
+import unittest
+
+from slimit import minifier
+from slimit.cache import ASTCache, grammar_version
+from slimit.parser import Parser
+from slimit.stats import StatsCollector
+from slimit.structhash import walk
+
+TEXT = 'var foo = function(bar) { return bar + 1; };'
+
+
+class ASTCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _files(self, cache):
+        return sorted(os.listdir(cache.directory))
+
+    def test_get_put(self):
+        cache = ASTCache(self.directory)
+        self.assertEqual(cache.get(TEXT), None)
+        tree = Parser().parse(TEXT)
+        cache.put(TEXT, tree)
+        cached = cache.get(TEXT)
+        self.assertEqual(cached, tree)
+        # every hit returns a new tree that can be changed
+        self.assertFalse(cached is cache.get(TEXT))
+        self.assertEqual(cache.get(TEXT + ' '), None)
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+        self.assertEqual(os.path.basename(cache.directory), grammar_version())
+
+    def test_parser(self):
+        cache = ASTCache(self.directory)
+        parser = Parser(cache=cache)
+        tree = parser.parse(TEXT)
+        self.assertEqual(cache.misses, 1)
+        # grammar rules are not used on a hit
+        parser.parser = None
+        self.assertEqual(parser.parse(TEXT), tree)
+        self.assertEqual(cache.hits, 1)
+
+    def test_hit_keeps_positions(self):
+        cache = ASTCache(self.directory)
+        parser = Parser(cache=cache)
+        text = TEXT + '\nvar baz = 1;'
+        parsed = parser.parse(text)
+        cached = parser.parse(text)
+        self.assertEqual(cache.hits, 1)
+        for node, cached_node in zip(walk(parsed), walk(cached)):
+            self.assertEqual(sorted(vars(node)), sorted(vars(cached_node)))
+        self.assertEqual(
+            [(node.lexpos, node.lineno) for node in cached],
+            [(0, 1), (len(TEXT) + 1, 2)])
+
+    def test_minify(self):
+        cache = ASTCache(self.directory)
+        expected = minifier.minify(TEXT, mangle=True)
+        self.assertEqual(minifier.minify(TEXT, mangle=True, cache=cache),
+                         expected)
+        # the cached tree is stored before it is mangled
+        stats = StatsCollector()
+        self.assertEqual(
+            minifier.minify(TEXT, mangle=True, cache=cache, stats=stats),
+            expected)
+        counters = stats.as_dict()['counters']
+        self.assertEqual(counters['cache_hits'], 1)
+        self.assertFalse('tokens' in counters)
+        self.assertFalse('parse' in stats.as_dict()['timings'])
+
+    def test_other_versions_are_removed(self):
+        old = ASTCache(self.directory, version='0123456789abcdef')
+        old.put(TEXT, Parser().parse(TEXT))
+        other = os.path.join(self.directory, 'other')
+        os.mkdir(other)
+        cache = ASTCache(self.directory)
+        self.assertEqual(cache.get(TEXT), None)
+        cache.put(TEXT, Parser().parse(TEXT))
+        self.assertFalse(os.path.exists(old.directory))
+        # directories that don't look like versions are left alone
+        self.assertTrue(os.path.exists(other))
+
+    def test_eviction(self):
+        texts = ['var a%d = %d;' % (index, index) for index in range(4)]
+        cache = ASTCache(self.directory)
+        for index, text in enumerate(texts):
+            cache.put(text, Parser().parse(text))
+            path = os.path.join(cache.directory, cache.key(text) + '.ast')
+            os.utime(path, (index * 10, index * 10))
+            if index == 0:
+                cache.max_size = os.path.getsize(path) * 3
+        # entries 0..2 are 3 * size, adding the 4th one evicts the least
+        # recently used down to 3/4 of max_size
+        self.assertEqual(cache.get(texts[0]), None)
+        self.assertEqual(cache.get(texts[1]), None)
+        self.assertTrue(cache.get(texts[3]) is not None)
+
+    def test_corrupted_entry(self):
+        cache = ASTCache(self.directory)
+        cache.put(TEXT, Parser().parse(TEXT))
+        path = os.path.join(cache.directory, self._files(cache)[0])
+        with open(path, 'wb') as fout:
+            fout.write(b'SLAST')
+        self.assertEqual(cache.get(TEXT), None)
+        self.assertFalse(os.path.exists(path))
+
+    def test_clear(self):
+        cache = ASTCache(self.directory)
+        cache.put(TEXT, Parser().parse(TEXT))
+        cache.clear()
+        self.assertEqual(cache.get(TEXT), None)
+        cache.put(TEXT, Parser().parse(TEXT))
+        self.assertTrue(cache.get(TEXT) is not None)
+
+
+def test_suite():
+    return unittest.TestSuite((
+        unittest.makeSuite(ASTCacheTestCase),
+        doctest.DocFileSuite(
+            '../cache.py',
+            optionflags=doctest.NORMALIZE_WHITESPACE|doctest.ELLIPSIS
+            ),
+        ))
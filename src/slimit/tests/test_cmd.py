@@ -88,6 +88,107 @@ class CmdTestCase(unittest.TestCase):
         main(['-m'], inp=inp, out=out)
         self.assertEqual('function foo(){var a=5;}', out.getvalue())
 
+    def test_main_dash_c_with_mock_stdin(self):
+        from slimit.minifier import main
+        out = StringIO()
+        inp = StringIO('function foo() { var a = 5; var b = 6; bar(a, b); }')
+        main(['-c'], inp=inp, out=out)
+        self.assertEqual('function foo(){var a=5,b=6;bar(a,b);}', out.getvalue())
+
+    def test_main_report_size(self):
+        from slimit.minifier import main
+        out, err = StringIO(), StringIO()
+        main(['--report-size', self.path], out=out, err=err)
+        self.assertEqual('var global=5;', out.getvalue())
+        self.assertTrue(err.getvalue().startswith(
+            '%s: raw 15 -> 13, gzip ' % self.path))
+
+    def test_main_check(self):
+        from slimit.minifier import main
+        out = StringIO()
+        inp = StringIO('a();\nvar = 1;\nb(;\nc = @;\n')
+        self.assertEqual(main(['--check', self.path, '-'], inp=inp, out=out), 1)
+        self.assertEqual(out.getvalue(), (
+            "-:2:5: Unexpected token (EQ, '=')\n"
+            "-:3:3: Unexpected token (SEMI, ';')\n"
+            "-:4:5: Illegal character '@'\n"))
+        self.assertEqual(main(['--check', self.path], out=StringIO()), 0)
+
+    def test_main_compress_options_require_compress(self):
+        from slimit.minifier import main
+        old_stderr, sys.stderr = sys.stderr, StringIO()
+        try:
+            for argv in (['--hoist-vars'], ['--size-metric', 'raw'],
+                         ['--stream', '-m', '--deduplicate'],
+                         ['--whitespace-only', '--alias-properties'],
+                         ['--client', '--hoist-vars']):
+                self.assertRaises(
+                    SystemExit, main, argv + [self.path], out=StringIO())
+            self.assertTrue('--hoist-vars can only be used with --compress'
+                            in sys.stderr.getvalue())
+        finally:
+            sys.stderr = old_stderr
+
+    def test_main_unavailable_size_metric(self):
+        from slimit import size
+        from slimit.minifier import main
+        old_brotli, size.brotli = size.brotli, None
+        old_stderr, sys.stderr = sys.stderr, StringIO()
+        try:
+            self.assertRaises(
+                SystemExit, main, ['-c', '--size-metric', 'brotli', self.path],
+                out=StringIO())
+            self.assertTrue(
+                'brotli package is required' in sys.stderr.getvalue())
+        finally:
+            size.brotli, sys.stderr = old_brotli, old_stderr
+
+    def test_main_stats(self):
+        import json
+        from slimit.minifier import main
+        out, err = StringIO(), StringIO()
+        main(['--stats', '-m', '-t', self.path], out=out, err=err)
+        self.assertEqual('var a=5;', out.getvalue())
+        stats = json.loads(err.getvalue())
+        self.assertEqual(stats['counters']['output_size'], 8)
+        self.assertTrue('mangle.rename' in stats['timings'])
+
+    def test_main_profile(self):
+        from slimit.minifier import main
+        out, err = StringIO(), StringIO()
+        fd, stacks = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            main(['--profile', '--profile-stacks', stacks, self.path],
+                 out=out, err=err)
+            with open(stacks) as fin:
+                lines = fin.read().splitlines()
+        finally:
+            os.remove(stacks)
+        self.assertEqual('var global=5;', out.getvalue())
+        self.assertTrue('ECMAMinifier.visit_VarStatement' in err.getvalue())
+        for line in lines:
+            path, value = line.rsplit(' ', 1)
+            self.assertTrue(path.startswith('ECMAMinifier.visit_Program'))
+            self.assertTrue(int(value) > 0)
+
+    def test_main_cache_dir(self):
+        import json
+        import shutil
+        from slimit.minifier import main
+        directory = tempfile.mkdtemp()
+        try:
+            for hits in (0, 1):
+                out, err = StringIO(), StringIO()
+                main(['--stats', '-m', '-t', '--cache-dir', directory,
+                      self.path], out=out, err=err)
+                self.assertEqual('var a=5;', out.getvalue())
+                stats = json.loads(err.getvalue())
+                self.assertEqual(
+                    stats['counters'].get('cache_hits', 0), hits)
+        finally:
+            shutil.rmtree(directory)
+
     def test_main_stdin_stdout(self):
         # slimit.minifier should be deleted from sys.modules in order
         # to have a proper reference to sys.stdin and sys.stdou when
@@ -0,0 +1,522 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+import unittest
+
+from slimit.parser import Parser
+from slimit.compressor import compress
+from slimit.visitors.minvisitor import ECMAMinifier
+
+
+def decorator(cls):
+    def make_test_function(input, expected, options):
+        def test_func(self):
+            parser = Parser()
+            tree = parser.parse(input)
+            compress(tree, **options)
+            result = ECMAMinifier().visit(tree)
+            self.assertEqual(result, expected)
+            # make sure the result is valid JavaScript that parses back
+            # into the same program
+            reparsed = ECMAMinifier().visit(Parser().parse(result))
+            self.assertEqual(reparsed, result)
+
+        return test_func
+
+    for index, case in enumerate(cls.TEST_CASES):
+        input, expected = case[:2]
+        options = dict(getattr(cls, 'OPTIONS', {}))
+        if len(case) > 2:
+            options.update(case[2])
+        func = make_test_function(input, expected, options)
+        setattr(cls, 'test_case_%d' % index, func)
+
+    return cls
+
+
+@decorator
+class VarCompressorTestCase(unittest.TestCase):
+
+    OPTIONS = {'unused': False}
+
+    TEST_CASES = [
+        ('var a = 1; var b = 2; var c;', 'var a=1,b=2,c;'),
+
+        ('var a = 1; foo(); var b = 2;', 'var a=1;foo();var b=2;'),
+
+        ('function f() { var a = 1; var b; }',
+         'function f(){var a=1,b;}'),
+
+        ('var i = 0; for (; i < 10; i++) {}',
+         'for(var i=0;i<10;i++){}'),
+
+        ('var a = 1; for (var i = 0; i < 10; i++) {}',
+         'for(var a=1,i=0;i<10;i++){}'),
+
+        # 'in' operator can't be moved into the init part of 'for'
+        ('var a = "x" in b; for (; a;) {}',
+         'var a="x" in b;for(;a;){}'),
+
+        ('var a = 1; for (i = 0; i < 10; i++) {}',
+         'var a=1;for(i=0;i<10;i++){}'),
+
+        ('switch (x) { case 1: var a; var b; }',
+         'switch(x){case 1:var a,b;}'),
+
+        # hoisting
+        ("""
+        function f(p) {
+          var a = 1;
+          g();
+          var b = 2, c;
+          for (var i = 0; i < p; i++) {}
+          for (var k in p) {}
+        }
+        """,
+         'function f(p){var a=1,b,c,i,k;g(),b=2;'
+         'for(i=0;i<p;i++){}for(k in p){}}',
+         {'hoist_vars': True}),
+
+        ('function f() { "use strict"; g(); var a = 1; }',
+         'function f(){"use strict";var a;g(),a=1;}',
+         {'hoist_vars': True}),
+
+        # parameters are already declared
+        ('function f(a) { g(); var a = 1; if (a) { var b; } }',
+         'function f(a){var b;g(),a=1;if(a){}}',
+         {'hoist_vars': True}),
+
+        ('function f() { g(); try { var a = 1; } catch (e) { var e = 2; } }',
+         'function f(){var a,e;g();try{a=1;}catch(e){e=2;}}',
+         {'hoist_vars': True}),
+
+        # global scope is left intact
+        ('g(); var a = 1; var b = 2;', 'g();var a=1,b=2;',
+         {'hoist_vars': True}),
+        ]
+
+
+@decorator
+class SequenceCompressorTestCase(unittest.TestCase):
+
+    OPTIONS = {'unused': False}
+
+    TEST_CASES = [
+        ('a(); b(); c();', 'a(),b(),c();'),
+
+        ('a = 1; b = 2, c = 3; d();', 'a=1,b=2,c=3,d();'),
+
+        ('function f() { a(); return b; }', 'function f(){return a(),b;}'),
+
+        ('function f() { a(); return; }', 'function f(){a();return;}'),
+
+        ('a(); throw b;', 'throw a(),b;'),
+
+        # directive prologue is kept intact
+        ('function f() { "use strict"; a(); }',
+         'function f(){"use strict";a();}'),
+
+        ('if (a) b();', 'a&&b();'),
+
+        ('if (!a) b();', 'a||b();'),
+
+        ('if (a) { b(); c(); }', 'a&&(b(),c());'),
+
+        ('if (a || b) c = d;', '(a||b)&&(c=d);'),
+
+        ('if (a) b(); else c();', 'a?b():c();'),
+
+        ('if (!a) b(); else c();', 'a?c():b();'),
+
+        ('if (a) x = 1; else { y = 2; z = 3; }', 'a?x=1:(y=2,z=3);'),
+
+        ('if (a = b) c(); else d();', '(a=b)?c():d();'),
+
+        ('function f() { if (a) return b; else return c; }',
+         'function f(){return a?b:c;}'),
+
+        ('function f() { x(); if (a) { return b; } return c; }',
+         'function f(){return x(),a?b:c;}'),
+
+        ('function f() { if (a) return; return c; }',
+         'function f(){if(a)return;return c;}'),
+
+        # statements can't start with 'function' keyword or a brace
+        ('if (function(){}()) b();', '(function(){})()&&b();'),
+
+        ('if ({}.a) b();', 'if({}.a)b();'),
+
+        ('if (a) if (b) c(); else d();', 'a&&(b?c():d());'),
+
+        ('if (a) { if (b) c(); } else d();', 'a?b&&c():d();'),
+
+        ('if (a) { b(); var c; } else d();',
+         'if(a){b();var c;}else d();'),
+
+        ('for (;;) { if (a) b(); }', 'for(;;)a&&b();'),
+
+        ('while (a) { b(); c(); }', 'while(a)b(),c();'),
+
+        ('switch (a) { case 1: b(); c(); default: d(); e(); }',
+         'switch(a){case 1:b(),c();default:d(),e();}'),
+        ]
+
+
+@decorator
+class UnusedCompressorTestCase(unittest.TestCase):
+
+    OPTIONS = {'sequences': False}
+
+    TEST_CASES = [
+        ('function f() { var a = 1, b; return 1; }',
+         'function f(){return 1;}'),
+
+        # initializers with side effects are kept
+        ('function f() { var a = g(), b = 1 + 2, c = [1, {x: "y"}]; }',
+         'function f(){var a=g();}'),
+
+        ('function f() { var a = -1, b = typeof x, c = x; }',
+         'function f(){var c=x;}'),
+
+        ('function f(a) { var b = a; return 1; }',
+         'function f(a){return 1;}'),
+
+        ('function f() { function g() {} return 1; }',
+         'function f(){return 1;}'),
+
+        # removal is repeated until nothing is left to remove
+        ("""
+        function f() {
+          var a = function() { return b; };
+          function b() { c(); }
+          function c() {}
+          return 1;
+        }
+        """,
+         'function f(){return 1;}'),
+
+        ('function f() { for (var i = 0;;) {} }', 'function f(){for(;;){}}'),
+
+        ('function f() { if (a) var b = 1; }', 'function f(){if(a);}'),
+
+        # parameters are never removed
+        ('function f(a, b) { return b; }', 'function f(a,b){return b;}'),
+
+        # assigning a parameter changes 'arguments'
+        ('function f(a) { var a = 1, c = 2; return arguments[0]; }',
+         'function f(a){var a=1;return arguments[0];}'),
+
+        ('function f(a) { var a; return 1; }', 'function f(a){return 1;}'),
+
+        # the name might be a property of the object
+        ('function f(o) { with (o) { var x = 1; } return o.x; }',
+         'function f(o){with(o)var x=1;return o.x;}'),
+
+        ('function f() { var a = 1; eval("a"); }',
+         'function f(){var a=1;eval("a");}'),
+
+        ('function f() { var a = 1; function g() { eval(""); } }',
+         'function f(){var a=1;function g(){eval("");}}'),
+
+        # global scope is left intact by default
+        ('var a = 1; function f() {}', 'var a=1;function f(){}'),
+
+        ('var a = 1; function f() {} var b = 2; f(b);',
+         'function f(){}var b=2;f(b);', {'toplevel': True}),
+        ]
+
+
+@decorator
+class PropertyAliasCompressorTestCase(unittest.TestCase):
+
+    OPTIONS = {'alias_properties': True, 'sequences': False, 'unused': False}
+
+    TEST_CASES = [
+        ("""
+        function f() {
+          C.prototype.a = function() {};
+          C.prototype.b = 1;
+          C.prototype.c = [];
+        }
+        """,
+         'function f(){var d=C.prototype;d.a=function(){};d.b=1;d.c=[];}'),
+
+        # not profitable
+        ('function f() { C.p.a = 1; C.p.b = 2; C.p.c = 3; }',
+         'function f(){C.p.a=1;C.p.b=2;C.p.c=3;}'),
+
+        # function calls might change the receiver
+        ("""
+        function f() {
+          C.prototype.a = 1;
+          g();
+          C.prototype.b = 2;
+          C.prototype.c = 3;
+          C.prototype.d = 4;
+        }
+        """,
+         'function f(){C.prototype.a=1;g();var e=C.prototype;'
+         'e.b=2;e.c=3;e.d=4;}'),
+
+        ("""
+        function f() {
+          C.prototype.a = 1;
+          C.prototype = {};
+          C.prototype.b = 2;
+          C = D;
+          C.prototype.c = 3;
+        }
+        """,
+         'function f(){C.prototype.a=1;C.prototype={};C.prototype.b=2;'
+         'C=D;C.prototype.c=3;}'),
+
+        # bracket accessors can change any property of the object
+        ("""
+        function f() {
+          C.prototype.a = 1;
+          C.prototype.b = 2;
+          C.prototype.c = 3;
+          C[key] = {};
+          C.prototype.d = 4;
+          delete C[name];
+          C.prototype.e = 5;
+          C[name]++;
+          C.prototype.g = 6;
+        }
+        """,
+         "function f(){var h=C.prototype;h.a=1;h.b=2;h.c=3;"
+         "C[key]={};C.prototype.d=4;delete C[name];"
+         "C.prototype.e=5;C[name]++;C.prototype.g=6;}"),
+
+        # the receiver might not exist if it is only used conditionally
+        ("""
+        function f(C) {
+          C && (C.prototype.aaaa = 1, C.prototype.bbbb = 2,
+                C.prototype.cccc = 3, C.prototype.dddd = 4);
+          return 1;
+        }
+        """,
+         'function f(C){C&&(C.prototype.aaaa=1,C.prototype.bbbb=2,'
+         'C.prototype.cccc=3,C.prototype.dddd=4);return 1;}'),
+
+        ("""
+        function f(C) {
+          if (C) C.prototype.x = 0;
+          C.prototype.aaaa = 1;
+          C.prototype.bbbb = C && C.prototype.x;
+          C.prototype.cccc = 3;
+        }
+        """,
+         'function f(C){if(C)C.prototype.x=0;var a=C.prototype;'
+         'a.aaaa=1;a.bbbb=C&&a.x;a.cccc=3;}'),
+
+        # D might be the same object as C
+        ("""
+        function f(C, D) {
+          C.prototype.aaaa = 1;
+          C.prototype.bbbb = 2;
+          D.prototype = {};
+          C.prototype.cccc = 3;
+          C.prototype.dddd = 4;
+          C.prototype.eeee = 5;
+        }
+        """,
+         'function f(C,D){var a=C.prototype;a.aaaa=1;a.bbbb=2;'
+         'D.prototype={};var b=C.prototype;b.cccc=3;b.dddd=4;b.eeee=5;}'),
+
+        # uses in nested functions are evaluated later and not aliased
+        ("""
+        function f() {
+          C.prototype.a = function() { return C.prototype.b; };
+          C.prototype.b = 1;
+          C.prototype.c = 2;
+        }
+        """,
+         'function f(){var d=C.prototype;'
+         'd.a=function(){return C.prototype.b;};d.b=1;d.c=2;}'),
+
+        ("""
+        function f() {
+          with (o) {
+            C.prototype.a = 1;
+            C.prototype.b = 2;
+            C.prototype.c = 3;
+          }
+        }
+        """,
+         'function f(){with(o){C.prototype.a=1;C.prototype.b=2;'
+         'C.prototype.c=3;}}'),
+
+        # global scope is left intact by default
+        ('C.prototype.a = 1; C.prototype.b = 2; C.prototype.c = 3;',
+         'C.prototype.a=1;C.prototype.b=2;C.prototype.c=3;'),
+
+        ('C.prototype.a = 1; C.prototype.b = 2; C.prototype.c = 3;',
+         'var d=C.prototype;d.a=1;d.b=2;d.c=3;', {'toplevel': True}),
+        ]
+
+    def test_stats(self):
+        tree = Parser().parse("""
+        function f() {
+          C.prototype.a = 1;
+          C.prototype.b = 2;
+          C.prototype.c = 3;
+        }
+        """)
+        stats = {}
+        compress(tree, stats=stats, **self.OPTIONS)
+        # 3 * len('C.prototype') - len('var d=C.prototype;') - 3 * len('d')
+        self.assertEqual(stats, {'alias_properties': {'C.prototype': 12}})
+
+
+@decorator
+class DeduplicateCompressorTestCase(unittest.TestCase):
+
+    OPTIONS = {'deduplicate': True, 'sequences': False, 'unused': False}
+
+    TEST_CASES = [
+        ("""
+        (function() {
+          var a = function(x) { return x * 2 + Math.max(x, 1); };
+          var b = function(x) { return x * 2 + Math.max(x, 1); };
+        })();
+        """,
+         '(function(){var c=function(x){return x*2+Math.max(x,1);},'
+         'a=c,b=c;})();'),
+
+        ("""
+        function f() {
+          var a = {x: -1, y: true, z: null}, b = {x: -1, y: true, z: null};
+        }
+        """,
+         'function f(){var c={x:-1,y:true,z:null},a=c,b=c;}'),
+
+        # nested literals are containers that can be filled later
+        ("""
+        function f() {
+          var X = {prototype: {}, items: [1, 2, 3]};
+          X = {prototype: {}, items: [1, 2, 3]};
+        }
+        """,
+         'function f(){var X={prototype:{},items:[1,2,3]};'
+         'X={prototype:{},items:[1,2,3]};}'),
+
+        # every call of d and e returns a new object
+        ("""
+        function f() {
+          function d() { return {a: 1, b: 2, c: 3}; }
+          function e() { return {a: 1, b: 2, c: 3}; }
+          var x = {a: 1, b: 2, c: 3};
+          for (;;) { g({a: 1, b: 2, c: 3}); }
+        }
+        """,
+         'function f(){function d(){return{a:1,b:2,c:3};}'
+         'function e(){return{a:1,b:2,c:3};}'
+         'for(var x={a:1,b:2,c:3};;)g({a:1,b:2,c:3});}'),
+
+        # not profitable
+        ('function f() { var a = [1, 2, 3], b = [1, 2, 3]; }',
+         'function f(){var a=[1,2,3],b=[1,2,3];}'),
+
+        # not constant
+        ('function f() { var a = [x, 2, 3, 4, 5, 6], b = [x, 2, 3, 4, 5, 6]; }',
+         'function f(){var a=[x,2,3,4,5,6],b=[x,2,3,4,5,6];}'),
+
+        # 'y' is a different variable in every function
+        ("""
+        function f() {
+          function g(y) {
+            return function(x) { return x * y + Math.max(x, 1); };
+          }
+          function h(y) {
+            return function(x) { return x * y + Math.max(x, 1); };
+          }
+        }
+        """,
+         'function f(){function g(y){return function(x){'
+         'return x*y+Math.max(x,1);};}function h(y){return function(x){'
+         'return x*y+Math.max(x,1);};}}'),
+
+        # the same 'y' is visible where the function is hoisted to
+        ("""
+        function f(y) {
+          var a = function(x) { return x * y + Math.max(x, 1); };
+          var b = function(x) { return x * y + Math.max(x, 1); };
+        }
+        """,
+         'function f(y){var c=function(x){return x*y+Math.max(x,1);},'
+         'a=c,b=c;}'),
+
+        ("""
+        function f() {
+          "use strict";
+          function g() {
+            function each(a, fn) {
+              for (var i = 0; i < a.length; i++) fn(a[i]);
+            }
+            return each;
+          }
+          function h() {
+            function each(a, fn) {
+              for (var i = 0; i < a.length; i++) fn(a[i]);
+            }
+            return each;
+          }
+        }
+        """,
+         'function f(){"use strict";var b=function(a,fn){'
+         'for(var i=0;i<a.length;i++)fn(a[i]);};'
+         'function g(){var each=b;return each;}'
+         'function h(){var each=b;return each;}}'),
+
+        ("""
+        function f() {
+          var a = [1, 2, 3, 4, 5, 6, 7], b = [1, 2, 3, 4, 5, 6, 7];
+          eval('a');
+        }
+        """,
+         'function f(){var a=[1,2,3,4,5,6,7],b=[1,2,3,4,5,6,7];eval(\'a\');}'),
+
+        # global scope is left intact by default
+        ('var a = [1, 2, 3, 4, 5, 6, 7], b = [1, 2, 3, 4, 5, 6, 7];',
+         'var a=[1,2,3,4,5,6,7],b=[1,2,3,4,5,6,7];'),
+
+        ('var a = [1, 2, 3, 4, 5, 6, 7], b = [1, 2, 3, 4, 5, 6, 7];',
+         'var c=[1,2,3,4,5,6,7],a=c,b=c;', {'toplevel': True}),
+        ]
+
+    def test_stats(self):
+        tree = Parser().parse("""
+        function f() {
+          var a = {x: -1, y: true, z: null}, b = {x: -1, y: true, z: null};
+        }
+        """)
+        stats = {}
+        compress(tree, stats=stats, **self.OPTIONS)
+        # 2 * len('{x:-1,y:true,z:null}') - len('var c={x:-1,y:true,z:null};')
+        # - 2 * len('c')
+        self.assertEqual(
+            stats, {'deduplicate': {'{x:-1,y:true,z:null}': 11}})
@@ -0,0 +1,82 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+import doctest
+import unittest
+
+from slimit import ast
+from slimit.parser import Parser
+from slimit.visitors.dispatch import dispatch_table
+from slimit.visitors.minvisitor import ECMAMinifier
+from slimit.visitors.nodevisitor import ASTVisitor
+
+
+class DispatchTableTestCase(unittest.TestCase):
+
+    def test_generic_visit_fallback(self):
+        self.assertEqual(
+            dispatch_table[ASTVisitor, ast.Identifier],
+            ASTVisitor.generic_visit)
+
+    def test_subclass_overrides(self):
+        class IdentifierCollector(ASTVisitor):
+            def __init__(self):
+                self.names = []
+
+            def visit_Identifier(self, node):
+                self.names.append(node.value)
+
+        class UpperIdentifierCollector(IdentifierCollector):
+            def visit_Identifier(self, node):
+                self.names.append(node.value.upper())
+
+        tree = Parser().parse('foo(bar);')
+        # base class first, so its entries are cached
+        visitor = IdentifierCollector()
+        visitor.visit(tree)
+        self.assertEqual(visitor.names, ['foo', 'bar'])
+        visitor = UpperIdentifierCollector()
+        visitor.visit(tree)
+        self.assertEqual(visitor.names, ['FOO', 'BAR'])
+
+    def test_inherited_methods(self):
+        class Minifier(ECMAMinifier):
+            pass
+
+        tree = Parser().parse('if (a) { b(); } else { c(); }')
+        self.assertEqual(Minifier().visit(tree), ECMAMinifier().visit(tree))
+        self.assertEqual(
+            dispatch_table[Minifier, ast.If], ECMAMinifier.visit_If)
+
+
+def test_suite():
+    return unittest.TestSuite((
+        unittest.makeSuite(DispatchTableTestCase),
+        doctest.DocFileSuite(
+            '../visitors/dispatch.py',
+            optionflags=doctest.NORMALIZE_WHITESPACE|doctest.ELLIPSIS
+            ),
+        ))
@@ -0,0 +1,87 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+import os
+import subprocess
+import sys
+import unittest
+
+import slimit
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(slimit.__file__)))
+
+# the parser, the lexer with its big unicode regexes and ply
+HEAVY = ('ply', 'ply.lex', 'ply.yacc', 'slimit.lexer', 'slimit.parser',
+         'slimit.unicode_chars')
+
+
+def imported_modules(code):
+    """Return names of modules imported by code in a new interpreter."""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = SRC
+    process = subprocess.Popen(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env)
+    out, err = process.communicate()
+    assert process.returncode == 0, err
+    return set(
+        line.rsplit('|', 1)[1].strip()
+        for line in err.decode('utf-8').splitlines()
+        if line.startswith('import time:')
+        )
+
+
+@unittest.skipIf(sys.version_info < (3, 7), 'requires -X importtime')
+class ImportTimeTestCase(unittest.TestCase):
+
+    def assertNotImported(self, code, modules=HEAVY):
+        imported = imported_modules(code)
+        self.assertEqual(sorted(imported.intersection(modules)), [])
+        return imported
+
+    def test_import_slimit(self):
+        imported = self.assertNotImported(
+            'import slimit', HEAVY + ('slimit.minifier',))
+        self.assertTrue('slimit' in imported)
+
+    def test_import_minifier(self):
+        # the command line client doesn't need the parser
+        self.assertNotImported('import slimit.minifier')
+
+    def test_identifier_regex_is_compiled_on_first_use(self):
+        self.assertNotImported('import slimit.visitors.minvisitor')
+        imported = imported_modules(
+            'from slimit.visitors import minvisitor\n'
+            'assert minvisitor._HAS_ID_MATCH is None\n'
+            'assert minvisitor._is_identifier("foo")\n'
+            'assert not minvisitor._is_identifier("for")\n')
+        self.assertTrue('slimit.lexer' in imported)
+
+    def test_minify(self):
+        imported = imported_modules(
+            'import slimit\n'
+            'assert slimit.minify("var  a = 1;") == "var a=1;"\n')
+        self.assertTrue('slimit.parser' in imported)
@@ -0,0 +1,156 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+import doctest
+import unittest
+
+from slimit import literal
+from slimit.minifier import minify
+from slimit.parser import Parser
+from slimit.stats import StatsCollector
+from slimit.visitors.minvisitor import ECMAMinifier
+
+
+DATA = """var DATA = [
+  {"id": 1, "name": "first", 'tags': ['a', "b\\"c"], "ratio": -0.5e-3},
+  {"id": 0x2, "name": null, "valid": true, nested: {"empty": {}, "list": []}}
+];
+"""
+
+CODE = """function f(first, second) {
+  var local = {"a": [first, second]};
+  return local.a.length + DATA.length;
+}
+"""
+
+
+def _parse(text):
+    return ECMAMinifier().visit(Parser().parse(text))
+
+
+class ScanTestCase(unittest.TestCase):
+
+    def test_same_as_parser(self):
+        minified, end = literal.scan(DATA, DATA.index('['))
+        self.assertEqual('var DATA=%s;' % minified, _parse(DATA))
+        self.assertEqual(DATA[end:], ';\n')
+
+    def test_not_literals(self):
+        for text in ('[1, x]', '[1,, 2]', '[1, 2,]', '{"a": 1,}',
+                     '{if: 1}', '{"a" 1}', '{"a": 1]', '[1, 2}', '[1, 2',
+                     '[-"a"]', '[- 1]', '[1 2]', '["a\\\nb"]', '{1: 2}',
+                     '[/x/]', '[1 /* one */]', '["a" + "b"]'):
+            self.assertEqual(literal.scan(text), None, text)
+
+
+class SplitTestCase(unittest.TestCase):
+
+    def test_code_and_literals(self):
+        text = CODE + DATA + CODE
+        pieces = literal.split(text)
+        self.assertEqual(
+            [is_literal for _, is_literal in pieces], [False, True, False])
+        self.assertEqual(pieces[1][0], _parse(DATA))
+
+    def test_too_small(self):
+        self.assertEqual(literal.split(CODE * 20 + DATA), None)
+
+    def test_not_statements(self):
+        for text in (
+            # not at the top level
+            '(function() {\n%s})();' % DATA,
+            # inside of a comment
+            '/*\n%s*/' % DATA,
+            '// %s' % DATA.replace('\n', ' '),
+            # inside of a string
+            'x = "%s";' % DATA.replace('\n', ' ').replace('"', '\\"'),
+            # continued on the next line
+            DATA.rstrip(';\n') + '\n[0];',
+            # '}' on the same line can end an expression
+            'x = {} ' + DATA,
+            ):
+            self.assertEqual(literal.split(text), None, text)
+
+    def test_after_statements(self):
+        for prefix in ('x = 1;', 'function f() {}\n', 'if (x) {}\n'):
+            pieces = literal.split(prefix + DATA)
+            self.assertEqual(
+                [is_literal for _, is_literal in pieces], [False, True])
+
+
+class MinifyTestCase(unittest.TestCase):
+
+    def test_same_as_parser(self):
+        text = CODE + DATA + CODE
+        self.assertEqual(minify(text), _parse(text))
+
+    def test_mangle(self):
+        # names declared in the other pieces are not shadowed
+        text = 'function f(x) { return x + a; }\nvar a = [1, 2];'
+        self.assertEqual(minify(text, mangle=True),
+                         'function f(b){return b+a;}var a=[1,2];')
+
+    def test_syntax_error(self):
+        # the error is reported by the parser of the whole text
+        self.assertRaises(SyntaxError, minify, DATA + 'x = )')
+
+    def test_stats(self):
+        stats = StatsCollector()
+        minify(DATA, stats=stats)
+        counters = stats.as_dict()['counters']
+        self.assertEqual(counters['literal_size'], len(_parse(DATA)))
+        self.assertTrue('parse' not in stats.as_dict()['timings'])
+
+    def test_stats_of_parsed_code(self):
+        stats = StatsCollector()
+        minify(CODE, mangle=True, stats=stats)
+        expected = stats.as_dict()['counters']
+        stats = StatsCollector()
+        minify(CODE + DATA, mangle=True, stats=stats)
+        counters = stats.as_dict()['counters']
+        # f, first, second and local, DATA is declared by the literal
+        self.assertEqual(counters['symbols'], 4)
+        self.assertEqual(counters['literal_statements'], 1)
+        for name in ('tokens', 'nodes', 'scopes', 'symbols'):
+            self.assertEqual(counters[name], expected[name], name)
+
+    def test_compress(self):
+        # compressor needs the whole program
+        stats = StatsCollector()
+        minify(DATA, compress=True, stats=stats)
+        self.assertTrue('literal_size' not in stats.as_dict()['counters'])
+
+
+def test_suite():
+    return unittest.TestSuite((
+        unittest.makeSuite(ScanTestCase),
+        unittest.makeSuite(SplitTestCase),
+        unittest.makeSuite(MinifyTestCase),
+        doctest.DocFileSuite(
+            '../literal.py',
+            optionflags=doctest.NORMALIZE_WHITESPACE|doctest.ELLIPSIS
+            ),
+        ))
@@ -157,3 +157,47 @@ class ManglerTestCase(unittest.TestCase):
          }
          """),
         ]
+
+
+class ScopeAnalysisTestCase(unittest.TestCase):
+
+    TEXT = """
+    var global = 1;
+    function foo(arg) {
+      try { arg(global); } catch (err) { return err.message; }
+      var local = function bar() { return local + foo; };
+    }
+    """
+
+    def test_identifiers_collected_once_in_tree_order(self):
+        from slimit.scope import SymbolTable
+        from slimit.visitors.scopevisitor import ScopeTreeVisitor
+        tree = Parser().parse(self.TEXT)
+        visitor = ScopeTreeVisitor(SymbolTable())
+        visitor.visit(tree)
+        # property names like 'message' are not mangling candidates
+        self.assertEqual(
+            [node.value for node in visitor.identifiers],
+            ['global', 'foo', 'arg', 'arg', 'global', 'err', 'err',
+             'local', 'bar', 'local', 'foo'])
+        self.assertEqual(
+            len(set(map(id, visitor.identifiers))),
+            len(visitor.identifiers))
+
+    def test_same_result_as_tree_walking_visitors(self):
+        from slimit.scope import SymbolTable
+        from slimit.visitors.scopevisitor import (
+            ScopeTreeVisitor, NameManglerVisitor,
+            fill_scope_references, mangle_scope_tree,
+            )
+        for toplevel in (False, True):
+            expected = Parser().parse(self.TEXT)
+            sym_table = SymbolTable()
+            ScopeTreeVisitor(sym_table).visit(expected)
+            fill_scope_references(expected)
+            mangle_scope_tree(sym_table.globals, toplevel)
+            NameManglerVisitor().visit(expected)
+
+            tree = Parser().parse(self.TEXT)
+            mangle(tree, toplevel=toplevel)
+            self.assertEqual(tree.to_ecma(), expected.to_ecma())
@@ -0,0 +1,115 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+import doctest
+import unittest
+
+from slimit import ast
+from slimit.nodepath import ParentIndex
+from slimit.parser import Parser
+
+
+class NodePathTestCase(unittest.TestCase):
+
+    TEXT = """
+    function foo(a) {
+      a();
+      return [a, 1];
+    }
+    """
+
+    def setUp(self):
+        self.tree = Parser().parse(self.TEXT)
+        self.index = ParentIndex(self.tree)
+        self.func = self.tree.children()[0]
+        self.call, self.ret = self.func.elements
+
+    def test_parent(self):
+        array = self.ret.expr
+        self.assertTrue(self.index.parent(array) is self.ret)
+        self.assertTrue(self.index.parent(array.items[1]) is array)
+        self.assertTrue(self.index.parent(self.func) is self.tree)
+        self.assertTrue(self.index.parent(self.tree) is None)
+        self.assertTrue(self.index.parent(ast.Identifier('a')) is None)
+
+    def test_path(self):
+        path = self.index.path(self.ret)
+        self.assertEqual((path.attr, path.position), ('elements', 1))
+        self.assertTrue(path.parent is self.func)
+        path = self.index.path(self.ret.expr)
+        self.assertEqual((path.attr, path.position), ('expr', None))
+        self.assertTrue(path.parent_path.node is self.ret)
+
+    def test_replace(self):
+        path = self.index.path(self.call.expr)
+        new = ast.UnaryOp('!', self.call.expr)
+        path.replace(new)
+        self.assertTrue(self.call.expr is new)
+        self.assertTrue(path.node is new)
+        self.assertTrue(self.index.parent(new) is self.call)
+        self.assertTrue(self.index.parent(new.value) is new)
+
+    def test_remove(self):
+        self.index.path(self.call).remove()
+        self.assertEqual(self.func.elements, [self.ret])
+        self.assertTrue(self.index.path(self.call) is None)
+        self.assertEqual(self.index.path(self.ret).position, 0)
+
+    def test_insert_before_and_after(self):
+        path = self.index.path(self.ret)
+        first = ast.ExprStatement(ast.Identifier('first'))
+        last = ast.ExprStatement(ast.Identifier('last'))
+        path.insert_before(first)
+        path.insert_after(last)
+        self.assertEqual(
+            self.func.elements, [self.call, first, self.ret, last])
+        for position, node in enumerate(self.func.elements):
+            self.assertEqual(self.index.path(node).position, position)
+        self.assertEqual(path.position, 2)
+        self.assertTrue(self.index.parent(first.expr) is first)
+
+    def test_single_attribute(self):
+        path = self.index.path(self.ret.expr)
+        self.assertRaises(ValueError, path.insert_before, ast.Number('1'))
+        self.assertRaises(ValueError, path.remove)
+
+    def test_changes_outside_of_node_path(self):
+        array = self.ret.expr
+        self.assertTrue(self.index.parent(array) is self.ret)
+        self.func.elements.reverse()
+        self.ret.expr = ast.Number('0')
+        self.assertTrue(self.index.parent(array) is None)
+        self.assertEqual(self.index.path(self.ret).position, 0)
+
+
+def test_suite():
+    return unittest.TestSuite((
+        unittest.makeSuite(NodePathTestCase),
+        doctest.DocFileSuite(
+            '../nodepath.py',
+            optionflags=doctest.NORMALIZE_WHITESPACE|doctest.ELLIPSIS
+            ),
+        ))
@@ -27,6 +27,11 @@ __author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
 import textwrap
 import unittest
 
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
 from slimit import ast
 from slimit.parser import Parser
 from slimit.visitors import nodevisitor
@@ -115,6 +120,104 @@ class ParserTestCase(unittest.TestCase):
         parser = Parser()
         self.assertRaises(SyntaxError, parser.parse, text)
 
+    def test_reused_parser_forgets_previous_errors(self):
+        # the semicolon before '}' is inserted in every parse
+        parser = Parser()
+        for _ in range(3):
+            self.assertEqual(
+                parser.parse('if (a) {b}').to_ecma(), 'if (a) {\n  b;\n}')
+
+    def test_reused_parser_after_syntax_error(self):
+        parser = Parser()
+        self.assertRaises(SyntaxError, parser.parse, 'f(a b)')
+        self.assertEqual(parser.parse('/re/.test(s);').to_ecma(),
+                         '/re/.test(s);')
+        errors = []
+        parser.parse('f(a b)', errors=errors)
+        self.assertEqual((errors[0].lineno, errors[0].offset), (1, 5))
+        with self.assertRaises(SyntaxError) as context:
+            parser.parse('\nf(a b)')
+        self.assertTrue(' at 2:5 ' in str(context.exception))
+
+    @unittest.skipIf(tracemalloc is None, 'requires tracemalloc')
+    def test_reused_parser_memory_is_flat(self):
+        parser = Parser()
+
+        def parse_many(count):
+            for _ in range(count):
+                parser.parse('a\nb\nif (c) {d}')
+
+        parse_many(100)
+        tracemalloc.start()
+        try:
+            parse_many(100)
+            before = tracemalloc.get_traced_memory()[0]
+            parse_many(2000)
+            after = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        self.assertTrue(after - before < 4096, after - before)
+
+
+class ErrorRecoveryTestCase(unittest.TestCase):
+
+    def parse(self, text):
+        errors = []
+        tree = Parser().parse(text, errors=errors)
+        return tree, [(e.lineno, e.offset, e.msg) for e in errors]
+
+    def test_no_errors(self):
+        tree, errors = self.parse('a = 1;\nb();')
+        self.assertEqual(errors, [])
+        self.assertEqual(tree.to_ecma(), 'a = 1;\nb();')
+
+    def test_all_errors_are_reported(self):
+        text = textwrap.dedent("""\
+        a();
+        var = 1;
+        b();
+        if (c { d(); }
+        e();
+        """)
+        tree, errors = self.parse(text)
+        self.assertEqual(errors, [
+            (2, 5, "Unexpected token (EQ, '=')"),
+            (4, 7, "Unexpected token (LBRACE, '{')"),
+            (4, 14, "Unexpected token (SEMI, ';')"),
+            ])
+        statements = tree.to_ecma().splitlines()
+        self.assertEqual(statements[0], 'a();')
+        self.assertTrue('b();' in statements)
+        self.assertEqual(statements[-1], 'e();')
+
+    def test_error_in_function_body(self):
+        tree, errors = self.parse('function f() { var = 1 }\ng();')
+        self.assertEqual(errors, [(1, 20, "Unexpected token (EQ, '=')")])
+        self.assertEqual(tree.to_ecma().splitlines()[-1], 'g();')
+
+    def test_unexpected_end_of_input(self):
+        tree, errors = self.parse('a();\nfunction f() {')
+        self.assertEqual(errors, [(2, 15, 'Unexpected end of input')])
+        self.assertEqual(tree.to_ecma(), 'a();')
+
+    def test_illegal_character(self):
+        tree, errors = self.parse('a();\nb = @;\nc = ;\n')
+        # the missing right side of the assignment is not reported again
+        self.assertEqual(errors, [
+            (2, 5, "Illegal character '@'"),
+            (3, 5, "Unexpected token (SEMI, ';')"),
+            ])
+
+    def test_error_text(self):
+        errors = []
+        Parser().parse('a();\nb c;\n', errors=errors)
+        self.assertEqual(errors[0].text, 'b c;')
+
+    def test_parser_raises_after_recovering(self):
+        parser = Parser()
+        parser.parse('var = 1;', errors=[])
+        self.assertRaises(SyntaxError, parser.parse, 'var = 1;')
+
 
 @decorator
 class ASITestCase(unittest.TestCase):
@@ -0,0 +1,125 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+import unittest
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    # Python 3
+    from io import StringIO
+
+from slimit import minify
+from slimit.parser import Parser
+from slimit.profiler import VisitorProfiler
+from slimit.visitors.minvisitor import ECMAMinifier
+from slimit.visitors.nodevisitor import ASTVisitor
+
+
+class FakeTimer(object):
+    """Every call advances the clock by one second."""
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        self.now += 1
+        return self.now
+
+
+class VisitorProfilerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = Parser().parse('a + b;')
+
+    def test_counts_and_times(self):
+        profiler = VisitorProfiler(timer=FakeTimer())
+        with profiler:
+            ECMAMinifier().visit(self.tree)
+        self.assertEqual(profiler.calls, {
+            'ECMAMinifier.visit_Program': 1,
+            'ECMAMinifier.visit_ExprStatement': 1,
+            'ECMAMinifier.visit_BinOp': 1,
+            'ECMAMinifier.visit_Identifier': 2,
+            })
+        # two identifiers: 1 second each
+        self.assertEqual(profiler.cumtime['ECMAMinifier.visit_Identifier'], 2)
+        # enter, 2 x 2 calls for identifiers, exit
+        self.assertEqual(profiler.cumtime['ECMAMinifier.visit_BinOp'], 5)
+        self.assertEqual(profiler.tottime['ECMAMinifier.visit_BinOp'], 3)
+        self.assertEqual(profiler.cumtime['ECMAMinifier.visit_Program'], 9)
+        self.assertEqual(profiler.tottime['ECMAMinifier.visit_Program'], 2)
+
+    def test_recursive_calls_counted_once(self):
+        profiler = VisitorProfiler(timer=FakeTimer())
+        with profiler:
+            ECMAMinifier().visit(Parser().parse('a + b + c;'))
+        self.assertEqual(profiler.calls['ECMAMinifier.visit_BinOp'], 2)
+        self.assertEqual(
+            profiler.cumtime['ECMAMinifier.visit_BinOp'],
+            sum(value for path, value in profiler.stacks.items()
+                if 'ECMAMinifier.visit_BinOp' in path))
+
+    def test_subclasses_and_generic_visit(self):
+        class CountingVisitor(ASTVisitor):
+            pass
+
+        with VisitorProfiler() as profiler:
+            CountingVisitor().visit(self.tree)
+        self.assertEqual(profiler.calls['CountingVisitor.visit_Identifier'], 2)
+
+    def test_uninstall(self):
+        visit = ASTVisitor.__dict__['visit']
+        with VisitorProfiler() as profiler:
+            self.assertFalse(ASTVisitor.__dict__['visit'] is visit)
+        self.assertTrue(ASTVisitor.__dict__['visit'] is visit)
+        minify('a + b;')
+        self.assertEqual(profiler.calls, {})
+
+    def test_collapsed_stacks(self):
+        profiler = VisitorProfiler(timer=FakeTimer())
+        with profiler:
+            ECMAMinifier().visit(self.tree)
+        fp = StringIO()
+        profiler.write_collapsed(fp)
+        self.assertEqual(fp.getvalue().splitlines(), [
+            'ECMAMinifier.visit_Program 2000000',
+            'ECMAMinifier.visit_Program;ECMAMinifier.visit_ExprStatement '
+            '2000000',
+            'ECMAMinifier.visit_Program;ECMAMinifier.visit_ExprStatement;'
+            'ECMAMinifier.visit_BinOp 3000000',
+            'ECMAMinifier.visit_Program;ECMAMinifier.visit_ExprStatement;'
+            'ECMAMinifier.visit_BinOp;ECMAMinifier.visit_Identifier 2000000',
+            ])
+
+    def test_format_table(self):
+        profiler = VisitorProfiler(timer=FakeTimer())
+        with profiler:
+            ECMAMinifier().visit(self.tree)
+        lines = profiler.format_table(limit=2).splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].endswith('ECMAMinifier.visit_Program'))
+        self.assertTrue(lines[2].endswith('ECMAMinifier.visit_ExprStatement'))
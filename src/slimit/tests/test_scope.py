@@ -0,0 +1,131 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+import unittest
+
+from slimit.parser import Parser
+from slimit.scope import SymbolTable
+from slimit.visitors.scopevisitor import (
+    ScopeTreeVisitor,
+    fill_scope_references,
+    )
+
+
+class SymbolReferencesTestCase(unittest.TestCase):
+
+    TEXT = """
+    function foo(arg) {
+      var unused = 1, counter = 0;
+      function inc() { counter += arg; return counter; }
+      return inc;
+    }
+    foo.bar = undeclared;
+    """
+
+    def setUp(self):
+        self.tree = Parser().parse(self.TEXT)
+        self.sym_table = SymbolTable()
+        visitor = ScopeTreeVisitor(self.sym_table)
+        visitor.visit(self.tree)
+        fill_scope_references(self.tree, visitor.identifiers)
+        self.globals = self.sym_table.globals
+        self.foo = self.globals.symbols['foo']
+
+    def test_references(self):
+        counter = self.foo.symbols['counter']
+        self.assertEqual(len(counter.references), 3)
+        for node in counter.references:
+            self.assertEqual(node.value, 'counter')
+            self.assertTrue(node.symbol is counter)
+        # declaration and 'foo.bar', not the 'bar' property
+        self.assertEqual(len(self.foo.references), 2)
+        self.assertEqual(len(self.foo.symbols['arg'].references), 2)
+
+    def test_is_referenced(self):
+        self.assertTrue(self.foo.is_referenced())
+        self.assertTrue(self.foo.symbols['inc'].is_referenced())
+        # declared, but never used in an expression
+        unused = self.foo.symbols['unused']
+        self.assertEqual(len(unused.references), 1)
+        self.assertFalse(unused.is_referenced())
+
+    def test_undeclared_names(self):
+        self.assertFalse('undeclared' in self.globals.symbols)
+
+    def test_rename(self):
+        self.foo.symbols['counter'].rename('c')
+        self.foo.rename('f')
+        self.assertEqual(self.tree.to_ecma(), '\n'.join([
+            'function f(arg) {',
+            '  var unused = 1, c = 0;',
+            '  function inc() {',
+            '    c += arg;',
+            '    return c;',
+            '  }',
+            '  return inc;',
+            '}',
+            'f.bar = undeclared;',
+            ]))
+
+
+class ResolveTestCase(unittest.TestCase):
+
+    def test_resolve_is_invalidated_by_define(self):
+        from slimit.scope import GlobalScope, LocalScope, VarSymbol
+        globals_ = GlobalScope()
+        outer = LocalScope(globals_)
+        inner = LocalScope(outer)
+        self.assertTrue(inner.resolve('name') is None)
+
+        symbol = VarSymbol('name')
+        globals_.define(symbol)
+        self.assertTrue(inner.resolve('name') is symbol)
+        self.assertTrue(outer.resolve('name') is symbol)
+
+        shadowing = VarSymbol('name')
+        outer.define(shadowing)
+        self.assertTrue(inner.resolve('name') is shadowing)
+        self.assertTrue(globals_.resolve('name') is symbol)
+
+    def test_deep_nesting(self):
+        depth = 30
+        text = ''.join(
+            'function f%d(a%d) { a0 + a%d;' % (level, level, level)
+            for level in range(depth)) + '}' * depth
+        tree = Parser().parse(text)
+        sym_table = SymbolTable()
+        visitor = ScopeTreeVisitor(sym_table)
+        visitor.visit(tree)
+        fill_scope_references(tree, visitor.identifiers)
+        scope = sym_table.globals
+        for level in range(depth):
+            scope = scope.symbols['f%d' % level]
+            for name in ('a0', 'a%d' % level):
+                self.assertTrue(scope.refs[name] is
+                                scope.resolve(name).scope)
+        a0 = sym_table.globals.symbols['f0'].symbols['a0']
+        # parameter, one reference per level and 'a0 + a0' in f0
+        self.assertEqual(len(a0.references), depth + 2)
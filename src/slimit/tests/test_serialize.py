@@ -0,0 +1,161 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+import doctest
+import pickle
+import unittest
+
+from slimit import ast
+from slimit.parser import Parser
+from slimit.serialize import dumps, loads
+from slimit.structhash import walk
+from slimit.visitors.minvisitor import ECMAMinifier
+
+# uses every node class
+SOURCE = u"""
+var a = [1, , 'x\\u2028', /re[g]+/gi, null, true], b;
+var o = {
+  get x() { return this.y; },
+  set x(v) { this.y = -v; },
+  "z": new Date(1, 2).getTime()
+};
+function f(x, y) {
+  label: for (var i = 0; i < 10; i++) {
+    if (x) { continue label; } else break;
+  }
+  for (var k in o) while (k) k--;
+  do ; while (y = x ? (1, 2) : o[x]);
+  switch (x) { case 1: return; default: throw x; }
+  try { with (o) debugger; } catch (e) { x = e; } finally { y += 1; }
+  return typeof x == "été";
+}
+(function() {})();
+"""
+
+
+class SerializeTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = Parser().parse(SOURCE)
+
+    def test_all_node_classes(self):
+        classes = set(
+            cls for cls in vars(ast).values()
+            if isinstance(cls, type) and issubclass(cls, ast.Node)
+            )
+        classes -= set([ast.Node, ast.FuncBase])
+        self.assertEqual(
+            set(node.__class__ for node in walk(self.tree)), classes)
+
+    def test_round_trip(self):
+        data = dumps(self.tree)
+        tree = loads(data)
+        self.assertEqual(tree, self.tree)
+        self.assertEqual(tree.to_ecma(), self.tree.to_ecma())
+        self.assertEqual(
+            ECMAMinifier().visit(tree), ECMAMinifier().visit(self.tree))
+
+    def test_size(self):
+        # class and attribute names are stored once, in a tree as small
+        # as SOURCE they take most of the space
+        tree = Parser().parse(SOURCE * 5)
+        self.assertTrue(len(dumps(tree)) < len(pickle.dumps(tree, -1)) // 2)
+
+    def test_attributes(self):
+        tree = loads(dumps(self.tree))
+        for old, new in zip(walk(self.tree), walk(tree)):
+            expected = dict(vars(old))
+            expected.pop('lexpos', None)
+            expected.pop('lineno', None)
+            self.assertEqual(vars(new).keys(), expected.keys())
+        tree = loads(dumps(self.tree, positions=True))
+        for old, new in zip(walk(self.tree), walk(tree)):
+            self.assertEqual(
+                getattr(new, 'lexpos', None), getattr(old, 'lexpos', None))
+            self.assertEqual(
+                getattr(new, 'lineno', None), getattr(old, 'lineno', None))
+
+    def test_annotations_are_not_stored(self):
+        from slimit.mangler import mangle
+        mangle(self.tree)
+        tree = loads(dumps(self.tree))
+        for node in walk(tree):
+            self.assertFalse(hasattr(node, 'scope'))
+            self.assertFalse(hasattr(node, 'symbol'))
+
+    def test_integers(self):
+        tree = ast.Identifier(u'x')
+        tree.values = [0, -1, 127, 128, -300, 2 ** 40]
+        self.assertEqual(loads(dumps(tree)).values, tree.values)
+
+    def test_integer_attributes(self):
+        for values in ([0, 255, 256, 2 ** 32 - 1], [0, -1, 2 ** 40]):
+            tree = ast.Program([ast.Identifier(u'x') for _ in values])
+            for node, value in zip(tree.children(), values):
+                node.number = value
+            tree = loads(dumps(tree))
+            self.assertEqual(
+                [node.number for node in tree.children()], values)
+
+    def test_unsupported_value(self):
+        tree = ast.Number(u'1')
+        tree.value = 1.5
+        self.assertRaises(TypeError, dumps, tree)
+        tree.value = [ast.Number(u'1'), u'1']
+        self.assertRaises(TypeError, dumps, tree)
+
+    def test_invalid_data(self):
+        data = dumps(self.tree)
+        self.assertRaises(ValueError, loads, b'garbage')
+        self.assertRaises(ValueError, loads, b'SLAST')
+        self.assertRaises(ValueError, loads, data[:5] + b'\xff' + data[6:])
+        self.assertRaises(ValueError, loads, data[:len(data) // 2])
+        self.assertRaises(
+            ValueError, loads, data.replace(b'Program', b'Foobars'))
+
+    def test_unknown_node_class(self):
+        class Foobar(ast.Node):
+            pass
+        self.assertRaises(ValueError, loads, dumps(Foobar()))
+
+    def test_ast_functions(self):
+        self.assertEqual(ast.loads(ast.dumps(self.tree)), self.tree)
+
+    def test_deep_tree(self):
+        # too deep for the recursive visitors
+        tree = Parser().parse('a' + ' + a' * 5000 + ';')
+        data = dumps(tree)
+        self.assertEqual(dumps(loads(data)), data)
+
+
+def test_suite():
+    return unittest.TestSuite((
+        unittest.makeSuite(SerializeTestCase),
+        doctest.DocFileSuite(
+            '../serialize.py',
+            optionflags=doctest.NORMALIZE_WHITESPACE|doctest.ELLIPSIS
+            ),
+        ))
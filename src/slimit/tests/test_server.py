@@ -0,0 +1,236 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+import os
+import shutil
+import socket
+import stat
+import tempfile
+import threading
+import unittest
+try:
+    from StringIO import StringIO
+except ImportError:
+    # Python 3
+    from io import StringIO
+
+from slimit import server
+from slimit.minifier import main, minify
+
+TEXT = 'function foo(bar) { return bar + 1; }'
+
+
+class ResultCacheTestCase(unittest.TestCase):
+
+    def test_lru(self):
+        cache = server.ResultCache(max_size=6)
+        cache.put('a', 'aa')
+        cache.put('b', 'bb')
+        self.assertEqual(cache.get('a'), 'aa')
+        cache.put('c', 'cc')
+        cache.put('d', 'dd')
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('a'), 'aa')
+        self.assertEqual(cache.size, 6)
+        # bigger than the whole cache
+        cache.put('e', 'e' * 7)
+        self.assertEqual(cache.get('e'), None)
+
+    def test_key(self):
+        key = server.ResultCache.key
+        self.assertEqual(key('a', {'mangle': True, 'stats': True}),
+                         key('a', {'mangle': True}))
+        self.assertNotEqual(key('a', {'mangle': True}), key('a', {}))
+
+
+class MinifyServerTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        cls.path = os.path.join(cls.directory, 'slimit.sock')
+        cls.server = server.MinifyServer(cls.path, workers=1)
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.daemon = True
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.thread.join()
+        shutil.rmtree(cls.directory)
+
+    def test_minify(self):
+        response = server.request(TEXT, {'mangle': True}, self.path)
+        self.assertEqual(response['output'], minify(TEXT, mangle=True))
+        response = server.request(TEXT, {'mangle': True}, self.path)
+        self.assertEqual(response['output'], minify(TEXT, mangle=True))
+        self.assertTrue(response['diagnostics']['cached'])
+
+    def test_stats(self):
+        text = 'var stats = 1;'
+        response = server.request(
+            text, {'stats': True, 'size_metric': 'raw'}, self.path)
+        stats = response['diagnostics']['stats']
+        self.assertEqual(stats['counters']['output_size'], len(minify(text)))
+
+    def test_errors(self):
+        response = server.request('var 1;', {}, self.path)
+        self.assertTrue(response['error'].startswith('SyntaxError: '))
+        response = server.request(TEXT, {'foo': True}, self.path)
+        self.assertEqual(response['error'], 'ValueError: Unknown options: foo')
+
+    def test_valid_text_after_syntax_error(self):
+        # the only worker reuses its parser
+        response = server.request('f(a b)', {}, self.path)
+        self.assertTrue(response['error'].startswith('SyntaxError: '))
+        response = server.request('/re/.test(s);', {}, self.path)
+        self.assertEqual(response['output'], '/re/.test(s);')
+
+    def test_connection_reuse(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.path)
+            for text in ('var a = 1;', 'var b = 2;'):
+                server.send_frame(sock, {'source': text})
+                self.assertEqual(
+                    server.recv_frame(sock)['output'], minify(text))
+        finally:
+            sock.close()
+
+    def test_socket_is_private(self):
+        mode = stat.S_IMODE(os.stat(self.path).st_mode)
+        self.assertEqual(mode, 0o600)
+
+    @unittest.skipIf(not hasattr(os, 'getuid'), 'requires os.getuid')
+    def test_socket_of_another_user(self):
+        getuid = os.getuid
+        os.getuid = lambda: getuid() + 1
+        try:
+            self.assertRaises(ValueError, server.request, TEXT, {}, self.path)
+        finally:
+            os.getuid = getuid
+
+    def test_already_running(self):
+        self.assertRaises(
+            RuntimeError, server.MinifyServer, self.path, workers=1)
+
+    def test_client(self):
+        fd, name = tempfile.mkstemp(suffix='.js')
+        try:
+            with os.fdopen(fd, 'w') as fout:
+                fout.write(TEXT)
+            out, err = StringIO(), StringIO()
+            status = main(['--client', '--socket', self.path, '-m', name],
+                          out=out, err=err)
+        finally:
+            os.remove(name)
+        self.assertEqual(status, 0)
+        self.assertEqual(out.getvalue(), minify(TEXT, mangle=True))
+
+        out, err = StringIO(), StringIO()
+        status = main(['--client', '--socket', self.path],
+                      inp=StringIO('var 1;'), out=out, err=err)
+        self.assertEqual(status, 1)
+        self.assertTrue(err.getvalue().startswith('<stdin>: SyntaxError'))
+
+
+class DefaultSocketPathTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.environ = os.environ.copy()
+        self.tempdir = tempfile.tempdir
+        tempfile.tempdir = self.directory = tempfile.mkdtemp()
+        for name in ('SLIMIT_SOCKET', 'XDG_RUNTIME_DIR'):
+            os.environ.pop(name, None)
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self.environ)
+        tempfile.tempdir = self.tempdir
+        shutil.rmtree(self.directory)
+
+    def test_environment(self):
+        os.environ['SLIMIT_SOCKET'] = '/run/slimit.sock'
+        self.assertEqual(server.default_socket_path(), '/run/slimit.sock')
+
+    def test_private_directory(self):
+        path = server.default_socket_path()
+        directory = os.path.dirname(path)
+        self.assertEqual(os.path.dirname(directory), self.directory)
+        daemon = server.MinifyServer(workers=1)
+        try:
+            self.assertEqual(daemon.path, path)
+            mode = stat.S_IMODE(os.stat(directory).st_mode)
+            self.assertEqual(mode, 0o700)
+        finally:
+            daemon.server_close()
+
+    def test_directory_accessible_to_others(self):
+        directory = os.path.dirname(server.default_socket_path())
+        os.mkdir(directory)
+        os.chmod(directory, 0o755)
+        self.assertRaises(RuntimeError, server.MinifyServer, workers=1)
+
+
+class StaleSocketTestCase(unittest.TestCase):
+
+    def test_stale_socket_is_removed(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'slimit.sock')
+        try:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.bind(path)
+            sock.close()
+            daemon = server.MinifyServer(path, workers=1)
+            daemon.server_close()
+            self.assertFalse(os.path.exists(path))
+            # nobody listens anymore
+            out, err = StringIO(), StringIO()
+            status = main(['--client', '--socket', path],
+                          inp=StringIO(TEXT), out=out, err=err)
+            self.assertEqual(status, 1)
+            self.assertTrue(err.getvalue().startswith(
+                'Can not use slimit daemon on %s' % path))
+        finally:
+            shutil.rmtree(directory)
+
+    def test_other_files_are_kept(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'some.js')
+        try:
+            with open(path, 'w') as fout:
+                fout.write(TEXT)
+            err = StringIO()
+            status = main(['--serve', '--socket', path], err=err)
+            self.assertEqual(status, 1)
+            self.assertEqual(
+                err.getvalue(), '%s exists and is not a socket\n' % path)
+            with open(path) as fin:
+                self.assertEqual(fin.read(), TEXT)
+        finally:
+            shutil.rmtree(directory)
@@ -0,0 +1,101 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+import gzip
+import io
+import unittest
+
+from slimit import size
+from slimit.compressor import compress
+from slimit.parser import Parser
+from slimit.visitors.minvisitor import ECMAMinifier
+
+
+class SizeTestCase(unittest.TestCase):
+
+    def test_raw_size_is_in_bytes(self):
+        self.assertEqual(size.raw_size(u'var a="é";'), 11)
+
+    def test_gzip_size(self):
+        text = 'var a=1;' * 100
+        buf = io.BytesIO()
+        with gzip.GzipFile(fileobj=buf, mode='wb', mtime=0) as fout:
+            fout.write(text.encode('utf-8'))
+        # the gzip module stores a file name in the header
+        self.assertTrue(0 < size.gzip_size(text) <= len(buf.getvalue()))
+        self.assertTrue(size.gzip_size(text) < size.raw_size(text))
+
+    def test_sizes(self):
+        result = size.sizes('var a=1;')
+        self.assertEqual(result['raw'], 8)
+        self.assertTrue('gzip' in result)
+
+    def test_oracle(self):
+        oracle = size.SizeOracle('raw')
+        self.assertEqual(oracle.measure('var a=1;'), 8)
+        self.assertTrue(oracle.smaller('var a=1,b=2;', 'var a=1;var b=2;'))
+        self.assertFalse(oracle.smaller('var a=1;', 'var a=1;'))
+
+    def test_oracle_unknown_metric(self):
+        self.assertRaises(ValueError, size.SizeOracle, 'lzma')
+
+    def test_oracle_unavailable_metric(self):
+        old, size.brotli = size.brotli, None
+        try:
+            self.assertRaises(ValueError, size.SizeOracle, 'brotli')
+        finally:
+            size.brotli = old
+
+    def test_oracle_cache_is_bounded(self):
+        oracle = size.SizeOracle('raw')
+        for index in range(oracle.cache_size * 3):
+            oracle.measure('var a=%d;' % index)
+        self.assertTrue(len(oracle._cache) <= oracle.cache_size)
+
+
+class GuardedCompressTestCase(unittest.TestCase):
+
+    def _compress(self, text, oracle):
+        tree = Parser().parse(text)
+        compress(tree, hoist_vars=True, unused=False, sequences=False,
+                 oracle=oracle)
+        return ECMAMinifier().visit(tree)
+
+    def test_transformation_is_kept(self):
+        text = 'function f() { var a = 1; g(); var b; var c; h(a, b, c); }'
+        self.assertEqual(
+            self._compress(text, size.SizeOracle('raw')),
+            'function f(){var a=1,b,c;g();h(a,b,c);}')
+
+    def test_transformation_is_undone(self):
+        # hoisting adds 'var a;' and saves nothing
+        text = 'function f() { g(); var a = 1; h(a); }'
+        self.assertEqual(
+            self._compress(text, None),
+            'function f(){var a;g();a=1;h(a);}')
+        self.assertEqual(
+            self._compress(text, size.SizeOracle('raw')),
+            'function f(){g();var a=1;h(a);}')
@@ -0,0 +1,101 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+import json
+import unittest
+
+from slimit import minify
+from slimit.parser import Parser
+from slimit.stats import CountingLexer, StatsCollector
+
+
+class StatsCollectorTestCase(unittest.TestCase):
+
+    def test_timer_accumulates(self):
+        stats = StatsCollector()
+        with stats.timer('phase'):
+            pass
+        first = stats.timings['phase']
+        with stats.timer('phase'):
+            pass
+        self.assertTrue(stats.timings['phase'] >= first)
+
+    def test_timer_records_time_on_exception(self):
+        stats = StatsCollector()
+
+        def fail():
+            with stats.timer('phase'):
+                raise ValueError
+
+        self.assertRaises(ValueError, fail)
+        self.assertTrue('phase' in stats.timings)
+
+    def test_incr(self):
+        stats = StatsCollector()
+        stats.incr('nodes')
+        stats.incr('nodes', 5)
+        self.assertEqual(stats.counters['nodes'], 6)
+
+    def test_to_json(self):
+        stats = StatsCollector()
+        stats.incr('tokens', 3)
+        self.assertEqual(
+            json.loads(stats.to_json()),
+            {'timings': {}, 'counters': {'tokens': 3}})
+
+    def test_counting_lexer(self):
+        parser = Parser()
+        lexer = CountingLexer(parser.lexer)
+        parser.parse('var a = 1;', lexer=lexer)
+        self.assertEqual(lexer.count, 5)
+
+
+class MinifyStatsTestCase(unittest.TestCase):
+
+    def test_minify_stats(self):
+        stats = StatsCollector()
+        text = 'function foo(a) { var b = a; return b; }'
+        minified = minify(text, mangle=True, compress=True, stats=stats)
+        self.assertEqual(
+            set(stats.timings),
+            set(['total', 'parser_init', 'parse', 'compress',
+                 'mangle.scope_tree', 'mangle.fill_scope_references',
+                 'mangle.mangle_scope_tree', 'mangle.rename', 'minify']))
+        counters = stats.counters
+        self.assertEqual(counters['tokens'], 15)
+        self.assertEqual(counters['nodes'], 10)
+        # global scope and 'foo' function scope
+        self.assertEqual(counters['scopes'], 2)
+        # foo, a, b
+        self.assertEqual(counters['symbols'], 3)
+        self.assertEqual(counters['input_size'], len(text))
+        self.assertEqual(counters['output_size'], len(minified))
+
+    def test_no_mangle_no_scope_counters(self):
+        stats = StatsCollector()
+        minify('var a = 1;', stats=stats)
+        self.assertFalse('scopes' in stats.counters)
+        self.assertFalse('compress' in stats.timings)
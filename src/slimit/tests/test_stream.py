@@ -0,0 +1,111 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+import doctest
+try:
+    from StringIO import StringIO
+except ImportError:
+    # Python 3
+    from io import StringIO
+import unittest
+
+from slimit.minifier import minify, minify_stream
+from slimit.parser import Parser
+
+
+SOURCE = """
+var DATA = [1, 2, {"a": [3, "four"]}];
+function f(first, second) {
+  var result = first + second;
+  return function(x) { return x * result + DATA.length; };
+}
+(function(window) {
+  var local = window.document;
+  if (local) { f(local, 1); }
+})(this);
+for (var i = 0; i < 10; i++) { f(i, i); }
+"""
+
+
+class StreamTestCase(unittest.TestCase):
+
+    def _stream(self, text, **options):
+        out = StringIO()
+        minify_stream(text, out, **options)
+        return out.getvalue()
+
+    def test_same_as_minify(self):
+        self.assertEqual(self._stream(SOURCE), minify(SOURCE))
+        self.assertEqual(
+            self._stream(SOURCE, mangle=True), minify(SOURCE, mangle=True))
+
+    def test_top_level_elements(self):
+        elements = []
+        Parser().parse_stream(SOURCE, elements.append)
+        self.assertEqual(
+            [type(element).__name__ for element in elements],
+            ['VarStatement', 'FuncDecl', 'ExprStatement', 'For'])
+
+    def test_elements_are_passed_while_parsing(self):
+        elements = []
+        parser = Parser()
+        self.assertRaises(
+            SyntaxError, parser.parse_stream, 'a;\nb;\n}\nc;',
+            lambda element: elements.append(element.to_ecma()))
+        self.assertEqual(elements, ['a;', 'b;'])
+        # the parser can be used again
+        self.assertEqual(parser.parse('c;').to_ecma(), 'c;')
+
+    def test_names_declared_by_other_statements(self):
+        # 'a' is declared by the next statement, the parameter
+        # must not shadow it
+        self.assertEqual(
+            self._stream('function f(x) { return x + a; }\nvar a = 1;',
+                         mangle=True),
+            'function f(b){return b+a;}var a=1;')
+
+    def test_main(self):
+        from slimit.minifier import main
+        out = StringIO()
+        main(['--stream', '-m'], inp=StringIO(SOURCE), out=out)
+        self.assertEqual(out.getvalue(), minify(SOURCE, mangle=True))
+
+    def test_main_incompatible_options(self):
+        from slimit.minifier import main
+        err = StringIO()
+        self.assertRaises(
+            SystemExit, main, ['--stream', '-c'], inp=StringIO(SOURCE),
+            out=StringIO(), err=err)
+
+
+def test_suite():
+    return unittest.TestSuite((
+        unittest.makeSuite(StreamTestCase),
+        doctest.DocFileSuite(
+            '../minifier.py',
+            optionflags=doctest.NORMALIZE_WHITESPACE|doctest.ELLIPSIS
+            ),
+        ))
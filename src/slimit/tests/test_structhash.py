@@ -0,0 +1,115 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+import doctest
+import unittest
+
+from slimit import ast
+from slimit.parser import Parser
+from slimit.structhash import StructuralHashes
+
+
+def parse_expr(text):
+    return Parser().parse(text + ';').children()[0].expr
+
+
+class StructuralHashesTestCase(unittest.TestCase):
+
+    def assertStructurallyEqual(self, left, right, expected=True):
+        hashes = StructuralHashes()
+        left, right = parse_expr(left), parse_expr(right)
+        self.assertEqual(hashes.equal(left, right), expected)
+        if expected:
+            self.assertEqual(hashes[left], hashes[right])
+
+    def test_equal(self):
+        self.assertStructurallyEqual('a + b * 2', 'a  +  b*2')
+        self.assertStructurallyEqual(
+            'function (x) { return [x, {y: 1}]; }',
+            'function(x){return [x,{y:1}]}')
+        self.assertStructurallyEqual('new A(b, c)', 'new A(b, c)')
+
+    def test_not_equal(self):
+        self.assertStructurallyEqual('a + b', 'a - b', False)
+        self.assertStructurallyEqual('a + b', 'a + c', False)
+        self.assertStructurallyEqual('a++', '++a', False)
+        self.assertStructurallyEqual('new A(b)', 'new A(b, c)', False)
+        # parameters and function body share the children list
+        self.assertStructurallyEqual(
+            'function(a, b) { c; }', 'function(a) { b; c; }', False)
+        # Node.__eq__ ignores labels
+        self.assertStructurallyEqual(
+            'function() { a: for (;;) { break a; } }',
+            'function() { a: for (;;) { break; } }', False)
+
+    def test_positions_and_annotations_ignored(self):
+        left = parse_expr('a')
+        right = parse_expr('a')
+        right.scope = object()
+        right._parens = True
+        self.assertTrue(StructuralHashes().equal(left, right))
+
+    def test_duplicates(self):
+        tree = Parser().parse("""
+        var x = [1, 2, 3];
+        function f() { return [1, 2, 3]; }
+        function g() { return [1, 2, 3]; }
+        var y = [1, 2];
+        """)
+        hashes = StructuralHashes(tree)
+        arrays = hashes.duplicates(types=ast.Array)
+        self.assertEqual(len(arrays), 1)
+        self.assertEqual(len(arrays[0]), 3)
+        # f and g only differ by name
+        self.assertEqual(hashes.duplicates(types=ast.FuncDecl), [])
+        self.assertEqual(
+            [group[0].to_ecma() for group in
+             hashes.duplicates(types=ast.Return)],
+            ['return [1,2,3];'])
+
+    def test_recompute_after_changes(self):
+        tree = Parser().parse('f(1); f(2);')
+        hashes = StructuralHashes(tree)
+        first, second = [stmt.expr for stmt in tree.children()]
+        self.assertFalse(hashes.equal(first, second))
+        second.args[0] = ast.Number('1')
+        hashes.add(second)
+        self.assertTrue(hashes.equal(first, second))
+
+    def test_deep_tree(self):
+        text = 'a' + ' + a' * 5000
+        hashes = StructuralHashes()
+        self.assertTrue(hashes.equal(parse_expr(text), parse_expr(text)))
+
+
+def test_suite():
+    return unittest.TestSuite((
+        unittest.makeSuite(StructuralHashesTestCase),
+        doctest.DocFileSuite(
+            '../structhash.py',
+            optionflags=doctest.NORMALIZE_WHITESPACE|doctest.ELLIPSIS
+            ),
+        ))
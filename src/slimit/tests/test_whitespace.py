@@ -0,0 +1,123 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+import doctest
+try:
+    from StringIO import StringIO
+except ImportError:
+    # Python 3
+    from io import StringIO
+import unittest
+
+from slimit.parser import Parser
+from slimit.whitespace import minify
+
+
+SOURCE = """
+/* comment */
+var a = 1, b = a + +a - -a, c = a++ + ++b;
+function f(x, y) {
+  // comment
+  if (x) return
+  else if (typeof x === 'string') throw new Error("\\"x\\"");
+  y++
+  for (var i = 0; i < 10; i++) { x = x / 2 / /re/g.exec(y).length; }
+  return x in y ? /x y/i instanceof RegExp : 1 .toString();
+}
+a = b
+c()
+do f(a, b)
+while (a--)
+"""
+
+
+class WhitespaceTestCase(unittest.TestCase):
+
+    def assertMinified(self, source, expected):
+        self.assertEqual(minify(source), expected)
+
+    def test_same_tree(self):
+        parser = Parser()
+        self.assertEqual(parser.parse(minify(SOURCE)), parser.parse(SOURCE))
+
+    def test_spaces(self):
+        self.assertMinified('var  a = typeof b', 'var a=typeof b')
+        self.assertMinified('a + +b - -c + ++d', 'a+ +b- -c+ ++d')
+        self.assertMinified('a / /x/.source', 'a/ /x/.source')
+        self.assertMinified(
+            '/x/ in a, /y/g instanceof b', '/x/ in a,/y/g instanceof b')
+        self.assertMinified('1 .toString() + 1.5 .toFixed()',
+                            '1 .toString()+1.5.toFixed()')
+
+    def test_new_lines(self):
+        # a semicolon is inserted
+        self.assertMinified('a\nb', 'a\nb')
+        self.assertMinified('a\n++b', 'a\n++b')
+        self.assertMinified('return\na', 'return\na')
+        self.assertMinified('return /* */\n(a)', 'return\n(a)')
+        self.assertMinified('a /*\n*/ b', 'a\nb')
+        self.assertMinified('if (a) b\nelse c', 'if(a)b\nelse c')
+        # the statement continues
+        self.assertMinified('a\n(b)\n[c]\n.d\n+ e', 'a(b)[c].d+e')
+        self.assertMinified('a = {\n  b: 1\n}\n', 'a={b:1}')
+        self.assertMinified('a;\nb;\n', 'a;b;')
+
+    def test_keyword_property_names(self):
+        self.assertMinified('o.do\n++i', 'o.do\n++i')
+        self.assertMinified('a.in\nb()', 'a.in\nb()')
+        self.assertMinified('x.new\n.y', 'x.new.y')
+        self.assertMinified('a = o.return / 2 / 3', 'a=o.return/2/3')
+
+    def test_regex_or_division(self):
+        self.assertMinified('a = b\n/c/d', 'a=b/c/d')
+        self.assertMinified('a = (b) / 2 /= 3', 'a=(b)/2/=3')
+        self.assertMinified('a = [/ x /g, "/ y /"]', 'a=[/ x /g,"/ y /"]')
+
+    def test_not_parsed(self):
+        # reserved words the parser rejects
+        self.assertMinified('const a = 1', 'const a=1')
+
+    def test_illegal_character(self):
+        self.assertRaises(SyntaxError, minify, 'a = `b`')
+
+    def test_main(self):
+        from slimit.minifier import main
+        out = StringIO()
+        main(['--whitespace-only'], inp=StringIO(SOURCE), out=out)
+        self.assertEqual(out.getvalue(), minify(SOURCE))
+        self.assertRaises(
+            SystemExit, main, ['--whitespace-only', '-m'],
+            inp=StringIO(SOURCE), out=StringIO(), err=StringIO())
+
+
+def test_suite():
+    return unittest.TestSuite((
+        unittest.makeSuite(WhitespaceTestCase),
+        doctest.DocFileSuite(
+            '../whitespace.py',
+            optionflags=doctest.NORMALIZE_WHITESPACE|doctest.ELLIPSIS
+            ),
+        ))
@@ -0,0 +1,54 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+
+class DispatchTable(dict):
+    """Visitor method cache shared by all visitors.
+
+    Maps (visitor class, node class) to the 'visit_<NodeType>' method
+    of the visitor class, or its generic_visit if there is no such method.
+    Entries are looked up once per pair on first use, so subclass
+    overrides are honored, while instance attributes and methods added
+    to a class after its first visit are not (call clear() then).
+
+    >>> from slimit import ast
+    >>> from slimit.visitors.dispatch import dispatch_table
+    >>> from slimit.visitors.minvisitor import ECMAMinifier
+    >>> method = dispatch_table[ECMAMinifier, ast.Identifier]
+    >>> method(ECMAMinifier(), ast.Identifier('foo'))
+    'foo'
+    """
+
+    def __missing__(self, key):
+        visitor_class, node_class = key
+        method = getattr(
+            visitor_class, 'visit_%s' % node_class.__name__,
+            visitor_class.generic_visit)
+        self[key] = method
+        return method
+
+
+dispatch_table = DispatchTable()
@@ -25,6 +25,7 @@
 __author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
 
 from slimit import ast
+from slimit.visitors.dispatch import dispatch_table
 
 
 class ECMAVisitor(object):
@@ -36,8 +37,7 @@ class ECMAVisitor(object):
         return ' ' * self.indent_level
 
     def visit(self, node):
-        method = 'visit_%s' % node.__class__.__name__
-        return getattr(self, method, self.generic_visit)(node)
+        return dispatch_table[self.__class__, node.__class__](self, node)
 
     def generic_visit(self, node):
         return 'GEN: %r' % node
@@ -27,12 +27,20 @@ __author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
 import re
 
 from slimit import ast
-from slimit.lexer import Lexer
+from slimit.visitors.dispatch import dispatch_table
 
-_HAS_ID_MATCH = re.compile('^%s$' % Lexer.identifier).match
+# The identifier regex is huge because of unicode character classes,
+# it is compiled when a property name is checked for the first time.
+_HAS_ID_MATCH = None
+_KEYWORDS = None
 
 def _is_identifier(value):
-    return _HAS_ID_MATCH(value) and value not in Lexer.keywords_dict
+    global _HAS_ID_MATCH, _KEYWORDS
+    if _HAS_ID_MATCH is None:
+        from slimit.lexer import Lexer
+        _HAS_ID_MATCH = re.compile('^%s$' % Lexer.identifier).match
+        _KEYWORDS = Lexer.keywords_dict
+    return _HAS_ID_MATCH(value) and value not in _KEYWORDS
 
 specials = re.compile(r'[`\\~!@#%\^&*(){}\[\]\-+=/|<>,.:;?]+')
 
@@ -43,8 +51,7 @@ class ECMAMinifier(object):
         self.ifelse_stack = []
 
     def visit(self, node):
-        method = 'visit_%s' % node.__class__.__name__
-        return getattr(self, method, self.generic_visit)(node)
+        return dispatch_table[self.__class__, node.__class__](self, node)
 
     def generic_visit(self, node):
         return 'GEN: %r' % node
@@ -24,6 +24,8 @@
 
 __author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
 
+from slimit.visitors.dispatch import dispatch_table
+
 
 class ASTVisitor(object):
     """Base class for custom AST node visitors.
@@ -60,8 +62,7 @@ class ASTVisitor(object):
     """
 
     def visit(self, node):
-        method = 'visit_%s' % node.__class__.__name__
-        return getattr(self, method, self.generic_visit)(node)
+        return dispatch_table[self.__class__, node.__class__](self, node)
 
     def generic_visit(self, node):
         for child in node:
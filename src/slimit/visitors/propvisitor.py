@@ -0,0 +1,323 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+from slimit import ast
+from slimit.lexer import Lexer
+from slimit.scope import ID_CHARS, powerset
+from slimit.visitors.nodevisitor import ASTVisitor, visit as walk
+
+
+def _is_function(node):
+    return isinstance(node, (ast.FuncBase, ast.GetPropAssign,
+                             ast.SetPropAssign))
+
+
+def _expressions(node):
+    """Walk all nodes of a statement except bodies of nested functions."""
+    for child in node:
+        if isinstance(child, list):
+            for item in child:
+                if item is not None:
+                    yield item
+                    if not _is_function(item):
+                        for subchild in _expressions(item):
+                            yield subchild
+            continue
+        yield child
+        if not _is_function(child):
+            for subchild in _expressions(child):
+                yield subchild
+
+
+# statements whose nested statements might not run
+_COMPOUND = (ast.Block, ast.For, ast.ForIn, ast.While, ast.DoWhile, ast.Try,
+             ast.With, ast.Label)
+
+
+def _unconditional(node):
+    """Walk nodes of a statement that are evaluated whenever it runs."""
+    if isinstance(node, ast.BinOp) and node.op in ('&&', '||'):
+        children = [node.left]
+    elif isinstance(node, (ast.Conditional, ast.If)):
+        children = [node.predicate]
+    elif isinstance(node, ast.Switch):
+        children = [node.expr]
+    elif isinstance(node, _COMPOUND):
+        children = []
+    else:
+        children = node.children()
+    for child in children:
+        items = child if isinstance(child, list) else [child]
+        for item in items:
+            if item is None:
+                continue
+            yield item
+            if not _is_function(item):
+                for subchild in _unconditional(item):
+                    yield subchild
+
+
+def _receiver_key(node):
+    """Return 'X.prop' for X.prop property accessor or None."""
+    if (isinstance(node, ast.DotAccessor) and
+        isinstance(node.node, ast.Identifier) and
+        getattr(node.node, '_in_expression', False)):
+        return '%s.%s' % (node.node.value, node.identifier.value)
+
+
+def _target_keys(node):
+    """Return names and receiver keys a target of assignment changes.
+
+    Any name can refer to the same object as the receiver, so Y.prop
+    changes X.prop for every X and Y[name] can change anything.
+    """
+    if isinstance(node, ast.Identifier):
+        return [node.value]
+    if isinstance(node, ast.DotAccessor):
+        return ['*.%s' % node.identifier.value]
+    if isinstance(node, ast.BracketAccessor):
+        return ['*']
+    return []
+
+
+def _identifier(name):
+    node = ast.Identifier(name)
+    node._mangle_candidate = True
+    node._in_expression = True
+    return node
+
+
+def _replace_nodes(node, replacements):
+    """Replace nodes found in {id(node): new_node} outside of functions."""
+    for attr, value in vars(node).items():
+        if isinstance(value, list):
+            for index, item in enumerate(value):
+                if id(item) in replacements:
+                    value[index] = replacements[id(item)]
+                elif isinstance(item, ast.Node) and not _is_function(item):
+                    _replace_nodes(item, replacements)
+        elif isinstance(value, ast.Node):
+            if id(value) in replacements:
+                setattr(node, attr, replacements[id(value)])
+            elif not _is_function(value):
+                _replace_nodes(value, replacements)
+
+
+class _StatementInfo(object):
+    """Receiver usage of a single statement."""
+
+    def __init__(self, statement):
+        # {key: [DotAccessor, ...]}
+        self.uses = {}
+        # names and keys that get new values in the statement
+        self.clobbered = set()
+        # True if the statement might execute arbitrary code
+        self.barrier = isinstance(statement, ast.With)
+        if _is_function(statement):
+            # function declarations have no effect at run time
+            return
+
+        targets = set()
+        for node in _expressions(statement):
+            if isinstance(node, (ast.FunctionCall, ast.NewExpr, ast.With)):
+                self.barrier = True
+            elif isinstance(node, ast.Assign) and node.op != ':':
+                targets.add(id(node.left))
+                self.clobbered.update(_target_keys(node.left))
+            elif isinstance(node, ast.UnaryOp) and node.op in (
+                '++', '--', 'delete'):
+                targets.add(id(node.value))
+                self.clobbered.update(_target_keys(node.value))
+            elif isinstance(node, ast.ForIn):
+                item = node.item
+                if isinstance(item, ast.VarDecl):
+                    item = item.identifier
+                targets.add(id(item))
+                self.clobbered.update(_target_keys(item))
+            elif isinstance(node, ast.VarDecl):
+                self.clobbered.add(node.identifier.value)
+            elif isinstance(node, ast.Catch):
+                self.clobbered.add(node.identifier.value)
+
+        for node in _expressions(statement):
+            key = _receiver_key(node)
+            if key is not None and id(node) not in targets:
+                self.uses.setdefault(key, []).append(node)
+        # keys used every time the statement runs, an alias can be
+        # declared right before it without evaluating anything new
+        self.always = set()
+        for node in _unconditional(statement):
+            key = _receiver_key(node)
+            if key is not None and id(node) not in targets:
+                self.always.add(key)
+
+    def allows(self, key):
+        """Return True if an alias for key stays valid over the statement."""
+        name, prop = key.split('.', 1)
+        return not (self.barrier or '*' in self.clobbered or
+                    key in self.clobbered or name in self.clobbered or
+                    '*.%s' % prop in self.clobbered)
+
+
+class PropertyAliasVisitor(ASTVisitor):
+    """Introduces local aliases for repeated property receivers.
+
+    function f() {
+      C.prototype.a = function() {};
+      C.prototype.b = function() {};
+    }
+    ==>
+    function f() {
+      var a = C.prototype;
+      a.a = function() {};
+      a.b = function() {};
+    }
+
+    An alias covers a run of consecutive statements of the same statement
+    list where neither the receiver nor the object it's read from is
+    assigned and no function is called, so the alias always has the same
+    value as the original expression. A property of that name assigned
+    on any object or a bracket accessor assignment ends the run, the
+    object can be the same. The run starts with a statement that always
+    evaluates the receiver, so the alias doesn't evaluate an expression
+    the original code might not. Functions with 'with' statements and
+    programs using 'eval' are left intact.
+
+    The 'stats' attribute maps aliased receivers to saved bytes.
+    """
+
+    def __init__(self, toplevel=False):
+        self.toplevel = toplevel
+        self.stats = {}
+        # stack of flags defining if current function can be transformed
+        self._enabled = []
+        self._names = None
+        self._name = None
+
+    def _peek_name(self):
+        if self._name is None:
+            self._name = next(self._names)
+        return self._name
+
+    def visit_Program(self, node):
+        used = set()
+        for child in walk(node):
+            if isinstance(child, ast.Identifier):
+                if child.value == 'eval':
+                    return
+                used.add(child.value)
+        self._names = (
+            name for name in powerset(ID_CHARS)
+            if name not in used and name.upper() not in Lexer.keywords
+            )
+
+        self._enabled.append(self.toplevel and not self._has_with(node))
+        self.generic_visit(node)
+        self._alias(node.children())
+        self._enabled.pop()
+
+    def visit_Block(self, node):
+        self.generic_visit(node)
+        self._alias(node.children())
+
+    def visit_FuncDecl(self, node):
+        self._enabled.append(not self._has_with(node))
+        self.generic_visit(node)
+        self._alias(node.elements)
+        self._enabled.pop()
+
+    visit_FuncExpr = visit_FuncDecl
+    visit_GetPropAssign = visit_FuncDecl
+    visit_SetPropAssign = visit_FuncDecl
+
+    def visit_Case(self, node):
+        self.generic_visit(node)
+        self._alias(node.elements)
+
+    visit_Default = visit_Case
+
+    @staticmethod
+    def _has_with(node):
+        return any(isinstance(child, ast.With) for child in _expressions(node))
+
+    @staticmethod
+    def _windows(infos, key):
+        """Yield (start, uses) for runs of statements where key can be
+        aliased, start is the index of the first statement that always
+        uses key. Conditional uses before it are not aliased.
+        """
+        start, uses = None, []
+        for index, info in enumerate(infos + [None]):
+            if info is not None and info.allows(key):
+                if start is None and key in info.always:
+                    start = index
+                if start is not None and key in info.uses:
+                    uses.extend(info.uses[key])
+                continue
+            if start is not None:
+                yield start, uses
+            start, uses = None, []
+
+    def _alias(self, elements):
+        if self._names is None or not self._enabled[-1]:
+            return
+
+        infos = [_StatementInfo(element) for element in elements]
+        keys = set()
+        for info in infos:
+            keys.update(info.uses)
+
+        # {statement index: [var statement, ...]}
+        inserts = {}
+        # {id(X.prop accessor): alias identifier}
+        replacements = {}
+        for key in sorted(keys):
+            for start, uses in self._windows(infos, key):
+                # 'var a=X.prop;' costs len(key) + len(name) + 6 bytes
+                name = self._peek_name()
+                saved = ((len(uses) - 1) * len(key) -
+                         (len(uses) + 1) * len(name) - 6)
+                if saved <= 0:
+                    continue
+                self._name = None
+                for use in uses:
+                    replacements[id(use)] = _identifier(name)
+                self._declare(inserts, start, name, key)
+                self.stats[key] = self.stats.get(key, 0) + saved
+
+        if replacements:
+            for element in elements:
+                _replace_nodes(element, replacements)
+        for index in sorted(inserts, reverse=True):
+            elements[index:index] = inserts[index]
+
+    @staticmethod
+    def _declare(inserts, index, name, key):
+        obj_name, prop = key.split('.', 1)
+        decl = ast.VarDecl(
+            ast.Identifier(name),
+            ast.DotAccessor(_identifier(obj_name), ast.Identifier(prop)))
+        inserts.setdefault(index, []).append(ast.VarStatement([decl]))
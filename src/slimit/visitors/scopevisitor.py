@@ -26,12 +26,12 @@ __author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
 
 from slimit import ast
 from slimit.scope import VarSymbol, FuncSymbol, LocalScope, SymbolTable
+from slimit.visitors.dispatch import dispatch_table
 
 
 class Visitor(object):
     def visit(self, node):
-        method = 'visit_%s' % node.__class__.__name__
-        return getattr(self, method, self.generic_visit)(node)
+        return dispatch_table[self.__class__, node.__class__](self, node)
 
     def generic_visit(self, node):
         if node is None:
@@ -45,22 +45,48 @@ class Visitor(object):
 
 
 class ScopeTreeVisitor(Visitor):
-    """Builds scope tree."""
+    """Builds scope tree.
+
+    Identifiers that are subject to name mangling are collected in
+    the 'identifiers' list in tree order, so references can be filled
+    and names mangled without walking the tree again.
+    """
 
     def __init__(self, sym_table):
         self.sym_table = sym_table
         self.current_scope = sym_table.globals
+        self.identifiers = []
+
+    def _annotate(self, ident):
+        ident.scope = self.current_scope
+        if getattr(ident, '_mangle_candidate', False):
+            self.identifiers.append(ident)
 
     def visit_VarDecl(self, node):
         ident = node.identifier
         symbol = VarSymbol(name=ident.value)
         if symbol not in self.current_scope:
             self.current_scope.define(symbol)
-        ident.scope = self.current_scope
+        self._annotate(ident)
         self.visit(node.initializer)
 
     def visit_Identifier(self, node):
-        node.scope = self.current_scope
+        self._annotate(node)
+        if node.value == 'eval' and getattr(node, '_in_expression', False):
+            # names of this scope and all enclosing scopes can be
+            # referenced from the evaluated code
+            scope = self.current_scope
+            while scope is not None:
+                scope.has_eval = True
+                scope = scope.get_enclosing_scope()
+
+    def visit_With(self, node):
+        # names declared in the body might be properties of the object
+        scope = self.current_scope
+        while scope is not None:
+            scope.has_with = True
+            scope = scope.get_enclosing_scope()
+        self.generic_visit(node)
 
     def visit_FuncDecl(self, node):
         if node.identifier is not None:
@@ -77,9 +103,10 @@ class ScopeTreeVisitor(Visitor):
 
         # push function scope
         self.current_scope = func_sym
+        node.function_scope = func_sym
         for ident in node.parameters:
             self.current_scope.define(VarSymbol(ident.value))
-            ident.scope = self.current_scope
+            self._annotate(ident)
 
         for element in node.elements:
             self.visit(element)
@@ -99,7 +126,7 @@ class ScopeTreeVisitor(Visitor):
         existing_symbol = self.current_scope.symbols.get(ident.value)
         if existing_symbol is None:
             self.current_scope.define(VarSymbol(ident.value))
-        ident.scope = self.current_scope
+        self._annotate(ident)
 
         for element in node.elements:
             self.visit(element)
@@ -120,21 +147,25 @@ class RefVisitor(Visitor):
             )
 
     @staticmethod
-    def _fill_scope_refs(name, scope):
+    def _fill_scope_refs(name, scope, symbol=None):
         """Put referenced name in 'ref' dictionary of a scope.
 
         Walks up the scope tree and adds the name to 'ref' of every scope
         up in the tree until a scope that defines referenced name is reached.
         """
-        symbol = scope.resolve(name)
+        if symbol is None:
+            symbol = scope.resolve(name)
         if symbol is None:
             return
 
         orig_scope = symbol.scope
-        scope.refs[name] = orig_scope
-        while scope is not orig_scope:
-            scope = scope.get_enclosing_scope()
+        # stop at the first scope that already refers to orig_scope,
+        # the rest of the chain was filled by a previous reference
+        while scope.refs.get(name) is not orig_scope:
             scope.refs[name] = orig_scope
+            if scope is orig_scope:
+                break
+            scope = scope.get_enclosing_scope()
 
 
 def mangle_scope_tree(root, toplevel):
@@ -160,10 +191,43 @@ def mangle_scope_tree(root, toplevel):
     visit(root)
 
 
-def fill_scope_references(tree):
-    """Fill 'ref' scope attribute with values."""
-    visitor = RefVisitor()
-    visitor.visit(tree)
+def rename_scope_tree(root):
+    """Walk over a scope tree and rename identifiers of mangled symbols.
+
+    Expects symbol references filled by fill_scope_references
+    with identifiers collected by ScopeTreeVisitor.
+    """
+    def visit(scope):
+        for name, mangled_name in scope.mangled.items():
+            scope.symbols[name].rename(mangled_name)
+        for child in scope.children:
+            visit(child)
+
+    visit(root)
+
+
+def fill_scope_references(tree, identifiers=None):
+    """Fill 'ref' scope attribute with values.
+
+    Args:
+        identifiers: optional list of identifiers collected by
+        ScopeTreeVisitor, the tree is not walked if it is passed.
+        Every identifier is resolved once: it is added to 'references'
+        of its symbol and the symbol is stored in its 'symbol' attribute.
+    """
+    if identifiers is None:
+        visitor = RefVisitor()
+        visitor.visit(tree)
+        return
+
+    for node in identifiers:
+        symbol = node.scope.resolve(node.value)
+        node.symbol = symbol
+        if symbol is None:
+            continue
+        symbol.references.append(node)
+        if getattr(node, '_in_expression', False):
+            RefVisitor._fill_scope_refs(node.value, node.scope, symbol)
 
 
 class NameManglerVisitor(Visitor):
@@ -0,0 +1,253 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+from slimit import ast
+from slimit.visitors.nodevisitor import ASTVisitor
+from slimit.visitors.varvisitor import is_directive
+
+# operator precedence, the higher value binds tighter
+BINOP_PRECEDENCE = {
+    '||': 3,
+    '&&': 4,
+    '|': 5,
+    '^': 6,
+    '&': 7,
+    '==': 8, '!=': 8, '===': 8, '!==': 8,
+    '<': 9, '>': 9, '<=': 9, '>=': 9, 'instanceof': 9, 'in': 9,
+    '<<': 10, '>>': 10, '>>>': 10,
+    '+': 11, '-': 11,
+    '*': 12, '/': 12, '%': 12,
+    }
+PRIMARY_PRECEDENCE = 20
+
+
+def precedence(node):
+    if getattr(node, '_parens', False):
+        return PRIMARY_PRECEDENCE
+    if isinstance(node, ast.Comma):
+        return 0
+    if isinstance(node, ast.Assign):
+        return 1
+    if isinstance(node, ast.Conditional):
+        return 2
+    if isinstance(node, ast.BinOp):
+        return BINOP_PRECEDENCE[node.op]
+    if isinstance(node, ast.UnaryOp):
+        return 14 if node.postfix else 13
+    return PRIMARY_PRECEDENCE
+
+
+def parenthesize(node, min_precedence):
+    """Mark node with parentheses if it binds weaker than required."""
+    if precedence(node) < min_precedence:
+        node._parens = True
+    return node
+
+
+def leftmost(node):
+    """Return the node an expression statement would start with."""
+    while not getattr(node, '_parens', False):
+        if isinstance(node, (ast.BinOp, ast.Assign, ast.Comma)):
+            node = node.left
+        elif isinstance(node, ast.Conditional):
+            node = node.predicate
+        elif isinstance(node, ast.FunctionCall):
+            node = node.identifier
+        elif isinstance(node, (ast.DotAccessor, ast.BracketAccessor)):
+            node = node.node
+        elif isinstance(node, ast.UnaryOp) and node.postfix:
+            node = node.value
+        else:
+            break
+    return node
+
+
+def make_expr_statement(expr):
+    """Return ExprStatement for expr or None if that is not possible.
+
+    An expression statement can't start with a 'function' keyword or
+    an opening brace.
+    """
+    node = leftmost(expr)
+    if isinstance(node, ast.FuncExpr):
+        node._parens = True
+    elif isinstance(node, ast.Object):
+        return None
+    return ast.ExprStatement(expr)
+
+
+def sequence(left, right):
+    """Join two expressions with the comma operator: left, right"""
+    exprs = []
+    while isinstance(right, ast.Comma) and not getattr(right, '_parens', False):
+        exprs.append(right.right)
+        right = right.left
+    exprs.append(right)
+    for expr in reversed(exprs):
+        left = ast.Comma(left, expr)
+    return left
+
+
+def _is_negation(node):
+    return (isinstance(node, ast.UnaryOp) and node.op == '!' and
+            not node.postfix and not getattr(node, '_parens', False))
+
+
+def _unwrap(node):
+    """Return the only statement of a block."""
+    while isinstance(node, ast.Block) and len(node.children()) == 1:
+        node = node.children()[0]
+    return node
+
+
+def _is_expr_statement(node):
+    return isinstance(node, ast.ExprStatement) and not is_directive(node)
+
+
+def _is_value_return(node):
+    return isinstance(node, ast.Return) and node.expr is not None
+
+
+def _conditional(predicate, consequent, alternative):
+    if _is_negation(predicate):
+        predicate = predicate.value
+        consequent, alternative = alternative, consequent
+    return ast.Conditional(
+        parenthesize(predicate, 3),
+        parenthesize(consequent, 1),
+        parenthesize(alternative, 1),
+        )
+
+
+class SequenceVisitor(ASTVisitor):
+    """Joins statements into expressions.
+
+    a(); b(); ==> a(), b();
+    a(); return b; ==> return a(), b;
+    if (a) b(); ==> a && b();
+    if (!a) b(); ==> a || b();
+    if (a) b(); else c(); ==> a ? b() : c();
+    if (a) return b; else return c; ==> return a ? b : c;
+    if (a) return b; return c; ==> return a ? b : c;
+
+    Blocks that end up containing a single statement lose their braces
+    when printed by ECMAMinifier.
+    """
+
+    def _if_to_expr(self, node):
+        """Convert If node into an equivalent statement if possible."""
+        consequent = _unwrap(node.consequent)
+        alternative = _unwrap(node.alternative)
+        predicate = node.predicate
+
+        if alternative is None:
+            if not _is_expr_statement(consequent):
+                return node
+            if _is_negation(predicate):
+                op, left = '||', predicate.value
+            else:
+                op, left = '&&', predicate
+            expr = ast.BinOp(
+                op,
+                parenthesize(left, BINOP_PRECEDENCE[op]),
+                parenthesize(consequent.expr, BINOP_PRECEDENCE[op] + 1),
+                )
+        elif (_is_expr_statement(consequent) and
+              _is_expr_statement(alternative)):
+            expr = _conditional(predicate, consequent.expr, alternative.expr)
+        elif _is_value_return(consequent) and _is_value_return(alternative):
+            return ast.Return(
+                _conditional(predicate, consequent.expr, alternative.expr))
+        else:
+            return node
+
+        statement = make_expr_statement(expr)
+        return node if statement is None else statement
+
+    def _transform(self, node):
+        if isinstance(node, ast.If):
+            return self._if_to_expr(node)
+        return node
+
+    def _join(self, prev, element):
+        """Join two consecutive statements, return None if not possible."""
+        if _is_expr_statement(prev):
+            if _is_expr_statement(element):
+                prev.expr = sequence(prev.expr, element.expr)
+                return prev
+            if (isinstance(element, (ast.Return, ast.Throw)) and
+                element.expr is not None):
+                element.expr = sequence(prev.expr, element.expr)
+                return element
+        if (isinstance(prev, ast.If) and prev.alternative is None and
+            _is_value_return(_unwrap(prev.consequent)) and
+            _is_value_return(element)):
+            return ast.Return(_conditional(
+                prev.predicate, _unwrap(prev.consequent).expr, element.expr))
+
+    def _compress(self, elements):
+        result = []
+        for element in elements:
+            element = self._transform(element)
+            result.append(element)
+            while len(result) > 1:
+                joined = self._join(result[-2], result[-1])
+                if joined is None:
+                    break
+                result[-2:] = [joined]
+        return result
+
+    def visit_Program(self, node):
+        self.generic_visit(node)
+        node.children()[:] = self._compress(node.children())
+
+    visit_Block = visit_Program
+
+    def visit_FuncDecl(self, node):
+        self.generic_visit(node)
+        node.elements[:] = self._compress(node.elements)
+
+    visit_FuncExpr = visit_FuncDecl
+    visit_GetPropAssign = visit_FuncDecl
+    visit_SetPropAssign = visit_FuncDecl
+    visit_Case = visit_FuncDecl
+    visit_Default = visit_FuncDecl
+
+    def visit_If(self, node):
+        self.generic_visit(node)
+        node.consequent = self._transform(node.consequent)
+        if node.alternative is not None:
+            node.alternative = self._transform(node.alternative)
+
+    def visit_For(self, node):
+        self.generic_visit(node)
+        node.statement = self._transform(node.statement)
+
+    visit_ForIn = visit_For
+    visit_While = visit_For
+    visit_DoWhile = visit_For
+    visit_With = visit_For
+    visit_Label = visit_For
@@ -0,0 +1,182 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+from slimit import ast
+from slimit.visitors.nodevisitor import ASTVisitor
+
+# globals that can be read without side effects
+PURE_GLOBALS = frozenset(['undefined', 'NaN', 'Infinity'])
+
+
+def _is_primitive(node):
+    return isinstance(node, (ast.Number, ast.String, ast.Boolean, ast.Null))
+
+
+def is_side_effect_free(node):
+    """Return True if evaluation of the expression has no side effects.
+
+    The check is conservative: anything that might call user code
+    (valueOf, toString, getters) or throw is treated as a side effect.
+    Identifiers are side effect free only after ScopeTreeVisitor has
+    run and they resolve to a declared name, otherwise reading them
+    might throw a ReferenceError.
+    """
+    if node is None or _is_primitive(node):
+        return True
+    if isinstance(node, (ast.Regex, ast.This, ast.FuncExpr, ast.Elision)):
+        return True
+    if isinstance(node, ast.Identifier):
+        scope = getattr(node, 'scope', None)
+        return (node.value in PURE_GLOBALS or
+                (scope is not None and scope.resolve(node.value) is not None))
+    if isinstance(node, ast.Array):
+        return all(is_side_effect_free(item) for item in node.items)
+    if isinstance(node, ast.Object):
+        return all(
+            isinstance(prop, (ast.GetPropAssign, ast.SetPropAssign)) or
+            is_side_effect_free(prop.right)
+            for prop in node.properties
+            )
+    if isinstance(node, ast.UnaryOp):
+        if node.op == 'typeof' and isinstance(node.value, ast.Identifier):
+            # typeof doesn't throw for undeclared names
+            return True
+        if node.op in ('!', 'void', 'typeof'):
+            return is_side_effect_free(node.value)
+        return node.op in ('-', '+', '~') and _is_primitive(node.value)
+    if isinstance(node, ast.BinOp):
+        return _is_primitive(node.left) and _is_primitive(node.right)
+    if isinstance(node, ast.Conditional):
+        return all(is_side_effect_free(child) for child in node)
+    if isinstance(node, ast.Comma):
+        return is_side_effect_free(node.left) and is_side_effect_free(node.right)
+    return False
+
+
+class UnusedVisitor(ASTVisitor):
+    """Removes declarations of variables and functions never referenced.
+
+    Expects the tree to be annotated with scopes by ScopeTreeVisitor and
+    symbols by fill_scope_references called with identifiers collected
+    by ScopeTreeVisitor. Function parameters are never
+    removed, neither are declarations with initializers that might have
+    side effects or assign a parameter (it changes 'arguments') and
+    names of scopes that contain 'eval' or 'with'.
+    """
+
+    def __init__(self, toplevel=False):
+        self.toplevel = toplevel
+        # number of removed declarations
+        self.removed = 0
+        # parameter names of enclosing functions, the innermost last
+        self._parameters = [frozenset()]
+
+    def _is_unused(self, ident):
+        symbol = getattr(ident, 'symbol', None)
+        if symbol is None:
+            return False
+        scope = symbol.scope
+        if scope.has_eval or scope.has_with:
+            return False
+        # don't remove globals if not specified otherwise
+        if scope.get_enclosing_scope() is None and not self.toplevel:
+            return False
+        return not symbol.is_referenced()
+
+    def _prune(self, var_statement):
+        """Remove unused declarations from a var statement."""
+        decls = var_statement.children()
+        parameters = self._parameters[-1]
+        kept = [
+            decl for decl in decls
+            if not (self._is_unused(decl.identifier) and
+                    is_side_effect_free(decl.initializer) and
+                    (decl.initializer is None or
+                     decl.identifier.value not in parameters))
+            ]
+        self.removed += len(decls) - len(kept)
+        decls[:] = kept
+        return bool(kept)
+
+    def _keep(self, node):
+        """Return False if the statement should be removed."""
+        if isinstance(node, ast.FuncDecl) and self._is_unused(node.identifier):
+            self.removed += 1
+            return False
+        if isinstance(node, ast.VarStatement):
+            return self._prune(node)
+        return True
+
+    def _filter(self, elements):
+        elements[:] = [element for element in elements if self._keep(element)]
+
+    def _statement(self, node):
+        return node if self._keep(node) else ast.EmptyStatement(';')
+
+    def visit_Program(self, node):
+        self.generic_visit(node)
+        self._filter(node.children())
+
+    visit_Block = visit_Program
+
+    def visit_FuncDecl(self, node):
+        self._parameters.append(frozenset(
+            param.value for param in getattr(node, 'parameters', None) or ()))
+        self.generic_visit(node)
+        self._filter(node.elements)
+        self._parameters.pop()
+
+    visit_FuncExpr = visit_FuncDecl
+    visit_GetPropAssign = visit_FuncDecl
+    visit_SetPropAssign = visit_FuncDecl
+
+    def visit_Case(self, node):
+        self.generic_visit(node)
+        self._filter(node.elements)
+
+    visit_Default = visit_Case
+
+    def visit_If(self, node):
+        self.generic_visit(node)
+        node.consequent = self._statement(node.consequent)
+        if node.alternative is not None:
+            node.alternative = self._statement(node.alternative)
+
+    def visit_For(self, node):
+        self.generic_visit(node)
+        if (isinstance(node.init, ast.VarStatement) and
+            not self._prune(node.init)):
+            node.init = None
+        node.statement = self._statement(node.statement)
+
+    def visit_ForIn(self, node):
+        self.generic_visit(node)
+        node.statement = self._statement(node.statement)
+
+    visit_While = visit_ForIn
+    visit_DoWhile = visit_ForIn
+    visit_With = visit_ForIn
+    visit_Label = visit_ForIn
@@ -0,0 +1,245 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+from slimit import ast
+from slimit.visitors.nodevisitor import ASTVisitor
+
+
+def _contains_in_operator(node):
+    """Return True if an unparenthesized 'in' operator is found in node.
+
+    Such initializers can't be moved into the init part of a 'for'
+    statement as the parser would take 'in' for a 'for..in' loop.
+    """
+    if node is None or isinstance(node, (ast.FuncBase, list)):
+        return False
+    if getattr(node, '_parens', False):
+        return False
+    if isinstance(node, ast.BinOp) and node.op == 'in':
+        return True
+    return any(_contains_in_operator(child) for child in node)
+
+
+def is_directive(node):
+    """Return True if node is a directive like "use strict"."""
+    return (isinstance(node, ast.ExprStatement) and
+            isinstance(node.expr, ast.String) and
+            not getattr(node.expr, '_parens', False))
+
+
+class VarMergerVisitor(ASTVisitor):
+    """Merges consecutive var statements.
+
+    var a = 1; var b = 2; ==> var a = 1, b = 2;
+    var i = 0; for (; i < 10; i++) {} ==> for (var i = 0; i < 10; i++) {}
+    """
+
+    def _merge(self, elements):
+        result = []
+        for element in elements:
+            prev = result[-1] if result else None
+            if not isinstance(prev, ast.VarStatement):
+                result.append(element)
+            elif isinstance(element, ast.VarStatement):
+                prev.children().extend(element.children())
+            elif (isinstance(element, ast.For) and
+                  not any(_contains_in_operator(decl.initializer)
+                          for decl in prev)):
+                if element.init is None:
+                    element.init = prev
+                    result[-1] = element
+                elif isinstance(element.init, ast.VarStatement):
+                    element.init.children()[:0] = prev.children()
+                    result[-1] = element
+                else:
+                    result.append(element)
+            else:
+                result.append(element)
+        return result
+
+    def visit_Program(self, node):
+        self.generic_visit(node)
+        node.children()[:] = self._merge(node.children())
+
+    visit_Block = visit_Program
+
+    def visit_FuncDecl(self, node):
+        self.generic_visit(node)
+        node.elements[:] = self._merge(node.elements)
+
+    visit_FuncExpr = visit_FuncDecl
+    visit_GetPropAssign = visit_FuncDecl
+    visit_SetPropAssign = visit_FuncDecl
+    visit_Case = visit_FuncDecl
+    visit_Default = visit_FuncDecl
+
+
+class VarHoisterVisitor(ASTVisitor):
+    """Hoists var declarations into one statement per function.
+
+    The first var statement of a function body receives the names of
+    all other declarations and the remaining var statements are turned
+    into plain assignments:
+
+    function f() { var a = 1; g(); var b = 2; for (var i in a) {} }
+    ==>
+    function f() { var a = 1, b, i; g(); b = 2; for (i in a) {} }
+
+    If a function body doesn't start with a var statement, a new one is
+    inserted right after the directive prologue ('use strict').
+    """
+
+    def visit_FuncDecl(self, node):
+        self.generic_visit(node)
+        self._hoist(node)
+
+    visit_FuncExpr = visit_FuncDecl
+    visit_GetPropAssign = visit_FuncDecl
+    visit_SetPropAssign = visit_FuncDecl
+
+    def _hoist(self, node):
+        elements = node.elements
+        position = 0
+        while position < len(elements) and is_directive(elements[position]):
+            position += 1
+
+        head = None
+        if (position < len(elements) and
+            isinstance(elements[position], ast.VarStatement)):
+            head = elements[position]
+
+        # bail out before touching anything if there is nothing to hoist
+        # or if a 'for (var x = 1 in y)' statement is found
+        decls = []
+        for statement in elements:
+            if statement is not head and not self._collect(statement, decls):
+                return
+        if not decls:
+            return
+
+        params = set(param.value for param in getattr(node, 'parameters', []))
+        declared = set(params)
+        if head is not None:
+            declared.update(decl.identifier.value for decl in head)
+        names = []
+        for decl in decls:
+            name = decl.identifier.value
+            if name not in declared:
+                declared.add(name)
+                names.append(name)
+
+        elements[:] = [
+            element if element is head else self._strip(element)
+            for element in elements
+            ]
+        elements[:] = [element for element in elements if element is not None]
+        if not names:
+            return
+        if head is None:
+            head = ast.VarStatement([])
+            elements.insert(position, head)
+        head.children().extend(
+            ast.VarDecl(ast.Identifier(name)) for name in names)
+
+    def _collect(self, node, decls):
+        """Collect var declarations, return False if hoisting is unsafe."""
+        if node is None or isinstance(node, (ast.FuncBase, list)):
+            return True
+        if isinstance(node, (ast.GetPropAssign, ast.SetPropAssign)):
+            return True
+        if isinstance(node, ast.VarStatement):
+            decls.extend(node.children())
+            return True
+        if isinstance(node, ast.ForIn) and isinstance(node.item, ast.VarDecl):
+            if node.item.initializer is not None:
+                return False
+            decls.append(node.item)
+            return self._collect(node.statement, decls)
+        return all(self._collect(child, decls) for child in node)
+
+    @staticmethod
+    def _to_expr(var_statement):
+        """Turn declarations into a comma separated list of assignments."""
+        expr = None
+        for decl in var_statement:
+            if decl.initializer is None:
+                continue
+            ident = decl.identifier
+            ident._in_expression = True
+            assign = ast.Assign(op='=', left=ident, right=decl.initializer)
+            expr = assign if expr is None else ast.Comma(expr, assign)
+        return expr
+
+    def _strip(self, node):
+        """Remove var declarations from a statement.
+
+        Returns a statement to be used instead of node or None if the
+        statement should be removed completely.
+        """
+        if isinstance(node, ast.VarStatement):
+            expr = self._to_expr(node)
+            return None if expr is None else ast.ExprStatement(expr)
+
+        if isinstance(node, (ast.Program, ast.Block)):
+            children = [self._strip(child) for child in node]
+            node.children()[:] = [
+                child for child in children if child is not None]
+        elif isinstance(node, (ast.Case, ast.Default)):
+            elements = [self._strip(element) for element in node.elements]
+            node.elements[:] = [
+                element for element in elements if element is not None]
+        elif isinstance(node, ast.If):
+            node.consequent = self._strip_statement(node.consequent)
+            if node.alternative is not None:
+                node.alternative = self._strip_statement(node.alternative)
+        elif isinstance(node, ast.For):
+            if isinstance(node.init, ast.VarStatement):
+                node.init = self._to_expr(node.init)
+            node.statement = self._strip_statement(node.statement)
+        elif isinstance(node, ast.ForIn):
+            if isinstance(node.item, ast.VarDecl):
+                node.item = node.item.identifier
+                node.item._in_expression = True
+            node.statement = self._strip_statement(node.statement)
+        elif isinstance(node, (ast.While, ast.DoWhile, ast.With, ast.Label)):
+            node.statement = self._strip_statement(node.statement)
+        elif isinstance(node, ast.Switch):
+            for case in node.cases:
+                self._strip(case)
+            if node.default is not None:
+                self._strip(node.default)
+        elif isinstance(node, ast.Try):
+            self._strip(node.statements)
+            if node.catch is not None:
+                self._strip(node.catch.elements)
+            if node.fin is not None:
+                self._strip(node.fin.elements)
+        return node
+
+    def _strip_statement(self, node):
+        """Same as _strip, but for places that require a statement."""
+        node = self._strip(node)
+        return ast.EmptyStatement(';') if node is None else node
@@ -0,0 +1,191 @@
+###############################################################################
+#
+# Copyright (c) 2011 Ruslan Spivak
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+__author__ = 'Ruslan Spivak <ruslan.spivak@gmail.com>'
+
+import re
+
+from slimit.lexer import Lexer, TOKENS_THAT_IMPLY_DIVISON
+
+# Whitespace and comments are removed without parsing, so code the
+# parser doesn't support can be minified too as long as it consists of
+# ES5 tokens. Names are neither mangled nor the code compressed.
+#
+# slimit.lexer.Lexer returns a token in a few microseconds, which is
+# a big part of the time spent on parsing. Tokens are matched here with
+# one regular expression made of the lexer's token patterns instead,
+# '/' is a regular expression or division by the same rule. Strings
+# without escapes are tried first because it's faster.
+
+_SPECIAL = ('NUMBER', 'LINE_COMMENT', 'BLOCK_COMMENT', 'LINE_TERMINATOR',
+            'DIV', 'DIVEQUAL')
+
+# {'+=': 'PLUSEQUAL', ...}
+_PUNCTUATORS = dict(
+    (getattr(Lexer, 't_' + name).replace('\\', ''), name)
+    for name in Lexer.tokens
+    if isinstance(getattr(Lexer, 't_' + name, None), str) and
+    name not in _SPECIAL
+    )
+
+_TOKEN = re.compile(r"""
+    (?P<gap>(?:[ \t]+|%s|%s|%s)+)
+  | (?P<name>%s)
+  | (?P<number>%s)
+  | (?P<punctuator>%s)
+  | (?P<string>"[^"\\\n\r]*"|'[^'\\\n\r]*'|%s)
+  | (?P<slash>/=?)
+    """ % (
+        Lexer.t_LINE_TERMINATOR, Lexer.t_LINE_COMMENT, Lexer.t_BLOCK_COMMENT,
+        Lexer.identifier, Lexer.t_NUMBER,
+        '|'.join(re.escape(punctuator) for punctuator in sorted(
+            _PUNCTUATORS, key=len, reverse=True)),
+        Lexer.string,
+        ), re.VERBOSE)
+
+_REGEX = re.compile(Lexer.t_regex_REGEX, re.VERBOSE)
+
+_OPERATORS = frozenset([
+    'PERIOD', 'COMMA', 'SEMI', 'COLON', 'PLUS', 'MINUS', 'MULT', 'DIV',
+    'MOD', 'BAND', 'BOR', 'BXOR', 'CONDOP', 'EQ', 'EQEQ', 'NE', 'STREQ',
+    'STRNEQ', 'LT', 'GT', 'LE', 'GE', 'OR', 'AND', 'LSHIFT', 'RSHIFT',
+    'URSHIFT', 'PLUSEQUAL', 'MINUSEQUAL', 'MULTEQUAL', 'DIVEQUAL',
+    'LSHIFTEQUAL', 'RSHIFTEQUAL', 'URSHIFTEQUAL', 'ANDEQUAL', 'MODEQUAL',
+    'XOREQUAL', 'OREQUAL', 'IN', 'INSTANCEOF',
+    ])
+
+# a statement can't end with these tokens, a new line after them
+# never inserts a semicolon
+_NO_END = _OPERATORS | frozenset([
+    'BNOT', 'NOT', 'LPAREN', 'LBRACE', 'LBRACKET',
+    'CASE', 'CATCH', 'DELETE', 'DO', 'ELSE', 'FINALLY', 'FOR', 'FUNCTION',
+    'IF', 'NEW', 'SWITCH', 'TRY', 'TYPEOF', 'VAR', 'VOID', 'WHILE', 'WITH',
+    ])
+
+# these tokens continue the statement before them, a new line before
+# them never inserts a semicolon. '}' inserts it with or without one.
+_CONTINUE = _OPERATORS | frozenset([
+    'LPAREN', 'RPAREN', 'LBRACKET', 'RBRACKET', 'RBRACE',
+    ])
+
+# a new line after them always ends the statement
+_RESTRICTED = frozenset(['BREAK', 'CONTINUE', 'RETURN', 'THROW'])
+
+
+def _is_word_char(char):
+    return char.isalnum() or char in '_$\\'
+
+
+def _needs_space(prev_type, prev, kind, token):
+    """Return True if tokens would merge into other tokens without space."""
+    last, first = prev[-1], token[0]
+    if _is_word_char(first) and (_is_word_char(last) or prev_type == 'REGEX'):
+        # 'var a', 'a in b', '/x/ in b'
+        return True
+    if last == first and last in '+-/':
+        # 'a + +b', 'a - -b', 'a / /x/'
+        return True
+    # '1 .toString()'
+    return prev_type == 'NUMBER' and first == '.' and prev.isdigit()
+
+
+def minify(text):
+    """Remove whitespace and comments from JavaScript code.
+
+    A new line is kept where a semicolon could be inserted instead of it,
+    spaces are kept where tokens would merge.
+
+    >>> from slimit.whitespace import minify
+    >>> print(minify('''
+    ... // increment
+    ... var a = b + +c, d = /x/ in e
+    ... a
+    ... ++b
+    ... function f() {
+    ...   return
+    ...     a / 2
+    ... }
+    ... '''))
+    var a=b+ +c,d=/x/ in e
+    a
+    ++b
+    function f(){return
+    a/2}
+    """
+    match = _TOKEN.match
+    keywords = Lexer.keywords_dict
+    output = []
+    prev_type = prev = None
+    newline = False
+    pos = 0
+    length = len(text)
+    while pos < length:
+        result = match(text, pos)
+        if result is None:
+            raise SyntaxError('Illegal character %r at %s:%s' % (
+                text[pos], text.count('\n', 0, pos) + 1, pos))
+        kind = result.lastgroup
+        token = result.group(kind)
+        pos = result.end()
+        if kind == 'gap':
+            if '\n' in token or '\r' in token:
+                newline = True
+            continue
+        if kind == 'name':
+            if prev_type == 'PERIOD':
+                # property names like o.do are not keywords
+                token_type = 'ID'
+            else:
+                token_type = keywords.get(token, 'ID')
+        elif kind == 'punctuator':
+            token_type = _PUNCTUATORS[token]
+        elif kind == 'string':
+            token_type = 'STRING'
+            # the same as the lexer does
+            token = token.replace('\\\n', '')
+        elif kind == 'number':
+            token_type = 'NUMBER'
+        elif prev_type in TOKENS_THAT_IMPLY_DIVISON:
+            token_type = 'DIVEQUAL' if token == '/=' else 'DIV'
+        else:
+            result = _REGEX.match(text, result.start())
+            if result is None:
+                raise SyntaxError(
+                    'Error parsing regular expression at %s:%s' % (
+                        text.count('\n', 0, pos) + 1, pos))
+            token_type = 'REGEX'
+            token = result.group()
+            pos = result.end()
+
+        if prev is not None:
+            if newline and (
+                prev_type in _RESTRICTED or
+                prev_type not in _NO_END and token_type not in _CONTINUE):
+                output.append('\n')
+            elif _needs_space(prev_type, prev, token_type, token):
+                output.append(' ')
+        output.append(token)
+        prev_type, prev = token_type, token
+        newline = False
+    return ''.join(output)